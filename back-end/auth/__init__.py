@@ -1,4 +1,4 @@
-from .auth import jwt_required, premium_required, JWTManager, auth_required, firebase_required
+from .auth import jwt_required, premium_required, JWTManager, auth_required, firebase_required, firebase_user_payload
 
 # Export all auth components
-__all__ = ['jwt_required', 'premium_required', 'JWTManager', 'auth_required', 'firebase_required']
+__all__ = ['jwt_required', 'premium_required', 'JWTManager', 'auth_required', 'firebase_required', 'firebase_user_payload']
@@ -213,6 +213,37 @@ def auth_required(f):
     
     return decorated
 
+def firebase_user_payload(id_token):
+    """Verify Firebase ID token và trả về user payload (None nếu token không hợp lệ)"""
+    # Verify Firebase token
+    firebase_user = JWTManager.verify_firebase_token(id_token)
+    if not firebase_user:
+        return None
+    
+    # Get user data from Firestore
+    user_data = get_user_data_firebase(firebase_user['uid'])
+    
+    # Convert to our user format
+    user_payload = {
+        'user_id': firebase_user['uid'],
+        'email': firebase_user.get('email', ''),
+        'name': firebase_user.get('name', ''),
+        'role': 'free',
+        'subscription': 'free',
+        'type': 'firebase'
+    }
+    
+    # Update with Firestore data if available
+    if user_data:
+        subscription = user_data.get('subscription', {})
+        user_payload.update({
+            'name': user_data.get('firstName', user_payload['name']),
+            'role': 'premium' if subscription.get('isPro', False) else 'free',
+            'subscription': 'premium' if subscription.get('isPro', False) else 'free'
+        })
+    
+    return user_payload
+
 def firebase_required(f):
     """Decorator chỉ chấp nhận Firebase ID token"""
     @wraps(f)
@@ -224,33 +255,10 @@ def firebase_required(f):
         
         token = auth_header.split(' ')[1]
         
-        # Verify Firebase token
-        firebase_user = JWTManager.verify_firebase_token(token)
-        if not firebase_user:
+        user_payload = firebase_user_payload(token)
+        if not user_payload:
             return jsonify({'error': 'Invalid Firebase token'}), 401
         
-        # Get user data from Firestore
-        user_data = get_user_data_firebase(firebase_user['uid'])
-        
-        # Convert to our user format
-        user_payload = {
-            'user_id': firebase_user['uid'],
-            'email': firebase_user.get('email', ''),
-            'name': firebase_user.get('name', ''),
-            'role': 'free',
-            'subscription': 'free',
-            'type': 'firebase'
-        }
-        
-        # Update with Firestore data if available
-        if user_data:
-            subscription = user_data.get('subscription', {})
-            user_payload.update({
-                'name': user_data.get('firstName', user_payload['name']),
-                'role': 'premium' if subscription.get('isPro', False) else 'free',
-                'subscription': 'premium' if subscription.get('isPro', False) else 'free'
-            })
-        
         # Attach user info to request
         request.current_user = user_payload
         return f(*args, **kwargs)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Async Server Load Test
+Starts local stand-in OpenAI chat and embedding servers with fixed latency,
+runs tools/asgi_server.py against them and keeps increasing numbers of
+/api/ask requests open at once: throughput, latency percentiles and the
+server's thread count show how many questions one worker holds in flight.
+MongoDB (MONGODB_URI) must be reachable with a built index.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import httpx
+import uvicorn
+
+from rag_system.shared.config import load_config
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StandInServer:
+    """
+    OpenAI-compatible chat-completions and embeddings endpoints on one ASGI app
+    Responses come after a fixed ``asyncio.sleep``, so the stand-in itself
+    holds any number of concurrent requests
+    """
+
+    def __init__(self, dim: int, llm_latency_s: float, embedding_latency_s: float):
+        self.dim = dim
+        self.llm_latency_s = llm_latency_s
+        self.embedding_latency_s = embedding_latency_s
+        self.port = free_port()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def vector(self, text: Any) -> List[float]:
+        """Deterministic unit vector for an input (string or token ids)"""
+        seed = int.from_bytes(hashlib.sha256(json.dumps(text).encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+    async def app(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        request = json.loads(body or b"{}")
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if scope["path"].endswith("/embeddings"):
+                await asyncio.sleep(self.embedding_latency_s)
+                inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+                # A list of ints is one tokenised input, not a batch
+                if inputs and isinstance(inputs[0], int):
+                    inputs = [inputs]
+                payload = {
+                    "object": "list",
+                    "model": request.get("model", "stand-in"),
+                    "data": [{"object": "embedding", "index": i, "embedding": self.vector(text)} for i, text in enumerate(inputs)],
+                    "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+                }
+            else:
+                await asyncio.sleep(self.llm_latency_s)
+                payload = {
+                    "id": "chatcmpl-stand-in",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stand-in"),
+                    # "CÓ" also answers the off-topic check positively
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "CÓ. Câu trả lời tư vấn mẫu."}}],
+                    "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+                }
+        finally:
+            self.in_flight -= 1
+
+        data = json.dumps(payload).encode("utf-8")
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]})
+        await send({"type": "http.response.body", "body": data})
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+# Serves the tools/asgi_server.py app with Firebase authentication replaced by
+# a fixed user, so the load test needs no tokens and the server itself keeps no
+# switch to turn authentication off
+SERVER_LAUNCHER = """
+import sys
+import uvicorn
+
+sys.path.insert(0, sys.argv[1])
+import asgi_server
+
+
+async def benchmark_user():
+    return {'user_id': 'benchmark', 'email': 'benchmark', 'type': 'benchmark'}
+
+
+asgi_server.app.dependency_overrides[asgi_server.current_user] = benchmark_user
+uvicorn.run(asgi_server.app, host='127.0.0.1', port=int(sys.argv[2]), log_level='warning')
+"""
+
+
+def start_server(stand_in: StandInServer, port: int) -> subprocess.Popen:
+    """Run the tools/asgi_server.py app against the stand-ins"""
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "stand-in",
+        "OPENAI_API_BASE": stand_in.url,
+        "EMBEDDING_API_BASE": stand_in.url,
+        # Every question is new, and answers must come from the stand-in LLM
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    tools_dir = Path(__file__).parent.parent / "tools"
+    return subprocess.Popen([sys.executable, "-c", SERVER_LAUNCHER, str(tools_dir), str(port)], env=env)
+
+
+def wait_until_ready(url: str, timeout_s: float = 120.0) -> Dict[str, Any]:
+    """Poll /api/status until the agent is initialized"""
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            status = httpx.get(f"{url}/api/status", timeout=5).json()
+            if status.get("agent_initialized"):
+                return status
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server at {url} did not initialize within {timeout_s:.0f}s")
+
+
+def thread_count(pid: int) -> Optional[int]:
+    """OS threads of a process (Linux only)"""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def run_level(url: str, concurrency: int, total: int, token: str, pid: Optional[int]) -> Dict[str, Any]:
+    """Send ``total`` questions keeping ``concurrency`` of them open"""
+    latencies: List[float] = []
+    errors = 0
+    peak_threads = 0
+    counter = iter(range(total))
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300, headers=headers) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                start_time = time.perf_counter()
+                try:
+                    response = await client.post("/api/ask", json={"question": f"Ngành nào phù hợp với tôi? (#{concurrency}-{i})"})
+                    if response.status_code != 200 or response.json().get("type") == "system_error":
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start_time)
+
+        async def sample_threads():
+            nonlocal peak_threads
+            while True:
+                peak_threads = max(peak_threads, thread_count(pid) or 0)
+                await asyncio.sleep(0.2)
+
+        sampler = asyncio.create_task(sample_threads()) if pid else None
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start_time
+        if sampler is not None:
+            sampler.cancel()
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": float(np.percentile(latencies, 50)) if latencies else float("nan"),
+        "p95": float(np.percentile(latencies, 95)) if latencies else float("nan"),
+        "p99": float(np.percentile(latencies, 99)) if latencies else float("nan"),
+        "threads": peak_threads or None,
+    }
+
+
+def print_rows(rows: List[Dict[str, Any]], floor_s: Optional[float]) -> None:
+    print("\n" + "=" * 86)
+    print(f"{'open requests':>13} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'server threads':>15}")
+    print("-" * 86)
+    for row in rows:
+        threads = row["threads"] if row["threads"] is not None else "-"
+        print(f"{row['concurrency']:>13} {row['requests']:>9} {row['errors']:>7} {row['throughput']:>8.1f} "
+              f"{row['p50']:>7.2f} {row['p95']:>7.2f} {row['p99']:>7.2f} {threads:>15}")
+    print("=" * 86)
+    if floor_s is not None:
+        print(f"Stand-in latency per question: {floor_s:.2f}s (embedding + generation); "
+              f"ideal throughput = open requests / {floor_s:.2f}s\n")
+
+
+def run_benchmark(
+    levels: List[int],
+    requests_per_slot: int,
+    llm_latency_s: float,
+    embedding_latency_s: float,
+    url: Optional[str] = None,
+    token: str = "",
+) -> List[Dict[str, Any]]:
+    """Load-test a running server, or start the async server against stand-ins"""
+    setup_logging()
+
+    if url:
+        logger.info(f"🏋️ Load test against {url}: {levels} open requests")
+        rows = [asyncio.run(run_level(url, level, level * requests_per_slot, token, None)) for level in levels]
+        print_rows(rows, None)
+        return rows
+
+    config = load_config()
+    with StandInServer(config.embedding_dimension, llm_latency_s, embedding_latency_s) as stand_in:
+        port = free_port()
+        server_url = f"http://127.0.0.1:{port}"
+        logger.info(f"🧪 Stand-in LLM/embeddings at {stand_in.url} (LLM {llm_latency_s}s, embeddings {embedding_latency_s}s)")
+        process = start_server(stand_in, port)
+        try:
+            wait_until_ready(server_url)
+            logger.info(f"🏋️ Load test against the async server: {levels} open requests")
+            rows = []
+            for level in levels:
+                rows.append(asyncio.run(run_level(server_url, level, level * requests_per_slot, "", process.pid)))
+                logger.info(f"✅ {level} open requests: {rows[-1]['throughput']:.1f} req/s, {rows[-1]['errors']} errors")
+            server_stats = httpx.get(f"{server_url}/api/status", timeout=10).json().get("server", {})
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print_rows(rows, llm_latency_s + embedding_latency_s)
+    print(f"Peak questions in flight in the server: {server_stats.get('max_in_flight')}, "
+          f"peak concurrent stand-in calls: {stand_in.max_in_flight}\n")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test the async (ASGI) counselling server")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 500], help="Open requests per level")
+    parser.add_argument("--requests-per-slot", type=int, default=2, help="Requests sent per open slot at each level")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Stand-in chat completion latency (s)")
+    parser.add_argument("--embedding-latency", type=float, default=0.2, help="Stand-in embedding latency (s)")
+    parser.add_argument("--url", help="Load-test an already running server instead")
+    parser.add_argument("--token", default=os.getenv("BENCHMARK_AUTH_TOKEN", ""), help="Bearer token for --url (default $BENCHMARK_AUTH_TOKEN)")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.concurrency, args.requests_per_slot, args.llm_latency, args.embedding_latency, args.url, args.token)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
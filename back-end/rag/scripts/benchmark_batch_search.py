@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Batched Search Benchmark
+Compares SimilarityIndex.search_batch (blocked GEMM) with one search per query
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.similarity_index import SimilarityIndex
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def run_benchmark(size: int, dim: int, batch_sizes: List[int], k: int, block_size: int) -> List[Dict[str, Any]]:
+    """Time looped and batched search for several query batch sizes"""
+    setup_logging()
+    logger.info(f"📦 Batched search benchmark: {size:,} chunks, dim={dim}, k={k}, block={block_size:,}")
+
+    rng = np.random.default_rng(0)
+    index = SimilarityIndex([str(i) for i in range(size)], rng.standard_normal((size, dim), dtype=np.float32))
+
+    rows = []
+    for batch_size in batch_sizes:
+        queries = rng.standard_normal((batch_size, dim), dtype=np.float32)
+
+        start_time = time.perf_counter()
+        looped = [index.search(query, k) for query in queries]
+        loop_s = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        batched = index.search_batch(queries, k, block_size=block_size)
+        batch_s = time.perf_counter() - start_time
+
+        agreement = np.mean([
+            [chunk_id for chunk_id, _ in a] == [chunk_id for chunk_id, _ in b]
+            for a, b in zip(looped, batched)
+        ])
+        rows.append({
+            "queries": batch_size,
+            "loop_qps": batch_size / loop_s,
+            "batch_qps": batch_size / batch_s,
+            "score_buffer_mb": batch_size * min(block_size, size) * 4 / 1024 ** 2,
+            "agreement": float(agreement),
+        })
+
+    print("\n" + "=" * 72)
+    print(f"{'queries':>8} {'loop q/s':>12} {'batch q/s':>12} {'speedup':>9} {'buffer MB':>11} {'same top-k':>11}")
+    print("-" * 72)
+    for row in rows:
+        print(f"{row['queries']:>8} {row['loop_qps']:>12,.0f} {row['batch_qps']:>12,.0f} "
+              f"{row['batch_qps'] / row['loop_qps']:>8.1f}x {row['score_buffer_mb']:>11.1f} {row['agreement']:>11.3f}")
+    print("=" * 72 + "\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark batched multi-query vector search")
+    parser.add_argument("--size", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--batches", type=int, nargs="+", default=[16, 256, 1024], help="Query batch sizes")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--block-size", type=int, default=16_384, help="Corpus rows per matrix product")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.size, args.dim, args.batches, args.k, args.block_size)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Context Packing Benchmark
+Compares the prompt tokens of the fixed 500-character truncation (and of whole
+parents) with token-budgeted packing at several budgets, on synthetic
+retrieval results, and the time packing adds per question
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.adaptive_batching import TokenCounter
+from rag_system.online.context_packer import ContextPacker
+
+WORDS = (
+    "ngành nghề kỹ năng học tập sinh viên doanh nghiệp công nghệ thông tin lương "
+    "thị trường lao động tuyển dụng kinh nghiệm đại học chuyên ngành phát triển "
+    "career skills salary industry training internship software data analysis"
+).split()
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_text(rng: np.random.Generator, chars: int) -> str:
+    """Sentences of random vocabulary words, about ``chars`` characters long"""
+    sentences: List[str] = []
+    length = 0
+    while length < chars:
+        words = rng.choice(WORDS, size=int(rng.integers(6, 20)))
+        sentence = " ".join(words).capitalize() + str(rng.choice([".", ".", "!", "?"]))
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def make_results(rng: np.random.Generator, k: int, min_chars: int, max_chars: int, counter: TokenCounter) -> List[Dict[str, Any]]:
+    """k retrieved documents with random lengths, scores and index-time token counts"""
+    docs = []
+    for i, score in enumerate(sorted(rng.uniform(0.3, 0.95, size=k), reverse=True)):
+        content = make_text(rng, int(rng.integers(min_chars, max_chars)))
+        docs.append({
+            "content": content,
+            "token_count": counter.count(content),
+            "similarity_score": float(score),
+            "metadata": {"title": f"Tài liệu mẫu {i + 1}"},
+        })
+    return docs
+
+
+def legacy_context(documents: List[Dict[str, Any]], truncate: bool) -> str:
+    """Context as built before packing: every document, cut at 500 characters (chunks) or whole (parents)"""
+    parts = []
+    for i, doc in enumerate(documents, 1):
+        content = doc["content"]
+        if truncate and len(content) > 500:
+            content = content[:500] + "..."
+        parts.append(f"[{doc['metadata']['title']}] (độ liên quan: {doc['similarity_score']:.2f})\n{content}")
+    return "\n\n".join(parts)
+
+
+def run_benchmark(
+    questions: int,
+    k: int,
+    min_chars: int,
+    max_chars: int,
+    budgets: List[int],
+    model_name: str,
+) -> List[Dict[str, Any]]:
+    """Mean context tokens and packing time per question for each strategy"""
+    setup_logging()
+    counter = TokenCounter(model_name)
+    logger.info(f"📦 Context packing benchmark: {questions} questions x {k} docs of {min_chars}-{max_chars} chars "
+                f"({'tiktoken' if counter.exact else 'estimated'} token counts for {model_name})")
+
+    rng = np.random.default_rng(0)
+    result_sets = [make_results(rng, k, min_chars, max_chars, counter) for _ in range(questions)]
+
+    rows = []
+    for name, truncate in (("500-char cut", True), ("whole docs", False)):
+        tokens = [counter.count(legacy_context(docs, truncate)) for docs in result_sets]
+        rows.append({"strategy": name, "tokens": float(np.mean(tokens)), "max_tokens": max(tokens),
+                     "documents": float(k), "trimmed": 0.0, "ms": 0.0})
+
+    packer = ContextPacker(counter)
+    for budget in budgets:
+        packed = []
+        start_time = time.perf_counter()
+        for docs in result_sets:
+            packed.append(packer.pack(docs, budget))
+        elapsed_ms = (time.perf_counter() - start_time) * 1000 / questions
+        tokens = [counter.count(result["context"]) for result in packed]
+        rows.append({
+            "strategy": f"packed, {budget} tokens",
+            "tokens": float(np.mean(tokens)),
+            "max_tokens": max(tokens),
+            "documents": float(np.mean([result["documents"] for result in packed])),
+            "trimmed": float(np.mean([result["trimmed"] for result in packed])),
+            "ms": elapsed_ms,
+        })
+
+    print("\n" + "=" * 80)
+    print(f"{'strategy':<24} {'mean tokens':>12} {'max tokens':>11} {'docs':>6} {'trimmed':>8} {'pack ms':>9}")
+    print("-" * 80)
+    for row in rows:
+        print(f"{row['strategy']:<24} {row['tokens']:>12.0f} {row['max_tokens']:>11} {row['documents']:>6.1f} "
+              f"{row['trimmed']:>8.0%} {row['ms']:>9.3f}")
+    print("=" * 80)
+    print("Packed contexts end on a sentence boundary; the 500-char cut ends mid-word\n")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare fixed truncation with token-budgeted context packing")
+    parser.add_argument("--questions", type=int, default=200, help="Synthetic retrieval results to pack")
+    parser.add_argument("--k", type=int, default=5, help="Documents retrieved per question")
+    parser.add_argument("--min-chars", type=int, default=300, help="Shortest document (characters)")
+    parser.add_argument("--max-chars", type=int, default=2000, help="Longest document (characters)")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[400, 1200, 2000], help="Token budgets to pack into")
+    parser.add_argument("--model", default="gpt-4o-mini", help="Chat model whose tokenizer to use")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.questions, args.k, args.min_chars, args.max_chars, args.budgets, args.model)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
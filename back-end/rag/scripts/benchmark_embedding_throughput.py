@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Embedding Throughput Benchmark
+Runs EmbeddingGenerator against a local fake OpenAI embeddings server with
+injected latency (and optional 429s) to compare sequential, concurrent and
+token-budgeted adaptive batches
+"""
+
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.embeddings import EmbeddingGenerator
+from rag_system.shared.config import load_config
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="WARNING"
+    )
+
+
+def fake_vectors(dim: int, count: int = 256) -> List[str]:
+    """Pool of random unit vectors, pre-serialised so the server spends its time sleeping"""
+    vectors = np.random.default_rng(0).standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [json.dumps(vector.round(6).tolist()) for vector in vectors]
+
+
+def pick_vector(pool: List[str], text: Any) -> str:
+    """Deterministic choice from the pool for an input (string or token ids)"""
+    digest = hashlib.sha256(json.dumps(text).encode("utf-8")).digest()
+    return pool[int.from_bytes(digest[:4], "little") % len(pool)]
+
+
+class FakeEmbeddingServer:
+    """OpenAI-compatible /v1/embeddings endpoint with injected latency and 429s"""
+
+    def __init__(self, dim: int, latency_ms: float, error_rate: float, ms_per_1k_tokens: float = 0.0):
+        self.pool = fake_vectors(dim)
+        self.latency_ms = latency_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.error_rate = error_rate
+        self.requests = 0
+        self.rate_limited = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload: bytes, headers: Dict[str, str] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.requests += 1
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                try:
+                    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+                    tokens = sum(len(json.dumps(text)) // 4 for text in inputs)
+                    time.sleep((server.latency_ms + server.ms_per_1k_tokens * tokens / 1000) / 1000)
+                    if random.random() < server.error_rate:
+                        with server._lock:
+                            server.rate_limited += 1
+                        error = {"error": {"message": "Rate limit reached", "type": "requests"}}
+                        self._reply(429, json.dumps(error).encode("utf-8"), {"retry-after": "0.2"})
+                        return
+
+                    data = ",".join(
+                        f'{{"object": "embedding", "index": {i}, "embedding": {pick_vector(server.pool, text)}}}'
+                        for i, text in enumerate(inputs)
+                    )
+                    self._reply(200, (
+                        f'{{"object": "list", "model": {json.dumps(body.get("model"))}, "data": [{data}], '
+                        f'"usage": {{"prompt_tokens": 0, "total_tokens": 0}}}}'
+                    ).encode("utf-8"))
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+        return Handler
+
+    def __enter__(self) -> "FakeEmbeddingServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_texts(num_texts: int, chunk_size: int) -> List[str]:
+    """Mix of child-sized and parent-sized (2x) admission texts"""
+    rng = random.Random(0)
+    sentence = "Điểm chuẩn ngành {} năm {} theo phương thức xét tuyển học bạ là {} điểm. "
+    texts = []
+    for i in range(num_texts):
+        target = chunk_size * (2 if i % 3 == 0 else 1) * rng.uniform(0.3, 1.0)
+        text = f"[{i}] "
+        while len(text) < target:
+            text += sentence.format(rng.randint(1, 60), rng.randint(2019, 2025), rng.randint(15, 29))
+        texts.append(text)
+    return texts
+
+
+def run_scenario(base_config, texts: List[str], name: str, concurrency: int, fixed_batch: int,
+                 latency_ms: float, ms_per_1k_tokens: float, error_rate: float, dim: int,
+                 settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Embed texts once with one batching setup against a fresh fake server"""
+    with FakeEmbeddingServer(dim, latency_ms, error_rate, ms_per_1k_tokens) as server:
+        update = {
+            "embedding_dimension": dim,
+            "embedding_api_base": server.url,
+            "openai_api_key": base_config.openai_api_key or "sk-fake",
+            "embedding_concurrency": concurrency,
+            **settings,
+        }
+        if fixed_batch:
+            # An unreachable token budget leaves only the text cap: the old fixed batches
+            update.update({"embedding_batch_tokens": 10 ** 9, "embedding_batch_max_tokens": 10 ** 9,
+                           "embedding_batch_max_texts": fixed_batch})
+        generator = EmbeddingGenerator(base_config.model_copy(update=update), model_type="openai", use_cache=False)
+        # The fake server accepts raw strings; skips tiktoken's encoding download
+        generator.model.check_embedding_ctx_length = False
+
+        start_time = time.perf_counter()
+        embeddings = generator.generate_batch(texts)
+        elapsed = time.perf_counter() - start_time
+
+        summary = generator.batcher.summary()
+        return {
+            "setup": name,
+            "seconds": elapsed,
+            "texts_per_s": len(texts) / elapsed,
+            "requests": server.requests,
+            "rate_limited": server.rate_limited,
+            "max_in_flight": server.max_in_flight,
+            "tokens_min": summary["tokens_per_batch"]["min"],
+            "tokens_max": summary["tokens_per_batch"]["max"],
+            "p95_s": summary["latency_p95_s"],
+            "budgets": [m["budget"] for m in generator.batch_metrics],
+            "embeddings": embeddings,
+        }
+
+
+def run_benchmark(num_texts: int, concurrency: int, latency_ms: float, ms_per_1k_tokens: float,
+                  error_rate: float, chunk_size: int, rpm: int, tpm: int, target_latency_s: float,
+                  dim: int) -> List[Dict[str, Any]]:
+    """Compare fixed batches of 50 (sequential and concurrent) with adaptive token-budgeted batches"""
+    setup_logging()
+    base_config = load_config(str(Path(__file__).parent.parent / ".env.rag"))
+    texts = make_texts(num_texts, chunk_size)
+    print(f"🚀 Embedding {num_texts} texts of {chunk_size}-{2 * chunk_size} chars, "
+          f"{latency_ms:.0f} ms + {ms_per_1k_tokens:.0f} ms/1k tokens latency, {error_rate:.0%} 429s, "
+          f"limits {rpm} RPM / {tpm} TPM, target latency {target_latency_s}s")
+
+    settings = {
+        "embedding_requests_per_minute": rpm,
+        "embedding_tokens_per_minute": tpm,
+        "embedding_target_latency_s": target_latency_s,
+    }
+    common = (latency_ms, ms_per_1k_tokens, error_rate, dim, settings)
+    rows = [
+        run_scenario(base_config, texts, "fixed 50 x1", 1, 50, *common),
+        run_scenario(base_config, texts, f"fixed 50 x{concurrency}", concurrency, 50, *common),
+        run_scenario(base_config, texts, f"adaptive x{concurrency}", concurrency, 0, *common),
+    ]
+
+    reference = rows[0]["embeddings"]
+    baseline = rows[0]["seconds"]
+    print("\n" + "=" * 96)
+    print(f"{'setup':>14} {'seconds':>8} {'texts/s':>8} {'speedup':>8} {'requests':>9} {'429s':>5} "
+          f"{'in flight':>10} {'tokens/batch':>14} {'p95 s':>6} {'order':>6}")
+    print("-" * 96)
+    for row in rows:
+        print(f"{row['setup']:>14} {row['seconds']:>8.2f} {row['texts_per_s']:>8.0f} "
+              f"{baseline / row['seconds']:>7.1f}x {row['requests']:>9} {row['rate_limited']:>5} "
+              f"{row['max_in_flight']:>10} {row['tokens_min']:>6}-{row['tokens_max']:<7} {row['p95_s']:>6.2f} "
+              f"{'ok' if row['embeddings'] == reference else 'WRONG':>6}")
+    print("=" * 96)
+    budgets = rows[-1]["budgets"]
+    print(f"Adaptive budget over the run: {budgets[:12]}{' ...' if len(budgets) > 12 else ''}\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark embedding batching against a fake server")
+    parser.add_argument("--texts", type=int, default=2000, help="Number of texts to embed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Workers for the concurrent setups")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Injected fixed latency per request")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40, help="Injected latency per 1k tokens")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Fraction of requests answered with 429")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Child chunk size in characters")
+    parser.add_argument("--rpm", type=int, default=3000, help="Requests-per-minute limit")
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="Tokens-per-minute limit")
+    parser.add_argument("--target-latency", type=float, default=2.0, help="Adaptive batching latency target (s)")
+    parser.add_argument("--dim", type=int, default=256,
+                        help="Fake embedding dimension (small keeps client-side JSON parsing out of the timing)")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.texts, args.concurrency, args.latency_ms, args.ms_per_1k_tokens, args.error_rate,
+                      args.chunk_size, args.rpm, args.tpm, args.target_latency, args.dim)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
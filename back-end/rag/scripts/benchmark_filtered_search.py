@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Filtered Vector Search Benchmark
+Compares metadata pre-filtering against post-filtering on a synthetic corpus
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.metadata_filter import MetadataFilterIndex
+from rag_system.offline.similarity_index import SimilarityIndex, top_k_indices, normalize_vector
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_corpus(size: int, dim: int, seed: int = 0, block_size: int = 50_000) -> np.ndarray:
+    """Generate a random float32 corpus block by block"""
+    rng = np.random.default_rng(seed)
+    corpus = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, block_size):
+        end = min(start + block_size, size)
+        corpus[start:end] = rng.standard_normal((end - start, dim), dtype=np.float32)
+    return corpus
+
+
+def percentiles(latencies: List[float]) -> tuple:
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def run_benchmark(
+    size: int,
+    dim: int,
+    num_sources: List[int],
+    num_queries: int,
+    k: int,
+    overfetch_factor: int = 10,
+) -> List[Dict[str, Any]]:
+    """Time pre-filtered and post-filtered search at several filter selectivities"""
+    setup_logging()
+    logger.info(f"🧮 Filtered search benchmark: {size:,} chunks, dim={dim}, k={k}")
+
+    index = SimilarityIndex([str(i) for i in range(size)], make_corpus(size, dim))
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+
+    rows = []
+    for sources in num_sources:
+        source_of = rng.integers(0, sources, size)
+        index.metadata = MetadataFilterIndex.from_columns({"source": [f"brochure_{s}.pdf" for s in source_of]})
+
+        pre, post, overfetch, recalls = [], [], [], []
+        for query in queries:
+            target = int(rng.integers(0, sources))
+            filters = {"source": f"brochure_{target}.pdf"}
+
+            start_time = time.perf_counter()
+            expected = {chunk_id for chunk_id, _ in index.search(query, k, filters=filters)}
+            pre.append((time.perf_counter() - start_time) * 1000)
+
+            # Post-filter: score the whole corpus, then mask out non-matching rows
+            start_time = time.perf_counter()
+            scores = index.matrix @ normalize_vector(query)
+            mask = np.zeros(size, dtype=bool)
+            mask[index.metadata.rows_for(filters)] = True
+            scores[~mask] = -np.inf
+            top_k_indices(scores, k)
+            post.append((time.perf_counter() - start_time) * 1000)
+
+            # Over-fetch then filter, the usual shortcut when the index cannot filter
+            start_time = time.perf_counter()
+            hits = index.search(query, k * overfetch_factor)
+            kept = [chunk_id for chunk_id, _ in hits if source_of[int(chunk_id)] == target][:k]
+            overfetch.append((time.perf_counter() - start_time) * 1000)
+            recalls.append(len(expected.intersection(kept)) / max(len(expected), 1))
+
+        pre_p50, pre_p99 = percentiles(pre)
+        post_p50, post_p99 = percentiles(post)
+        over_p50, _ = percentiles(overfetch)
+        rows.append({
+            "selectivity": 1.0 / sources,
+            "pre_p50": pre_p50,
+            "pre_p99": pre_p99,
+            "post_p50": post_p50,
+            "post_p99": post_p99,
+            "overfetch_p50": over_p50,
+            "overfetch_recall": float(np.mean(recalls)),
+        })
+
+    print("\n" + "=" * 96)
+    print(f"{'matching':>9} {'pre p50':>9} {'pre p99':>9} {'post p50':>9} {'post p99':>9} {'speedup':>8} "
+          f"{f'over x{overfetch_factor} p50':>15} {'over recall':>12}")
+    print("-" * 96)
+    for row in rows:
+        print(
+            f"{row['selectivity']:>9.2%} {row['pre_p50']:>9.2f} {row['pre_p99']:>9.2f} "
+            f"{row['post_p50']:>9.2f} {row['post_p99']:>9.2f} {row['post_p50'] / row['pre_p50']:>7.1f}x "
+            f"{row['overfetch_p50']:>15.2f} {row['overfetch_recall']:>12.3f}"
+        )
+    print("=" * 96)
+    print("Latencies in ms; 'over' searches k * factor unfiltered results and drops non-matching ones\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark metadata pre-filtering vs post-filtering")
+    parser.add_argument("--size", type=int, default=500_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument(
+        "--sources",
+        type=int,
+        nargs="+",
+        default=[1000, 100, 10],
+        help="Number of distinct sources (filter matches 1/N of the corpus)"
+    )
+    parser.add_argument("--queries", type=int, default=100, help="Number of timed queries")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--overfetch", type=int, default=10, help="Over-fetch factor of the post-filter baseline")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.size, args.dim, args.sources, args.queries, args.k, args.overfetch)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
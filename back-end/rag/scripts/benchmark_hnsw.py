@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+HNSW Recall/Latency Benchmark
+Compares the approximate HNSW index against exact search on a synthetic corpus
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.hnsw_index import HNSWIndex
+from rag_system.offline.similarity_index import SimilarityIndex
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_clustered_corpus(size: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Generate embeddings grouped around topic centroids, closer to real text than pure noise"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim), dtype=np.float32)
+    assignment = rng.integers(0, clusters, size)
+    return centroids[assignment] + 0.6 * rng.standard_normal((size, dim), dtype=np.float32)
+
+
+def time_queries(index, queries: np.ndarray, k: int) -> tuple:
+    """Run queries and return (results, latencies in ms)"""
+    results, latencies = [], []
+    for query in queries:
+        start_time = time.perf_counter()
+        results.append([chunk_id for chunk_id, _ in index.search(query, k)])
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return results, latencies
+
+
+def run_benchmark(
+    size: int,
+    dim: int,
+    num_queries: int,
+    k: int,
+    m: int,
+    ef_construction: int,
+    ef_values: List[int],
+) -> List[Dict[str, Any]]:
+    """Build both indexes and report recall@k against latency for each ef_search"""
+    setup_logging()
+    logger.info(f"🕸️ HNSW benchmark: {size:,} chunks, dim={dim}, M={m}, k={k}")
+
+    corpus = make_clustered_corpus(size, dim)
+    ids = [str(i) for i in range(size)]
+    queries = make_clustered_corpus(num_queries, dim, seed=1)
+
+    exact = SimilarityIndex(ids, corpus)
+    truth, exact_latencies = time_queries(exact, queries, k)
+
+    start_time = time.perf_counter()
+    hnsw = HNSWIndex(dim, max_elements=size, m=m, ef_construction=ef_construction)
+    hnsw.add(ids, corpus)
+    build_time = time.perf_counter() - start_time
+    logger.info(f"🏗️ HNSW graph built in {build_time:.1f}s")
+
+    rows = [{
+        "mode": "exact",
+        "recall": 1.0,
+        "p50_ms": float(np.percentile(exact_latencies, 50)),
+        "p99_ms": float(np.percentile(exact_latencies, 99)),
+    }]
+    for ef in ef_values:
+        hnsw.ef_search = ef
+        found, latencies = time_queries(hnsw, queries, k)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)])
+        rows.append({
+            "mode": f"hnsw ef={ef}",
+            "recall": float(recall),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        })
+
+    print("\n" + "=" * 60)
+    print(f"{'mode':>14} {f'recall@{k}':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 60)
+    for row in rows:
+        print(f"{row['mode']:>14} {row['recall']:>10.3f} {row['p50_ms']:>10.3f} {row['p99_ms']:>10.3f}")
+    print("=" * 60 + "\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark HNSW recall@k vs latency against exact search")
+    parser.add_argument("--size", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--m", type=int, default=16, help="HNSW graph out-degree")
+    parser.add_argument("--ef-construction", type=int, default=200, help="HNSW build candidate list size")
+    parser.add_argument(
+        "--ef",
+        type=int,
+        nargs="+",
+        default=[16, 32, 64, 128, 256],
+        help="ef_search values to sweep"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.size, args.dim, args.queries, args.k, args.m, args.ef_construction, args.ef)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
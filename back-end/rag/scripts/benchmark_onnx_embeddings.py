@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+ONNX Embedding Benchmark
+Compares the PyTorch HuggingFace backend with the ONNX Runtime backend
+(fp32 and int8) on CPU: throughput and agreement with the PyTorch vectors
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.onnx_embeddings import ONNXEmbeddings, export_onnx_model
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_texts(num_texts: int, seed: int = 0) -> List[str]:
+    """Admission-style passages of mixed length (one sentence to a parent chunk)"""
+    rng = random.Random(seed)
+    templates = [
+        "Điểm chuẩn ngành {} năm {} theo phương thức xét tuyển học bạ là {} điểm.",
+        "Học phí chương trình đào tạo {} năm học {} dự kiến khoảng {} triệu đồng.",
+        "Thí sinh đăng ký xét tuyển ngành {} cần nộp hồ sơ trước ngày {} tháng {}.",
+        "The {} programme admitted {} students in {} with a cut-off score of {}.",
+    ]
+    texts = []
+    for _ in range(num_texts):
+        sentences = rng.choice([1, 2, 4, 8, 16])
+        texts.append(" ".join(
+            rng.choice(templates).format(*(rng.randint(1, 60) for _ in range(4)))
+            for _ in range(sentences)
+        ))
+    return texts
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def time_embedding(embed: Callable[[List[str]], np.ndarray], texts: List[str]) -> Dict[str, Any]:
+    """Embed texts once to warm up on a slice, then time the full run"""
+    embed(texts[:8])
+    start_time = time.perf_counter()
+    vectors = embed(texts)
+    elapsed = time.perf_counter() - start_time
+    return {"vectors": normalize(np.asarray(vectors, dtype=np.float32)), "seconds": elapsed}
+
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> float:
+    """Overlap of each backend's top-k neighbours with the PyTorch top-k for the first texts as queries"""
+    overlaps = []
+    for query in range(queries):
+        truth = set(np.argsort(-(reference @ reference[query]))[1:k + 1])
+        found = set(np.argsort(-(reference @ candidate[query]))[1:k + 1])
+        overlaps.append(len(truth & found) / k)
+    return float(np.mean(overlaps))
+
+
+def run_benchmark(model_name: str, model_dir: Path, num_texts: int, threads: int, batch_size: int,
+                  queries: int, k: int) -> List[Dict[str, Any]]:
+    """Embed the same texts with every backend and compare against PyTorch"""
+    setup_logging()
+    texts = make_texts(num_texts)
+
+    if not (model_dir / "model.onnx").exists():
+        export_onnx_model(model_name, model_dir, quantize=True)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    torch_model = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": False, "batch_size": batch_size},
+    )
+
+    backends = {"pytorch": lambda batch: torch_model.embed_documents(batch)}
+    for label, model_file in (("onnx fp32", "model.onnx"), ("onnx int8", "model_quantized.onnx")):
+        if (model_dir / model_file).exists():
+            onnx_model = ONNXEmbeddings(model_dir, model_file=model_file, num_threads=threads, batch_size=batch_size)
+            backends[label] = onnx_model.embed_array
+
+    logger.info(f"⏱️ Embedding {num_texts} texts with {', '.join(backends)}")
+    runs = {label: time_embedding(embed, texts) for label, embed in backends.items()}
+
+    reference = runs["pytorch"]["vectors"]
+    baseline = runs["pytorch"]["seconds"]
+    rows = []
+    for label, run in runs.items():
+        cosines = np.sum(reference * run["vectors"], axis=1)
+        rows.append({
+            "backend": label,
+            "seconds": run["seconds"],
+            "texts_per_s": num_texts / run["seconds"],
+            "speedup": baseline / run["seconds"],
+            "mean_cosine": float(cosines.mean()),
+            "min_cosine": float(cosines.min()),
+            "recall": recall_at_k(reference, run["vectors"], min(queries, num_texts), k),
+        })
+
+    print("\n" + "=" * 80)
+    print(f"{'backend':>10} {'seconds':>9} {'texts/s':>9} {'speedup':>8} "
+          f"{'mean cos':>9} {'min cos':>9} {f'recall@{k}':>10}")
+    print("-" * 80)
+    for row in rows:
+        print(f"{row['backend']:>10} {row['seconds']:>9.2f} {row['texts_per_s']:>9.1f} {row['speedup']:>7.1f}x "
+              f"{row['mean_cosine']:>9.4f} {row['min_cosine']:>9.4f} {row['recall']:>10.3f}")
+    print("=" * 80)
+    print("cosine / recall are measured against the PyTorch vectors\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark ONNX Runtime vs PyTorch CPU embeddings")
+    parser.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                        help="HuggingFace sentence-embedding model")
+    parser.add_argument("--model-dir", type=Path, default=Path(__file__).parent.parent / "models" / "onnx",
+                        help="Exported ONNX model directory (exported there if missing)")
+    parser.add_argument("--texts", type=int, default=1000, help="Number of texts to embed")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = all cores)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Texts per inference call")
+    parser.add_argument("--queries", type=int, default=100, help="Texts used as queries for recall")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared for recall")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.model, args.model_dir, args.texts, args.threads, args.batch_size, args.queries, args.k)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Embedding Quantization Benchmark
+Compares float, float16 and int8 chunk storage on size, decode time and recall
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import bson
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.quantization import decode_embedding, encode_embedding
+from rag_system.offline.similarity_index import SimilarityIndex, rerank_hits
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_clustered_corpus(size: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Generate embeddings grouped around topic centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim), dtype=np.float32)
+    assignment = rng.integers(0, clusters, size)
+    return centroids[assignment] + 0.6 * rng.standard_normal((size, dim), dtype=np.float32)
+
+
+def recall_at_k(found: List[List[str]], truth: List[List[str]], k: int) -> float:
+    """Mean fraction of true top-k ids that were returned"""
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)]))
+
+
+def run_benchmark(size: int, dim: int, num_queries: int, k: int, rerank_candidates: int) -> List[Dict[str, Any]]:
+    """Encode a synthetic corpus in each format and report the trade-offs"""
+    setup_logging()
+    logger.info(f"🗜️ Quantization benchmark: {size:,} chunks, dim={dim}, k={k}, rerank={rerank_candidates}")
+
+    corpus = make_clustered_corpus(size, dim)
+    ids = [str(i) for i in range(size)]
+    queries = make_clustered_corpus(num_queries, dim, seed=1)
+
+    exact = SimilarityIndex(ids, corpus)
+    truth = [[chunk_id for chunk_id, _ in exact.search(query, k)] for query in queries]
+
+    rows = []
+    for storage_format in ["float", "float16", "int8"]:
+        docs = [encode_embedding(vector.tolist(), storage_format) for vector in corpus]
+
+        # What the index loader transfers: no full-precision copy
+        transferred = [{key: value for key, value in doc.items() if key != "embedding_f32"} for doc in docs]
+        wire_bytes = np.mean([len(bson.encode(doc)) for doc in transferred])
+        stored_bytes = np.mean([len(bson.encode(doc)) for doc in docs])
+
+        # Round-trip through BSON so decode sees what pymongo returns
+        decoded_docs = [bson.decode(bson.encode(doc)) for doc in transferred]
+        start_time = time.perf_counter()
+        matrix = np.stack([decode_embedding(doc) for doc in decoded_docs])
+        decode_s = time.perf_counter() - start_time
+
+        # Client-side memory before the matrix is built
+        if storage_format == "float":
+            client_bytes = dim * (8 + sys.getsizeof(1.0))  # list slot + boxed float
+        else:
+            client_bytes = len(decoded_docs[0]["embedding_q"])
+
+        index = SimilarityIndex(ids, matrix)
+        found = [[chunk_id for chunk_id, _ in index.search(query, k)] for query in queries]
+
+        row = {
+            "format": storage_format,
+            "stored_kb": stored_bytes / 1024,
+            "wire_kb": wire_bytes / 1024,
+            "client_kb": client_bytes / 1024,
+            "decode_s": decode_s,
+            "recall": recall_at_k(found, truth, k),
+            "recall_rerank": None,
+        }
+
+        if storage_format != "float" and rerank_candidates > 0:
+            reranked = []
+            for query in queries:
+                hits = index.search(query, max(k, rerank_candidates))
+                vectors = corpus[[int(chunk_id) for chunk_id, _ in hits]]
+                reranked.append([chunk_id for chunk_id, _ in rerank_hits(query, hits, vectors, k)])
+            row["recall_rerank"] = recall_at_k(reranked, truth, k)
+
+        rows.append(row)
+
+    print("\n" + "=" * 86)
+    print(
+        f"{'format':>8} {'stored KB':>10} {'wire KB':>9} {'client KB':>10} "
+        f"{'decode s':>9} {f'recall@{k}':>10} {'+rerank':>9}"
+    )
+    print("-" * 86)
+    for row in rows:
+        rerank_text = f"{row['recall_rerank']:.3f}" if row["recall_rerank"] is not None else "-"
+        print(
+            f"{row['format']:>8} {row['stored_kb']:>10.2f} {row['wire_kb']:>9.2f} {row['client_kb']:>10.2f} "
+            f"{row['decode_s']:>9.3f} {row['recall']:>10.3f} {rerank_text:>9}"
+        )
+    print("=" * 86)
+    print("stored = per-chunk BSON on disk, wire = per-chunk BSON pulled by the index loader,")
+    print("client = per-chunk Python-side payload before building the float32 matrix\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage formats")
+    parser.add_argument("--size", type=int, default=20_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries for recall")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--rerank", type=int, default=50, help="Candidates re-scored at float32 (0 disables)")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.size, args.dim, args.queries, args.k, args.rerank)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
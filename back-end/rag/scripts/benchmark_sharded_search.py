@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Sharded Search Benchmark
+Measures the fan-out / merge overhead of serving a snapshot from shard worker
+processes compared with searching the same snapshot in-process
+"""
+
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline import embedding_snapshot
+from rag_system.offline.sharded_index import ShardedIndex
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def time_queries(search, queries: np.ndarray, k: int) -> List[float]:
+    """Latency in ms of one search call per query"""
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        search(query, k)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies
+
+
+def run_benchmark(size: int, dim: int, shard_counts: List[int], num_queries: int, k: int, batch: int) -> List[Dict[str, Any]]:
+    """Compare in-process search with 1..N shard workers on one snapshot"""
+    setup_logging()
+    logger.info(f"🧩 Sharded search benchmark: {size:,} chunks, dim={dim}, k={k}")
+
+    snapshot_root = Path(tempfile.mkdtemp(prefix="rag-shards-"))
+    try:
+        rng = np.random.default_rng(0)
+        matrix = rng.standard_normal((size, dim), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        embedding_snapshot.write_snapshot(snapshot_root, [str(i) for i in range(size)], matrix)
+        del matrix
+
+        queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+        batch_queries = rng.standard_normal((batch, dim), dtype=np.float32)
+
+        local, _ = embedding_snapshot.load_snapshot(snapshot_root)
+        local.search(queries[0], k)  # fault the pages in
+        start_time = time.perf_counter()
+        local.search_batch(batch_queries, k)
+        local_batch_s = time.perf_counter() - start_time
+
+        latencies = time_queries(local.search, queries, k)
+        rows = [{
+            "setup": "in-process",
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "batch_qps": batch / local_batch_s,
+        }]
+
+        for shards in shard_counts:
+            with ShardedIndex(snapshot_root, num_shards=shards) as sharded:
+                sharded.search(queries[0], k)
+                start_time = time.perf_counter()
+                sharded.search_batch(batch_queries, k)
+                batch_s = time.perf_counter() - start_time
+
+                latencies = time_queries(sharded.search, queries, k)
+                rows.append({
+                    "setup": f"{shards} shard{'s' if shards > 1 else ''}",
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99)),
+                    "batch_qps": batch / batch_s,
+                })
+    finally:
+        shutil.rmtree(snapshot_root, ignore_errors=True)
+
+    baseline = rows[0]["p50_ms"]
+    print("\n" + "=" * 68)
+    print(f"{'setup':>12} {'p50 ms':>10} {'p99 ms':>10} {'vs in-process':>15} {f'batch({batch}) q/s':>16}")
+    print("-" * 68)
+    for row in rows:
+        print(f"{row['setup']:>12} {row['p50_ms']:>10.2f} {row['p99_ms']:>10.2f} "
+              f"{row['p50_ms'] - baseline:>+14.2f}ms {row['batch_qps']:>16,.0f}")
+    print("=" * 68)
+    print("'1 shard' isolates the IPC fan-out/merge overhead; more shards search in parallel\n")
+
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark sharded vector search")
+    parser.add_argument("--size", type=int, default=200_000, help="Corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4], help="Shard counts to test")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed single queries")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--batch", type=int, default=256, help="Queries per batched call")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.size, args.dim, args.shards, args.queries, args.k, args.batch)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Streaming Answer Benchmark
+Runs the chat model against a local fake OpenAI chat-completions server that
+emits tokens at a configurable rate, and compares time-to-first-byte of a
+blocking answer with a streamed one. With --url it measures /api/ask against
+/api/ask/stream on a running web server instead.
+"""
+
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Dict, Any
+from urllib.parse import urlparse
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_openai import ChatOpenAI
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+class FakeChatServer:
+    """OpenAI-compatible /v1/chat/completions endpoint producing tokens at a fixed rate"""
+
+    def __init__(self, tokens: int, tokens_per_second: float, first_token_ms: float):
+        self.tokens = tokens
+        self.tokens_per_second = tokens_per_second
+        self.first_token_ms = first_token_ms
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def words(self):
+        """Yield the answer tokens, sleeping like a model decoding them"""
+        time.sleep(self.first_token_ms / 1000)
+        for i in range(self.tokens):
+            if i:
+                time.sleep(1 / self.tokens_per_second)
+            yield f" từ{i}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _chunk(self, payload: str):
+                data = payload.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": body.get("model", "fake")}
+
+                if not body.get("stream"):
+                    text = "".join(server.words())
+                    payload = json.dumps({
+                        **base,
+                        "object": "chat.completion",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": text}}],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": server.tokens,
+                                  "total_tokens": 10 + server.tokens},
+                    }).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for word in server.words():
+                    delta = {**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "finish_reason": None, "delta": {"content": word}}]}
+                    self._chunk(f"data: {json.dumps(delta)}\n\n")
+                done = {**base, "object": "chat.completion.chunk",
+                        "choices": [{"index": 0, "finish_reason": "stop", "delta": {}}]}
+                self._chunk(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n")
+                self._chunk("")
+
+        return Handler
+
+    def __enter__(self) -> "FakeChatServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def time_llm(llm: ChatOpenAI, stream: bool) -> Dict[str, float]:
+    """Seconds to the first answer text and to the full answer"""
+    start_time = time.perf_counter()
+    if not stream:
+        llm.invoke("Nên học ngành gì?")
+        total = time.perf_counter() - start_time
+        return {"first": total, "total": total}
+    first = None
+    for chunk in llm.stream("Nên học ngành gì?"):
+        if first is None and chunk.content:
+            first = time.perf_counter() - start_time
+    return {"first": first, "total": time.perf_counter() - start_time}
+
+
+def time_endpoint(url: str, path: str, question: str, token: str) -> Dict[str, float]:
+    """Seconds to the first response byte and to the end of the response"""
+    target = urlparse(url)
+    connection_class = http.client.HTTPSConnection if target.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(target.netloc, timeout=300)
+    start_time = time.perf_counter()
+    connection.request(
+        "POST", path, body=json.dumps({"question": question}),
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    )
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"{path} returned HTTP {response.status}: {response.read()[:200]!r}")
+    response.read(1)
+    first = time.perf_counter() - start_time
+    response.read()
+    total = time.perf_counter() - start_time
+    connection.close()
+    return {"first": first, "total": total}
+
+
+def summarize(name: str, samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    return {
+        "setup": name,
+        "ttfb_p50": float(np.percentile([s["first"] for s in samples], 50)),
+        "ttfb_p95": float(np.percentile([s["first"] for s in samples], 95)),
+        "total_p50": float(np.percentile([s["total"] for s in samples], 50)),
+    }
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    print("\n" + "=" * 68)
+    print(f"{'setup':>24} {'TTFB p50 s':>11} {'TTFB p95 s':>11} {'total p50 s':>12}")
+    print("-" * 68)
+    for row in rows:
+        print(f"{row['setup']:>24} {row['ttfb_p50']:>11.3f} {row['ttfb_p95']:>11.3f} {row['total_p50']:>12.3f}")
+    print("=" * 68 + "\n")
+
+
+def run_benchmark(tokens: int, tokens_per_second: float, first_token_ms: float, requests: int) -> List[Dict[str, Any]]:
+    """Blocking vs streamed generation against the fake chat server"""
+    setup_logging()
+    logger.info(
+        f"🌊 Streaming benchmark: {tokens} tokens at {tokens_per_second:.0f} tok/s, "
+        f"first token after {first_token_ms:.0f} ms, {requests} requests"
+    )
+
+    with FakeChatServer(tokens, tokens_per_second, first_token_ms) as server:
+        llm = ChatOpenAI(model="gpt-4o-mini", openai_api_key="fake", openai_api_base=server.url, max_retries=0)
+        rows = [
+            summarize("invoke (/api/ask)", [time_llm(llm, stream=False) for _ in range(requests)]),
+            summarize("stream (/api/ask/stream)", [time_llm(llm, stream=True) for _ in range(requests)]),
+        ]
+
+    print_rows(rows)
+    print("The streamed endpoint additionally sends retrieval metadata before the first token\n")
+    return rows
+
+
+def run_endpoint_benchmark(url: str, question: str, token: str, requests: int) -> List[Dict[str, Any]]:
+    """Blocking vs streamed endpoint of a running web server"""
+    setup_logging()
+    logger.info(f"🌊 Endpoint streaming benchmark against {url}, {requests} requests each")
+
+    rows = [
+        summarize("/api/ask", [time_endpoint(url, "/api/ask", question, token) for _ in range(requests)]),
+        summarize("/api/ask/stream", [time_endpoint(url, "/api/ask/stream", question, token) for _ in range(requests)]),
+    ]
+    print_rows(rows)
+    print("Disable the semantic answer cache on the server, or repeats are answered from it\n")
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark time-to-first-byte of streamed answers")
+    parser.add_argument("--tokens", type=int, default=300, help="Tokens per fake answer")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="Fake model decoding rate")
+    parser.add_argument("--first-token-ms", type=float, default=400.0, help="Fake model latency before the first token")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per setup")
+    parser.add_argument("--url", help="Base URL of a running web server to benchmark end to end instead")
+    parser.add_argument("--question", default="Ngành công nghệ thông tin có triển vọng không?", help="Question sent with --url")
+    parser.add_argument("--token", default=os.getenv("BENCHMARK_AUTH_TOKEN", ""), help="Bearer token for --url (default $BENCHMARK_AUTH_TOKEN)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.url:
+            run_endpoint_benchmark(args.url, args.question, args.token, args.requests)
+        else:
+            run_benchmark(args.tokens, args.tokens_per_second, args.first_token_ms, args.requests)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
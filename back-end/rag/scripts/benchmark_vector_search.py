@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Vector Search Benchmark
+Measures query latency of the in-process similarity index on synthetic corpora
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rag_system.offline.similarity_index import SimilarityIndex
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def make_corpus(size: int, dim: int, seed: int = 0, block_size: int = 50_000) -> np.ndarray:
+    """Generate a random float32 corpus block by block to avoid float64 copies"""
+    rng = np.random.default_rng(seed)
+    corpus = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, block_size):
+        end = min(start + block_size, size)
+        corpus[start:end] = rng.standard_normal((end - start, dim), dtype=np.float32)
+    return corpus
+
+
+def benchmark_size(size: int, dim: int, num_queries: int, k: int) -> Dict[str, Any]:
+    """Build an index of the given size and time queries against it"""
+    corpus = make_corpus(size, dim)
+    ids = [str(i) for i in range(size)]
+
+    start_time = time.perf_counter()
+    index = SimilarityIndex(ids, corpus)
+    load_time = time.perf_counter() - start_time
+
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+
+    # Warm up caches before timing
+    for query in queries[:5]:
+        index.search(query, k)
+
+    latencies = []
+    for query in queries:
+        start_time = time.perf_counter()
+        index.search(query, k)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    return {
+        "size": size,
+        "dim": dim,
+        "matrix_mb": index.matrix.nbytes / 1024 ** 2,
+        "load_s": load_time,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def run_benchmark(sizes: List[int], dim: int, num_queries: int, k: int) -> List[Dict[str, Any]]:
+    """Run the benchmark for every corpus size and print a summary table"""
+    setup_logging()
+    logger.info(f"⏱️  Benchmarking exact cosine search (dim={dim}, k={k}, queries={num_queries})")
+
+    results = []
+    for size in sizes:
+        logger.info(f"📐 Corpus of {size:,} chunks (~{size * dim * 4 / 1024 ** 3:.2f} GB float32)")
+        results.append(benchmark_size(size, dim, num_queries, k))
+
+    print("\n" + "=" * 72)
+    print(f"{'chunks':>10} {'matrix MB':>10} {'normalise s':>12} {'p50 ms':>10} {'p99 ms':>10}")
+    print("-" * 72)
+    for row in results:
+        print(
+            f"{row['size']:>10,} {row['matrix_mb']:>10.1f} {row['load_s']:>12.2f} "
+            f"{row['p50_ms']:>10.2f} {row['p99_ms']:>10.2f}"
+        )
+    print("=" * 72 + "\n")
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark in-process vector search latency")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Corpus sizes to benchmark"
+    )
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+
+    args = parser.parse_args()
+
+    try:
+        run_benchmark(args.sizes, args.dim, args.queries, args.k)
+    except KeyboardInterrupt:
+        logger.warning("Benchmark interrupted by user")
+        sys.exit(130)
@@ -4,6 +4,7 @@ RAG Vector Index Builder
 Simple script to replace ZenML RAG pipeline
 """
 
+import json
 import os
 import sys
 from pathlib import Path
@@ -14,7 +15,9 @@ import time
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from rag_system.offline import embedding_snapshot
 from rag_system.offline.vector_store import VectorStore
+from rag_system.offline.similarity_index import SimilarityIndex
 from rag_system.offline.embeddings import EmbeddingGenerator
 from rag_system.offline.document_store import DocumentStore
 from rag_system.shared.config import load_config
@@ -30,12 +33,32 @@ def setup_logging():
     )
 
 
-def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
+def build_rag_index(
+    algorithm: str = "parent",
+    index_mode: str = None,
+    shards: int = None,
+    cleanup_delay: float = None,
+    full: bool = False
+) -> Dict[str, Any]:
     """
     Build RAG vector index from processed documents
     
+    The chunks of a build are stored under a new build id next to the chunks
+    being served. The snapshot of the build is published under the same id,
+    and the chunks of earlier builds are only deleted once servers had time
+    to swap it in, so searches never point at deleted chunks.
+    
+    Builds are incremental: unchanged chunks of the published build are
+    kept rather than embedded again, and the published HNSW graph is
+    updated rather than rebuilt.
+    
     Args:
         algorithm: Retrieval algorithm to use ("parent", "contextual_simple", etc.)
+        index_mode: Local index to build ("exact" or "hnsw"), defaults to config
+        shards: Number of shards recorded in the snapshot, defaults to config
+        cleanup_delay: Seconds between publishing and deleting superseded
+            chunks, defaults to twice SNAPSHOT_CHECK_INTERVAL
+        full: Embed every chunk and rebuild the HNSW graph from scratch
     """
     setup_logging()
     logger.info(f"🔍 Building RAG Index with {algorithm} algorithm")
@@ -45,23 +68,35 @@ def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
         "total_documents": 0,
         "total_chunks": 0,
         "embeddings_created": 0,
+        "chunks_reused": 0,
         "algorithm": algorithm,
         "execution_time": 0,
         "errors": []
     }
+    vector_store = None
+    build_id = None
+    published = False
     
     try:
         # Load configuration
         config = load_config()
+        index_mode = index_mode or config.vector_index_mode
+        results["index_mode"] = index_mode
+        shards = shards or config.vector_index_shards
+        results["shards"] = shards
         
         # Initialize components
         doc_store = DocumentStore(config)
         embedding_gen = EmbeddingGenerator(config)
         vector_store = VectorStore(config)
         
-        # Clear existing RAG collection
-        logger.info("🧹 Cleaning existing RAG collection")
-        vector_store.clear_collection()
+        # Chunks of this build are stored next to the ones being served
+        build_id = embedding_snapshot.new_version()
+        previous_build = None if full else embedding_snapshot.current_version(vector_store.snapshot_dir)
+        results["build_id"] = build_id
+        vector_store.collection.create_index("builds")
+        vector_store.parent_collection.create_index("builds")
+        logger.info(f"🆔 Build {build_id} (previous: {previous_build or 'none, full build'})")
         
         # Get all raw documents
         logger.info("📚 Loading raw documents from MongoDB")
@@ -87,10 +122,15 @@ def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
             raise ValueError(f"Unknown algorithm: {algorithm}")
         
         results["total_chunks"] = len(chunks)
-        logger.info(f"📝 Created {len(chunks)} chunks for embedding")
         
-        # Generate embeddings in batches
-        batch_size = 50
+        # Unchanged chunks of the published build join this build as they are
+        chunks = vector_store.carry_over_chunks(chunks, build_id, previous_build)
+        results["chunks_reused"] = results["total_chunks"] - len(chunks)
+        logger.info(f"📝 Created {results['total_chunks']} chunks, {len(chunks)} new or changed for embedding")
+        
+        # Generate embeddings in store-sized groups; generate_batch splits each
+        # group into API batches and keeps several of them in flight
+        batch_size = 1000
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i:i + batch_size]
             
@@ -104,15 +144,53 @@ def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
                 chunk["embedding"] = embedding
             
             # Store in vector database
-            vector_store.store_chunks(batch)
+            vector_store.store_chunks(batch, build_id=build_id)
             results["embeddings_created"] += len(batch)
             
             logger.success(f"✅ Stored {len(batch)} embeddings")
         
+        results["rate_limit_wait_s"] = round(embedding_gen.rate_limiter.wait_time, 2)
+        results["embedding_batches"] = embedding_gen.batcher.summary()
+        results["dedup"] = embedding_gen.dedup_stats()
+        _export_batch_metrics(embedding_gen.batch_metrics, config.embedding_metrics_path)
+        if embedding_gen.cache is not None:
+            results["embedding_cache"] = embedding_gen.cache.stats()
+        
         # Create vector index
         logger.info("🏗️ Creating vector search index")
         vector_store.create_vector_index()
         
+        build_filter = {"builds": build_id}
+        exact_index = SimilarityIndex.from_collection(vector_store.collection, query=build_filter)
+        
+        # The approximate and BM25 indexes are published with the snapshot
+        hnsw_index = None
+        if index_mode == "hnsw":
+            logger.info("🕸️ Updating HNSW index")
+            hnsw_index = vector_store.update_hnsw_index(exact_index, rebuild=full)
+        
+        lexical_index = None
+        if config.hybrid_search_enabled:
+            logger.info("📇 Building BM25 lexical index")
+            lexical_index = vector_store.build_lexical_index(query=build_filter)
+            results["lexical_terms"] = len(lexical_index.vocabulary)
+        
+        # Publish the embedding snapshot the web server memory-maps
+        logger.info("💾 Exporting embedding snapshot")
+        results["snapshot_version"] = vector_store.export_snapshot(
+            exact_index, num_shards=shards, version=build_id, hnsw=hnsw_index, lexical=lexical_index
+        )
+        vector_store.publish_build(build_id)
+        published = True
+        
+        # Servers check for a new snapshot every SNAPSHOT_CHECK_INTERVAL
+        if cleanup_delay is None:
+            cleanup_delay = config.snapshot_check_interval * 2
+        if cleanup_delay > 0:
+            logger.info(f"⏳ Waiting {cleanup_delay:.0f}s for servers to swap in build {build_id}")
+            time.sleep(cleanup_delay)
+        results["chunks_removed"] = vector_store.remove_superseded_chunks(build_id)
+        
         # Final results
         results["execution_time"] = time.time() - start_time
         
@@ -121,7 +199,30 @@ def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
         logger.info(f"   - Documents processed: {results['total_documents']}")
         logger.info(f"   - Chunks created: {results['total_chunks']}")
         logger.info(f"   - Embeddings generated: {results['embeddings_created']}")
+        logger.info(f"   - Chunks kept from previous build: {results['chunks_reused']}")
+        dedup = results["dedup"]
+        logger.info(
+            f"   - Duplicate texts: {dedup['duplicates']}/{dedup['texts']} "
+            f"(dedup ratio {dedup['dedup_ratio']:.1%}, {dedup['unique']} distinct embedded or cached)"
+        )
+        batching = results["embedding_batches"]
+        if batching["batches"]:
+            logger.info(
+                f"   - Embedding batches: {batching['batches']} "
+                f"(tokens/batch {batching['tokens_per_batch']['min']}-{batching['tokens_per_batch']['max']}, "
+                f"p95 {batching['latency_p95_s']:.2f}s, {batching['retries']} retries, "
+                f"final budget {batching['budget']} tokens)"
+            )
+        if "embedding_cache" in results:
+            cache_stats = results["embedding_cache"]
+            logger.info(
+                f"   - Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.1%})"
+            )
         logger.info(f"   - Algorithm used: {results['algorithm']}")
+        logger.info(f"   - Local index mode: {results['index_mode']}")
+        logger.info(f"   - Snapshot version: {results['snapshot_version']} ({results['shards']} shards)")
+        logger.info(f"   - Superseded chunks removed: {results['chunks_removed']}")
         logger.info(f"   - Execution time: {results['execution_time']:.2f}s")
         
         return results
@@ -129,9 +230,27 @@ def build_rag_index(algorithm: str = "parent") -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"❌ RAG index build failed: {str(e)}")
         results["errors"].append(str(e))
+        # Servers keep the previous build; drop the chunks nothing will serve
+        if build_id is not None and not published:
+            try:
+                vector_store.remove_build(build_id)
+            except Exception as cleanup_error:
+                logger.warning(f"⚠️ Could not remove chunks of build {build_id}: {str(cleanup_error)}")
         raise
 
 
+def _export_batch_metrics(metrics: List[Dict[str, Any]], path: Path) -> None:
+    """Append per-batch embedding metrics of this build to a JSONL file"""
+    if not metrics:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    build = time.strftime("%Y-%m-%dT%H:%M:%S")
+    with open(path, "a", encoding="utf-8") as f:
+        for metric in metrics:
+            f.write(json.dumps({"build": build, **metric}) + "\n")
+    logger.info(f"📈 Wrote {len(metrics)} batch metrics to {path}")
+
+
 # def _create_parent_chunks(documents: List[Dict]) -> List[Dict]:
 #     """Create chunks using parent-child retrieval strategy"""
 #     chunks = []
@@ -162,11 +281,35 @@ if __name__ == "__main__":
         default="parent",
         help="Retrieval algorithm to use"
     )
+    parser.add_argument(
+        "--index-mode",
+        choices=["exact", "hnsw"],
+        default=None,
+        help="Local vector index to build (defaults to VECTOR_INDEX_MODE)"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Shards to split the embedding snapshot into (defaults to VECTOR_INDEX_SHARDS)"
+    )
+    parser.add_argument(
+        "--cleanup-delay",
+        type=float,
+        default=None,
+        help="Seconds to wait after publishing before deleting superseded chunks (defaults to 2x SNAPSHOT_CHECK_INTERVAL)"
+    )
+    
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Embed every chunk and rebuild the HNSW graph instead of updating the published build"
+    )
     
     args = parser.parse_args()
     
     try:
-        results = build_rag_index(args.algorithm)
+        results = build_rag_index(args.algorithm, args.index_mode, args.shards, args.cleanup_delay, args.full)
         exit_code = 0 if not results["errors"] else 1
         sys.exit(exit_code)
     except KeyboardInterrupt:
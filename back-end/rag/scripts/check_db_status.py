@@ -15,6 +15,7 @@ from datetime import datetime
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from rag_system.offline.quantization import EMBEDDING_EXISTS_FILTER, stored_dimension
 from rag_system.shared.config import load_config
 
 
@@ -69,7 +70,8 @@ def check_database_status() -> Dict[str, Any]:
         # Check collections
         collection_names = [
             config.mongodb_raw_collection_name,
-            config.mongodb_rag_collection_name
+            config.mongodb_rag_collection_name,
+            config.mongodb_parent_collection_name
         ]
         
         for collection_name in collection_names:
@@ -107,10 +109,11 @@ def check_database_status() -> Dict[str, Any]:
                 rag_collection = db[rag_collection_name]
                 
                 # Check if documents have embeddings
-                sample_with_embedding = rag_collection.find_one({"embedding": {"$exists": True}})
+                sample_with_embedding = rag_collection.find_one(EMBEDDING_EXISTS_FILTER)
                 if sample_with_embedding:
-                    embedding_dim = len(sample_with_embedding.get("embedding", []))
-                    logger.success(f"✅ Vector embeddings found (dimension: {embedding_dim})")
+                    embedding_dim = stored_dimension(sample_with_embedding)
+                    embedding_format = sample_with_embedding.get("embedding_format", "float")
+                    logger.success(f"✅ Vector embeddings found (dimension: {embedding_dim}, format: {embedding_format})")
                 else:
                     logger.warning("⚠️  No vector embeddings found in RAG collection")
                     
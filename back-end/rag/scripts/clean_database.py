@@ -71,7 +71,8 @@ def clean_database(confirm: bool = False) -> Dict[str, Any]:
         # Collections to clean
         collections_to_clean = [
             config.mongodb_raw_collection_name,
-            config.mongodb_rag_collection_name
+            config.mongodb_rag_collection_name,
+            config.mongodb_parent_collection_name
         ]
         
         # Clean each collection
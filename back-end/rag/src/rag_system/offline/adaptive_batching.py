@@ -0,0 +1,183 @@
+"""
+Adaptive Batching for RAG System
+Packs embedding requests by estimated tokens and tunes the per-request token
+budget from observed latency and provider errors
+"""
+
+import threading
+from typing import List, Dict, Any, Optional, Sequence
+from loguru import logger
+
+import numpy as np
+
+
+def heuristic_token_count(text: str) -> int:
+    """
+    Approximate token count of a text
+
+    Counts UTF-8 bytes rather than characters: Vietnamese diacritics take
+    2-3 bytes and split into more tokens than plain ASCII.
+    """
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+class TokenCounter:
+    """
+    Token counts for an OpenAI model (embedding or chat)
+    Uses tiktoken's encoding for the model when it can be loaded, otherwise a
+    byte-length heuristic
+    """
+
+    def __init__(self, model_name: str):
+        """
+        Initialize TokenCounter
+
+        Args:
+            model_name: Model whose tokenizer to use
+        """
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(model_name)
+        except Exception as e:
+            logger.debug(f"No tiktoken encoding for {model_name}, estimating tokens from length: {str(e)}")
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the model's tokenizer"""
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        """Tokens in one text"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return heuristic_token_count(text)
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Tokens in each of many texts"""
+        if self._encoding is not None:
+            return [len(tokens) for tokens in self._encoding.encode_batch(list(texts), disallowed_special=())]
+        return [heuristic_token_count(text) for text in texts]
+
+
+class AdaptiveBatcher:
+    """
+    Token-budgeted batch packer with AIMD budget control
+    The budget grows additively while requests finish under the target
+    latency, shrinks when they are slow and halves on rate limits or errors.
+    Shared by the embedding worker threads; keeps a metrics record per batch.
+    """
+
+    def __init__(
+        self,
+        initial_tokens: int,
+        max_tokens: int,
+        max_texts: int,
+        target_latency_s: float,
+        min_tokens: Optional[int] = None,
+    ):
+        """
+        Initialize AdaptiveBatcher
+
+        Args:
+            initial_tokens: Token budget of the first requests
+            max_tokens: Largest budget the controller may reach
+            max_texts: Most texts in one request
+            target_latency_s: Request latency above which the budget shrinks
+            min_tokens: Smallest budget, defaults to 1/16 of ``initial_tokens``
+        """
+        self.max_tokens = max_tokens
+        self.max_texts = max_texts
+        self.target_latency_s = target_latency_s
+        self.min_tokens = min_tokens or max(1, initial_tokens // 16)
+        self.budget = float(min(initial_tokens, max_tokens))
+        self._step = max(1.0, initial_tokens * 0.1)
+        self._lock = threading.Lock()
+        self.metrics: List[Dict[str, Any]] = []
+
+    def next_batch(self, token_counts: Sequence[int], start: int, max_texts: Optional[int] = None) -> int:
+        """
+        Pack the batch starting at ``start`` under the current budget
+
+        Args:
+            token_counts: Tokens per text
+            start: Index of the first text of the batch
+            max_texts: Optional tighter cap on texts per batch
+
+        Returns:
+            End index (exclusive); always takes at least one text
+        """
+        limit = min(self.max_texts, max_texts or self.max_texts)
+        with self._lock:
+            budget = self.budget
+
+        end, tokens = start, 0
+        while end < len(token_counts) and end - start < limit:
+            if end > start and tokens + token_counts[end] > budget:
+                break
+            tokens += token_counts[end]
+            end += 1
+        return end
+
+    def shrink(self) -> None:
+        """Halve the budget right away, e.g. when a request is rate limited"""
+        with self._lock:
+            self.budget = max(self.min_tokens, self.budget / 2)
+
+    def record(self, number: int, texts: int, tokens: int, latency_s: float, retries: int, worker: str) -> None:
+        """
+        Record a finished batch and adapt the budget
+
+        Args:
+            number: Batch number within the run
+            texts: Texts in the batch
+            tokens: Estimated tokens in the batch
+            latency_s: Wall time including retries
+            retries: Attempts that were rate limited or failed
+            worker: Thread that sent the batch
+        """
+        with self._lock:
+            budget = self.budget
+            if retries == 0:
+                if latency_s > self.target_latency_s:
+                    self.budget = max(self.min_tokens, self.budget * 0.75)
+                elif tokens >= self.budget * 0.5:
+                    # Only grow when the batch actually used the budget
+                    self.budget = min(self.max_tokens, self.budget + self._step)
+            self.metrics.append({
+                "batch": number,
+                "texts": texts,
+                "tokens": tokens,
+                "latency_s": round(latency_s, 4),
+                "tokens_per_s": round(tokens / latency_s, 1) if latency_s > 0 else None,
+                "retries": retries,
+                "budget": int(budget),
+                "next_budget": int(self.budget),
+                "worker": worker,
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate of the recorded batches"""
+        with self._lock:
+            metrics = list(self.metrics)
+            budget = self.budget
+        if not metrics:
+            return {"batches": 0, "budget": int(budget)}
+
+        latencies = np.array([m["latency_s"] for m in metrics])
+        tokens = np.array([m["tokens"] for m in metrics])
+        return {
+            "batches": len(metrics),
+            "texts": int(sum(m["texts"] for m in metrics)),
+            "tokens": int(tokens.sum()),
+            "retries": int(sum(m["retries"] for m in metrics)),
+            "tokens_per_batch": {"min": int(tokens.min()), "mean": float(tokens.mean()), "max": int(tokens.max())},
+            "latency_p50_s": float(np.percentile(latencies, 50)),
+            "latency_p95_s": float(np.percentile(latencies, 95)),
+            "budget": int(budget),
+        }
+
+    def reset_metrics(self) -> None:
+        """Forget recorded batches, keeping the learned budget"""
+        with self._lock:
+            self.metrics = []
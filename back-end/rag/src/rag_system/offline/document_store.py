@@ -10,6 +10,7 @@ from pymongo import MongoClient, errors
 from pymongo.collection import Collection
 from pymongo.database import Database
 
+from rag_system.offline.quantization import EMBEDDING_EXISTS_FILTER, stored_dimension
 from rag_system.shared.config import RagSystemConfig
 
 
@@ -234,14 +235,14 @@ class DocumentStore:
             rag_count = self.rag_collection.count_documents({})
             
             # Check if RAG collection has embeddings
-            sample_rag = self.rag_collection.find_one({"embedding": {"$exists": True}})
+            sample_rag = self.rag_collection.find_one(EMBEDDING_EXISTS_FILTER)
             has_embeddings = sample_rag is not None
             
             stats = {
                 "raw_documents": raw_count,
                 "rag_chunks": rag_count,
                 "has_embeddings": has_embeddings,
-                "embedding_dimension": len(sample_rag.get("embedding", [])) if sample_rag else 0
+                "embedding_dimension": stored_dimension(sample_rag)
             }
             
             logger.info(f"📊 Collection stats: {stats}")
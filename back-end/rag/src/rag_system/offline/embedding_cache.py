@@ -0,0 +1,199 @@
+"""
+Embedding Cache Service for RAG System
+Content-addressed SQLite store of embeddings so unchanged text is never re-embedded
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence
+from loguru import logger
+
+import numpy as np
+
+# SQLite's default limit on host parameters is 999
+_MAX_PARAMS = 900
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of a text for cache keys
+
+    Unicode NFC (Vietnamese text from PDFs mixes composed and decomposed
+    accents) with runs of whitespace collapsed. Case is kept, since it can
+    change the embedding.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Normalised text
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model, dimension, normalised text hash)
+    Vectors are stored as packed float32 blobs; when the entry limit is
+    exceeded the least recently used entries are evicted
+    """
+
+    def __init__(self, path: Path, model_name: str, dimension: int, max_entries: int = 500_000):
+        """
+        Open (or create) the cache database
+
+        Args:
+            path: SQLite database file
+            model_name: Embedding model the vectors come from
+            dimension: Embedding dimension
+            max_entries: Entries kept before LRU eviction
+        """
+        self.path = Path(path)
+        self.model_name = model_name
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the web server's threads, serialised by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        logger.info(f"🗄️ Embedding cache at {self.path} ({self._count} entries)")
+
+    def key(self, text: str) -> bytes:
+        """Cache key of a text for this model and dimension"""
+        payload = f"{self.model_name}\0{self.dimension}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for texts
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            Embedding per text, None for misses
+        """
+        keys = [self.key(text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            for start in range(0, len(keys), _MAX_PARAMS):
+                block = list(set(keys[start:start + _MAX_PARAMS]))
+                placeholders = ",".join("?" * len(block))
+                found.update(self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", block
+                ).fetchall())
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        results = [
+            np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Embedding of one text, or None on a miss"""
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[Sequence[float]]) -> None:
+        """
+        Store embeddings, evicting least recently used entries beyond the limit
+
+        Args:
+            texts: Input texts
+            embeddings: Embedding per text
+        """
+        now = time.time()
+        rows = [
+            (self.key(text), np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO embeddings (key, vector, last_used) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO NOTHING",
+                rows
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def put(self, text: str, embedding: Sequence[float]) -> None:
+        """Store the embedding of one text"""
+        self.put_many([text], [embedding])
+
+    def _evict(self) -> None:
+        """Delete least recently used entries down to ``max_entries`` (lock held)"""
+        excess = self._count - self.max_entries
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.evictions += excess
+        self._count = self.max_entries
+        logger.debug(f"🧹 Evicted {excess} least recently used embeddings")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the cache"""
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_mb": self.path.stat().st_size / 1024 ** 2 if self.path.exists() else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Delete every cached embedding"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
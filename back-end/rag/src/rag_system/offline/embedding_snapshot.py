@@ -0,0 +1,230 @@
+"""
+Embedding Snapshot Service for RAG System
+Versioned on-disk embedding matrices that online workers memory-map read-only
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Dict, Any, Optional, Sequence, Tuple
+from loguru import logger
+import time
+
+import numpy as np
+
+from rag_system.offline.matryoshka_index import MatryoshkaIndex, truncate_embeddings
+from rag_system.offline.metadata_filter import MetadataFilterIndex
+from rag_system.offline.similarity_index import SimilarityIndex
+
+CURRENT_FILE = "CURRENT"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+MANIFEST_FILE = "manifest.json"
+FILTER_VALUES_FILE = "filter_values.json"
+PREFIX_FILE = "prefix.npy"
+
+
+def current_version(snapshot_root: Path) -> Optional[str]:
+    """
+    Name of the active snapshot version
+
+    Args:
+        snapshot_root: Directory holding snapshot versions
+
+    Returns:
+        Version name, or None if no snapshot has been published
+    """
+    try:
+        return (snapshot_root / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def new_version() -> str:
+    """Fresh, time-ordered snapshot version name"""
+    return f"v{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def write_snapshot(
+    snapshot_root: Path,
+    ids: Sequence[str],
+    matrix: np.ndarray,
+    metadata: Optional[Dict[str, Any]] = None,
+    keep: int = 2,
+    filter_index: Optional[MetadataFilterIndex] = None,
+    num_shards: int = 1,
+    prefix_dimension: int = 0,
+    version: Optional[str] = None,
+    attachments: Optional[Callable[[Path], None]] = None,
+) -> str:
+    """
+    Write a new snapshot version and publish it atomically
+
+    The version is written to a temporary directory, renamed into place and
+    only then made current by replacing the CURRENT pointer file, so readers
+    never see a half-written snapshot.
+
+    Args:
+        snapshot_root: Directory holding snapshot versions
+        ids: Chunk identifiers, row i of the id table maps to row i of the matrix
+        matrix: Row-normalised float32 embeddings (n x dim)
+        metadata: Extra fields recorded in the manifest
+        keep: Number of most recent versions to keep on disk
+        filter_index: Metadata columns to persist for pre-filtered search
+        num_shards: Number of contiguous row ranges recorded for sharded serving
+        prefix_dimension: Also write the renormalised leading dimensions of
+            every row for two-stage (Matryoshka) search (0 disables)
+        version: Version name, e.g. the build id of the chunks, defaults to
+            ``new_version()``
+        attachments: Called with the version directory before it is
+            published, to write indexes that belong to the version
+
+    Returns:
+        Name of the published version
+    """
+    start_time = time.time()
+    snapshot_root.mkdir(parents=True, exist_ok=True)
+
+    version = version or new_version()
+    tmp_dir = snapshot_root / f".tmp-{version}"
+    tmp_dir.mkdir()
+
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    np.save(tmp_dir / EMBEDDINGS_FILE, matrix)
+    if prefix_dimension:
+        np.save(tmp_dir / PREFIX_FILE, truncate_embeddings(matrix, prefix_dimension))
+
+    # Fixed-width byte strings: compact and memory-mappable, unlike a JSON list
+    id_table = np.array([str(chunk_id).encode("ascii") for chunk_id in ids], dtype=bytes)
+    np.save(tmp_dir / IDS_FILE, id_table)
+
+    if filter_index is not None:
+        for name, codes in filter_index.codes.items():
+            np.save(tmp_dir / f"filter_{name}.npy", np.asarray(codes, dtype=np.int32))
+        with open(tmp_dir / FILTER_VALUES_FILE, "w", encoding="utf-8") as f:
+            json.dump(filter_index.values, f, ensure_ascii=False)
+
+    manifest = {
+        "version": version,
+        "count": int(matrix.shape[0]),
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "dtype": "float32",
+        "normalized": True,
+        "shards": shard_ranges(int(matrix.shape[0]), num_shards),
+        "prefix_dimension": int(prefix_dimension),
+        "created_at": datetime.now().isoformat(),
+        **(metadata or {}),
+    }
+    with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if attachments is not None:
+        attachments(tmp_dir)
+
+    os.rename(tmp_dir, snapshot_root / version)
+
+    pointer_tmp = snapshot_root / f"{CURRENT_FILE}.tmp"
+    pointer_tmp.write_text(version, encoding="utf-8")
+    os.replace(pointer_tmp, snapshot_root / CURRENT_FILE)
+
+    _prune_versions(snapshot_root, keep)
+    logger.success(
+        f"💾 Published embedding snapshot {version} ({manifest['count']} vectors) in {time.time() - start_time:.2f}s"
+    )
+    return version
+
+
+def shard_ranges(count: int, num_shards: int) -> List[List[int]]:
+    """
+    Split rows into contiguous, nearly equal [start, end) ranges
+
+    Args:
+        count: Number of rows
+        num_shards: Number of shards
+
+    Returns:
+        One [start, end) pair per shard
+    """
+    num_shards = max(1, min(num_shards, count)) if count else 1
+    bounds = np.linspace(0, count, num_shards + 1).astype(int).tolist()
+    return [[start, end] for start, end in zip(bounds, bounds[1:])]
+
+
+def _prune_versions(snapshot_root: Path, keep: int) -> None:
+    """Delete all but the newest ``keep`` versions; mapped files stay valid until unmapped"""
+    active = current_version(snapshot_root)
+    versions = sorted(p for p in snapshot_root.iterdir() if p.is_dir() and p.name.startswith("v"))
+    for old in versions[:-keep] if keep > 0 else versions:
+        if old.name != active:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def load_snapshot(
+    snapshot_root: Path,
+    version: Optional[str] = None,
+    row_range: Optional[Tuple[int, int]] = None,
+    rerank_candidates: int = 0,
+) -> Tuple[SimilarityIndex, Dict[str, Any]]:
+    """
+    Memory-map a snapshot read-only into a SimilarityIndex
+
+    Every process mapping the same version shares the page cache, so the
+    matrix is neither copied nor counted once per worker. With
+    ``rerank_candidates`` and a snapshot written with a prefix, the prefix is
+    read into memory as the hot set of a two-stage ``MatryoshkaIndex`` and
+    the full matrix is only paged in for re-scored candidates.
+
+    Args:
+        snapshot_root: Directory holding snapshot versions
+        version: Version to load, defaults to the current one
+        row_range: Optional (start, end) rows to map, e.g. one shard
+        rerank_candidates: Prefix hits re-scored per query (0 = full-width search)
+
+    Returns:
+        Tuple of (SimilarityIndex over the mapped matrix, manifest)
+    """
+    version = version or current_version(snapshot_root)
+    if version is None:
+        raise FileNotFoundError(f"No embedding snapshot published in {snapshot_root}")
+
+    start_time = time.time()
+    version_dir = snapshot_root / version
+    manifest = read_manifest(snapshot_root, version)
+
+    rows = slice(*row_range) if row_range else slice(None)
+    matrix = np.load(version_dir / EMBEDDINGS_FILE, mmap_mode="r")[rows]
+    id_table = np.load(version_dir / IDS_FILE, mmap_mode="r")[rows]
+
+    filter_index = None
+    if (version_dir / FILTER_VALUES_FILE).exists():
+        with open(version_dir / FILTER_VALUES_FILE, encoding="utf-8") as f:
+            values = json.load(f)
+        codes = {name: np.load(version_dir / f"filter_{name}.npy", mmap_mode="r")[rows] for name in values}
+        filter_index = MetadataFilterIndex(values, codes)
+
+    if rerank_candidates > 0 and manifest.get("prefix_dimension"):
+        # Copied out of the mapping: the prefix is the part meant to stay resident
+        prefix = np.array(np.load(version_dir / PREFIX_FILE, mmap_mode="r")[rows])
+        index = MatryoshkaIndex(
+            id_table, matrix, prefix, normalized=True, metadata=filter_index, candidates=rerank_candidates
+        )
+    else:
+        index = SimilarityIndex(id_table, matrix, normalized=True, metadata=filter_index)
+    logger.info(f"🗺️ Mapped embedding snapshot {version} ({len(index)} vectors) in {time.time() - start_time:.3f}s")
+    return index, manifest
+
+
+def read_manifest(snapshot_root: Path, version: str) -> Dict[str, Any]:
+    """Manifest of a snapshot version"""
+    with open(snapshot_root / version / MANIFEST_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_versions(snapshot_root: Path) -> List[str]:
+    """Snapshot versions present on disk, oldest first"""
+    if not snapshot_root.exists():
+        return []
+    return sorted(p.name for p in snapshot_root.iterdir() if p.is_dir() and p.name.startswith("v"))
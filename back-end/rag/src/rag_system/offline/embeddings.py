@@ -3,17 +3,45 @@ Embedding Generation Service for RAG System
 Handles text embedding generation using OpenAI and HuggingFace models
 """
 
-from typing import List, Union, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Union, Literal, Optional, Callable, Awaitable, Tuple, TypeVar
 from loguru import logger
+import asyncio
+import threading
 import time
 
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
 
+from rag_system.offline.adaptive_batching import AdaptiveBatcher, TokenCounter
+from rag_system.offline.embedding_cache import EmbeddingCache, normalize_text
+from rag_system.offline.onnx_embeddings import ONNXEmbeddings
+from rag_system.offline.rate_limiter import RateLimiter
 from rag_system.shared.config import RagSystemConfig
 
-EmbeddingModelType = Literal["openai", "huggingface"]
-EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings]
+T = TypeVar("T")
+
+EmbeddingModelType = Literal["openai", "huggingface", "onnx"]
+EmbeddingsModel = Union[OpenAIEmbeddings, HuggingFaceEmbeddings, ONNXEmbeddings]
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether a provider error is a rate limit or transient failure worth retrying"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    name = type(error).__name__
+    return isinstance(error, (ConnectionError, TimeoutError)) or name in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After seconds sent with a rate-limit response, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
 
 
 class EmbeddingGenerator:
@@ -22,19 +50,52 @@ class EmbeddingGenerator:
     Supports both OpenAI and HuggingFace embedding models
     """
 
-    def __init__(self, config: RagSystemConfig, model_type: EmbeddingModelType = "openai"):
+    def __init__(
+        self,
+        config: RagSystemConfig,
+        model_type: EmbeddingModelType = "openai",
+        use_cache: Optional[bool] = None
+    ):
         """
         Initialize EmbeddingGenerator
         
         Args:
             config: RagSystemConfig instance
-            model_type: Type of embedding model to use ("openai" or "huggingface")
+            model_type: Type of embedding model to use ("openai", "huggingface" or "onnx")
+            use_cache: Check the on-disk embedding cache first, defaults to
+                ``embedding_cache_enabled``
         """
         self.config = config
         self.model_type = model_type
         self.model: Optional[EmbeddingsModel] = None
+        self.cache: Optional[EmbeddingCache] = None
+        self.rate_limiter = RateLimiter(
+            config.embedding_requests_per_minute,
+            config.embedding_tokens_per_minute
+        )
+        self.token_counter = TokenCounter(config.embedding_model_name)
+        # Texts passed to generate_batch and how many were distinct
+        self.dedup_texts = 0
+        self.dedup_unique = 0
+        self.batcher = AdaptiveBatcher(
+            initial_tokens=config.embedding_batch_tokens,
+            max_tokens=config.embedding_batch_max_tokens,
+            max_texts=config.embedding_batch_max_texts,
+            target_latency_s=config.embedding_target_latency_s
+        )
         
         self._initialize_model()
+        
+        if config.embedding_cache_enabled if use_cache is None else use_cache:
+            try:
+                self.cache = EmbeddingCache(
+                    config.embedding_cache_path,
+                    model_name=config.embedding_model_name,
+                    dimension=config.embedding_dimension,
+                    max_entries=config.embedding_cache_max_entries
+                )
+            except Exception as e:
+                logger.warning(f"⚠️  Embedding cache unavailable, embedding without it: {str(e)}")
 
     def _initialize_model(self) -> None:
         """Initialize the embedding model based on configuration"""
@@ -47,6 +108,10 @@ class EmbeddingGenerator:
                 self.model = self._get_huggingface_model()
                 logger.success(f"✅ Initialized HuggingFace embedding model: {self.config.embedding_model_name}")
                 
+            elif self.model_type == "onnx":
+                self.model = self._get_onnx_model()
+                logger.success(f"✅ Initialized ONNX embedding model: {self.config.onnx_model_dir}")
+                
             else:
                 raise ValueError(f"Invalid embedding model type: {self.model_type}")
                 
@@ -61,10 +126,14 @@ class EmbeddingGenerator:
         Returns:
             Configured OpenAI embeddings model
         """
+        # Retries are handled by _call_with_retry so the rate limiter sees them
+        extra = {"openai_api_base": self.config.embedding_api_base} if self.config.embedding_api_base else {}
         return OpenAIEmbeddings(
             model=self.config.embedding_model_name,
             allowed_special={"<|endoftext|>"},
             openai_api_key=self.config.openai_api_key,
+            max_retries=0,
+            **extra,
         )
 
     def _get_huggingface_model(self) -> HuggingFaceEmbeddings:
@@ -80,6 +149,44 @@ class EmbeddingGenerator:
             encode_kwargs={"normalize_embeddings": False},
         )
 
+    def _get_onnx_model(self) -> ONNXEmbeddings:
+        """
+        Get ONNX embedding model instance
+        
+        Returns:
+            ONNX Runtime embeddings model
+        """
+        return ONNXEmbeddings(
+            self.config.onnx_model_dir,
+            model_file=self.config.onnx_model_file,
+            num_threads=self.config.onnx_num_threads,
+            batch_size=self.config.onnx_batch_size,
+            max_length=self.config.onnx_max_length,
+            pooling=self.config.onnx_pooling,
+        )
+
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        """Cached embedding of a text, None on a miss or when the cache fails"""
+        if self.cache is None:
+            return None
+        try:
+            cached = self.cache.get(text)
+        except Exception as e:
+            logger.warning(f"⚠️  Embedding cache read failed, embedding without it: {str(e)}")
+            return None
+        if cached is not None:
+            logger.debug(f"Embedding cache hit for text of length {len(text)}")
+        return cached
+
+    def _cache_put(self, text: str, embedding: List[float]) -> None:
+        """Cache an embedding, logging rather than raising when the cache fails"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(text, embedding)
+        except Exception as e:
+            logger.warning(f"⚠️  Embedding cache write failed: {str(e)}")
+
     def generate_single(self, text: str) -> List[float]:
         """
         Generate embedding for a single text
@@ -95,7 +202,13 @@ class EmbeddingGenerator:
             return [0.0] * self.config.embedding_dimension
 
         try:
-            embedding = self.model.embed_query(text)
+            cached = self._cache_get(text)
+            if cached is not None:
+                return cached
+            
+            embedding, _ = self._call_with_retry(
+                lambda: self.model.embed_query(text), self.token_counter.count(text)
+            )
             
             # Validate embedding dimension
             if len(embedding) != self.config.embedding_dimension:
@@ -103,6 +216,8 @@ class EmbeddingGenerator:
                     f"Embedding dimension mismatch: got {len(embedding)}, expected {self.config.embedding_dimension}"
                 )
             
+            self._cache_put(text, embedding)
+            
             logger.debug(f"Generated embedding for text of length {len(text)}")
             return embedding
             
@@ -110,13 +225,61 @@ class EmbeddingGenerator:
             logger.error(f"❌ Error generating single embedding: {str(e)}")
             raise
 
-    def generate_batch(self, texts: List[str], batch_size: int = 50) -> List[List[float]]:
+    async def agenerate_single(self, text: str) -> List[float]:
+        """
+        Async variant of ``generate_single``
+        
+        OpenAI embeddings are awaited on the async client, so no thread is
+        held during the round trip; local models run on a worker thread.
+        
+        Args:
+            text: Input text to embed
+            
+        Returns:
+            List of float values representing the embedding
+        """
+        if not text or not text.strip():
+            logger.warning("Empty text provided for embedding")
+            return [0.0] * self.config.embedding_dimension
+
+        try:
+            cached = self._cache_get(text)
+            if cached is not None:
+                return cached
+            
+            if self.model_type == "openai":
+                embedding = await self._call_with_retry_async(
+                    lambda: self.model.aembed_query(text), self.token_counter.count(text)
+                )
+            else:
+                embedding = await asyncio.to_thread(self.model.embed_query, text)
+            
+            if len(embedding) != self.config.embedding_dimension:
+                logger.warning(
+                    f"Embedding dimension mismatch: got {len(embedding)}, expected {self.config.embedding_dimension}"
+                )
+            
+            self._cache_put(text, embedding)
+            return embedding
+            
+        except Exception as e:
+            logger.error(f"❌ Error generating single embedding: {str(e)}")
+            raise
+
+    def generate_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
         """
         Generate embeddings for a batch of texts
         
+        Texts that are identical after normalisation (page separators,
+        repeated headers, shared title prefixes) are looked up and embedded
+        once and the vector is fanned back out to every duplicate. Cached
+        embeddings are returned directly; only cache misses are sent to the
+        provider, packed into batches by estimated tokens.
+        
         Args:
             texts: List of input texts to embed
-            batch_size: Size of batches for processing
+            batch_size: Optional cap on texts per request, on top of the
+                token budget and ``embedding_batch_max_texts``
             
         Returns:
             List of embeddings (each embedding is a list of floats)
@@ -126,42 +289,189 @@ class EmbeddingGenerator:
             return []
 
         try:
-            all_embeddings = []
+            groups: Dict[str, List[int]] = {}
+            for i, text in enumerate(texts):
+                groups.setdefault(normalize_text(text), []).append(i)
+            unique_texts = [texts[positions[0]] for positions in groups.values()]
+            self.dedup_texts += len(texts)
+            self.dedup_unique += len(unique_texts)
+            if len(unique_texts) < len(texts):
+                logger.info(f"🧬 Deduplicated {len(texts)} texts to {len(unique_texts)} distinct")
             
-            # Process in batches to avoid API limits
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                
-                logger.info(f"🔢 Processing batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1} ({len(batch)} texts)")
-                
-                start_time = time.time()
-                
-                # Generate embeddings for batch
-                batch_embeddings = self.model.embed_documents(batch)
-                
-                # Validate embeddings
-                for j, embedding in enumerate(batch_embeddings):
-                    if len(embedding) != self.config.embedding_dimension:
-                        logger.warning(
-                            f"Embedding dimension mismatch for item {i+j}: got {len(embedding)}, expected {self.config.embedding_dimension}"
-                        )
-                
-                all_embeddings.extend(batch_embeddings)
-                
-                elapsed = time.time() - start_time
-                logger.debug(f"Batch processed in {elapsed:.2f}s ({len(batch)/elapsed:.1f} texts/sec)")
-                
-                # Small delay to respect API rate limits
-                if self.model_type == "openai" and i + batch_size < len(texts):
-                    time.sleep(0.1)
+            unique_results: List[Optional[List[float]]] = [None] * len(unique_texts)
+            if self.cache is not None:
+                try:
+                    unique_results = self.cache.get_many(unique_texts)
+                except Exception as e:
+                    logger.warning(f"⚠️  Embedding cache read failed, embedding the batch without it: {str(e)}")
+            
+            missing = [i for i, embedding in enumerate(unique_results) if embedding is None]
+            if len(missing) < len(unique_texts):
+                logger.info(f"🗄️ Embedding cache: {len(unique_texts) - len(missing)}/{len(unique_texts)} hits")
+            
+            texts_to_embed = [unique_texts[i] for i in missing]
+            all_embeddings = self._embed_documents(texts_to_embed, batch_size)
+            
+            for i, embedding in zip(missing, all_embeddings):
+                unique_results[i] = embedding
+            if self.cache is not None and all_embeddings:
+                # The embeddings are already paid for: a cache failure must not lose them
+                try:
+                    self.cache.put_many(texts_to_embed, all_embeddings)
+                except Exception as e:
+                    logger.warning(f"⚠️  Embedding cache write failed, {len(all_embeddings)} embeddings not cached: {str(e)}")
+            
+            # Duplicates get their own copy so callers can mutate vectors independently
+            results: List[Optional[List[float]]] = [None] * len(texts)
+            for embedding, positions in zip(unique_results, groups.values()):
+                results[positions[0]] = embedding
+                for i in positions[1:]:
+                    results[i] = list(embedding)
             
             logger.success(f"✅ Generated {len(all_embeddings)} embeddings from {len(texts)} texts")
-            return all_embeddings
+            return results
             
         except Exception as e:
             logger.error(f"❌ Error generating batch embeddings: {str(e)}")
             raise
 
+    def _embed_documents(self, texts: List[str], max_texts: Optional[int] = None) -> List[List[float]]:
+        """
+        Embed texts with the provider in token-budgeted batches
+        
+        Batches are packed by estimated tokens under the adaptive budget, so
+        long parent chunks and short child chunks make similar-sized
+        requests. For OpenAI, up to ``embedding_concurrency`` batches are in
+        flight at once, paced by the RPM / TPM rate limiter; results keep
+        input order.
+        
+        Args:
+            texts: Texts to embed
+            max_texts: Optional cap on texts per batch
+            
+        Returns:
+            List of embeddings
+        """
+        if not texts:
+            return []
+        
+        token_counts = self.token_counter.count_many(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        cursor = {"position": 0, "batch": 0}
+        cursor_lock = threading.Lock()
+        
+        def worker() -> None:
+            # Each worker packs its next batch when it is free, so batches
+            # follow the budget as it adapts during the run
+            while True:
+                with cursor_lock:
+                    start = cursor["position"]
+                    if start >= len(texts):
+                        return
+                    end = self.batcher.next_batch(token_counts, start, max_texts)
+                    number = cursor["batch"]
+                    cursor["position"], cursor["batch"] = end, number + 1
+                try:
+                    results[start:end] = self._embed_batch(texts[start:end], sum(token_counts[start:end]), number)
+                except Exception:
+                    # Stop the other workers from taking more batches
+                    with cursor_lock:
+                        cursor["position"] = len(texts)
+                    raise
+        
+        # Local HuggingFace / ONNX models are CPU bound, threads would only contend
+        concurrency = self.config.embedding_concurrency if self.model_type == "openai" else 1
+        workers = max(1, concurrency)
+        start_time = time.time()
+        
+        if workers == 1:
+            worker()
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+                for future in [pool.submit(worker) for _ in range(workers)]:
+                    future.result()
+        
+        elapsed = time.time() - start_time
+        logger.info(
+            f"⚡ Embedded {len(texts)} texts ({sum(token_counts)} tokens) in {cursor['batch']} batches "
+            f"with {workers} workers in {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} texts/sec, "
+            f"budget now {int(self.batcher.budget)} tokens)"
+        )
+        return results
+
+    def _embed_batch(self, batch: List[str], tokens: int, number: int) -> List[List[float]]:
+        """Embed one batch with rate limiting and retries, recording its metrics"""
+        logger.info(f"🔢 Processing batch {number + 1} ({len(batch)} texts, ~{tokens} tokens)")
+        
+        start_time = time.time()
+        batch_embeddings, retries = self._call_with_retry(lambda: self.model.embed_documents(batch), tokens)
+        elapsed = time.time() - start_time
+        self.batcher.record(number, len(batch), tokens, elapsed, retries, threading.current_thread().name)
+        
+        # Validate embeddings
+        for j, embedding in enumerate(batch_embeddings):
+            if len(embedding) != self.config.embedding_dimension:
+                logger.warning(
+                    f"Embedding dimension mismatch for item {j} of batch {number + 1}: "
+                    f"got {len(embedding)}, expected {self.config.embedding_dimension}"
+                )
+        
+        logger.debug(f"Batch processed in {elapsed:.2f}s ({len(batch)/max(elapsed, 1e-9):.1f} texts/sec)")
+        return batch_embeddings
+
+    def _call_with_retry(self, request: Callable[[], T], tokens: int) -> Tuple[T, int]:
+        """
+        Send one provider request under the rate limiter, retrying 429s and transient errors
+        
+        Args:
+            request: Function performing the request
+            tokens: Estimated tokens in the request
+            
+        Returns:
+            The request's result and the number of retries it took
+        """
+        if self.model_type != "openai":
+            return request(), 0
+        
+        for attempt in range(self.config.embedding_max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                return request(), attempt
+            except Exception as e:
+                if attempt >= self.config.embedding_max_retries or not _is_retryable(e):
+                    raise
+                self.batcher.shrink()
+                delay = self.rate_limiter.backoff(attempt, _retry_after(e))
+                logger.warning(f"⏳ Embedding request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+        raise RuntimeError("unreachable")
+
+    async def _call_with_retry_async(self, request: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """Async variant of ``_call_with_retry`` that sleeps on the event loop"""
+        for attempt in range(self.config.embedding_max_retries + 1):
+            await self.rate_limiter.acquire_async(tokens)
+            try:
+                return await request()
+            except Exception as e:
+                if attempt >= self.config.embedding_max_retries or not _is_retryable(e):
+                    raise
+                delay = self.rate_limiter.backoff(attempt, _retry_after(e))
+                logger.warning(f"⏳ Embedding request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+        raise RuntimeError("unreachable")
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """Texts seen by generate_batch, distinct texts and the share that were duplicates"""
+        return {
+            "texts": self.dedup_texts,
+            "unique": self.dedup_unique,
+            "duplicates": self.dedup_texts - self.dedup_unique,
+            "dedup_ratio": 1 - self.dedup_unique / self.dedup_texts if self.dedup_texts else 0.0,
+        }
+
+    @property
+    def batch_metrics(self) -> List[Dict[str, Any]]:
+        """Per-batch metrics (texts, tokens, latency, retries, budget) of this generator"""
+        return list(self.batcher.metrics)
+
     def get_model_info(self) -> dict:
         """
         Get information about the current embedding model
@@ -173,7 +483,11 @@ class EmbeddingGenerator:
             "model_type": self.model_type,
             "model_name": self.config.embedding_model_name,
             "embedding_dimension": self.config.embedding_dimension,
-            "model_class": self.model.__class__.__name__ if self.model else None
+            "model_class": self.model.__class__.__name__ if self.model else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "token_counts": "tiktoken" if self.token_counter.exact else "heuristic",
+            "batching": self.batcher.summary(),
+            "dedup": self.dedup_stats()
         }
 
     def test_embedding(self, test_text: str = "This is a test text for embedding generation.") -> dict:
@@ -223,7 +537,7 @@ def get_embedding_model(
     
     Args:
         model_id: Model identifier
-        model_type: Type of model ("openai" or "huggingface")
+        model_type: Type of model ("openai", "huggingface" or "onnx")
         device: Device for computation
         
     Returns:
@@ -240,5 +554,8 @@ def get_embedding_model(
             model_kwargs={"device": device, "trust_remote_code": True},
             encode_kwargs={"normalize_embeddings": False},
         )
+    elif model_type == "onnx":
+        # model_id is the directory written by export_onnx_model
+        return ONNXEmbeddings(Path(model_id))
     else:
         raise ValueError(f"Invalid embedding model type: {model_type}")
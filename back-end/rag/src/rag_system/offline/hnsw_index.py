@@ -0,0 +1,289 @@
+"""
+HNSW Approximate Nearest-Neighbour Index for RAG System
+Graph-based cosine search for corpora too large for brute force
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Sequence, Any, Set
+from loguru import logger
+import time
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # pragma: no cover - optional dependency
+    hnswlib = None
+
+GRAPH_FILE = "hnsw_graph.bin"
+IDS_FILE = "hnsw_ids.json"
+
+
+class HNSWIndex:
+    """
+    Approximate cosine similarity index backed by an hnswlib graph
+    Supports incremental inserts and deletes and persistence to disk
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        max_elements: int = 10_000,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+    ):
+        """
+        Initialize an empty HNSWIndex
+
+        Args:
+            dimension: Embedding dimension
+            max_elements: Initial capacity (grows automatically on insert)
+            m: Graph out-degree; higher improves recall at the cost of memory
+            ef_construction: Candidate list size while building the graph
+            ef_search: Candidate list size at query time (recall/latency trade-off)
+        """
+        if hnswlib is None:
+            raise ImportError("HNSW index mode requires hnswlib: uv pip install hnswlib")
+
+        self.dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ids: List[str] = []
+        # Labels of removed chunks; hnswlib skips them but keeps their slots
+        self.deleted: Set[int] = set()
+        self._positions: Dict[str, int] = {}
+        # hnswlib has a single, index-wide ef: queries needing a larger one
+        # change it under this lock
+        self._ef_lock = threading.Lock()
+
+        self.graph = hnswlib.Index(space="cosine", dim=dimension)
+        self.graph.init_index(max_elements=max(max_elements, 1), M=m, ef_construction=ef_construction)
+        self.ef_search = ef_search
+
+    @property
+    def ef_search(self) -> int:
+        """Query-time candidate list size"""
+        return self._ef_search
+
+    @ef_search.setter
+    def ef_search(self, value: int) -> None:
+        self._ef_search = value
+        self.graph.set_ef(value)
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self.deleted)
+
+    @property
+    def deleted_ratio(self) -> float:
+        """Share of graph nodes that are deleted"""
+        return len(self.deleted) / len(self.ids) if self.ids else 0.0
+
+    def __contains__(self, chunk_id: str) -> bool:
+        position = self._positions.get(chunk_id)
+        return position is not None and position not in self.deleted
+
+    def add(self, ids: Sequence[str], embeddings: Any) -> None:
+        """
+        Insert new embeddings into the graph without rebuilding it
+
+        Args:
+            ids: Identifiers of the new chunks
+            embeddings: Embeddings of the new chunks (n x dim)
+        """
+        vectors = np.array(embeddings, dtype=np.float32, ndmin=2)
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"Got {len(ids)} ids for {vectors.shape[0]} embeddings")
+        if not len(ids):
+            return
+
+        required = len(self.ids) + len(ids)
+        capacity = self.graph.get_max_elements()
+        if required > capacity:
+            self.graph.resize_index(max(required, capacity * 2))
+
+        labels = np.arange(len(self.ids), required)
+        self.graph.add_items(vectors, labels)
+        for label, chunk_id in zip(labels, ids):
+            self._positions[chunk_id] = int(label)
+        self.ids.extend(ids)
+
+    def remove(self, ids: Sequence[str]) -> int:
+        """
+        Mark chunks as deleted so searches no longer return them
+
+        The nodes stay in the graph; rebuild once many are deleted
+        (see ``deleted_ratio``).
+
+        Args:
+            ids: Identifiers of the chunks to remove, unknown ones are ignored
+
+        Returns:
+            Number of chunks removed
+        """
+        removed = 0
+        for chunk_id in ids:
+            label = self._positions.get(chunk_id)
+            if label is None or label in self.deleted:
+                continue
+            self.graph.mark_deleted(label)
+            self.deleted.add(label)
+            removed += 1
+        return removed
+
+    def get_vectors(self, chunk_ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Stored vectors of chunks, read back from the graph
+
+        Args:
+            chunk_ids: Chunk identifiers
+
+        Returns:
+            Unit-length vector per live chunk id; unknown and deleted ids are left out
+        """
+        found = [(chunk_id, self._positions[chunk_id]) for chunk_id in chunk_ids if chunk_id in self]
+        if not found:
+            return {}
+        # The cosine space stores normalised vectors
+        vectors = np.asarray(self.graph.get_items([label for _, label in found]), dtype=np.float32)
+        return {chunk_id: vector for (chunk_id, _), vector in zip(found, vectors)}
+
+    def _knn_query(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Run knn_query, raising ef for this call when k exceeds ``ef_search``"""
+        # hnswlib needs ef >= k to return k results
+        if k <= self.ef_search:
+            return self.graph.knn_query(queries, k=k)
+        with self._ef_lock:
+            self.graph.set_ef(k)
+            try:
+                return self.graph.knn_query(queries, k=k)
+            finally:
+                self.graph.set_ef(self.ef_search)
+
+    def _hits(self, labels: Sequence[int], distances: Sequence[float]) -> List[Tuple[str, float]]:
+        """(chunk id, cosine similarity) pairs of one query's labels"""
+        return [(self.ids[label], 1.0 - float(distance)) for label, distance in zip(labels, distances)]
+
+    def search(self, query_embedding: Sequence[float], k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find approximately the k chunks most similar to a query
+
+        Args:
+            query_embedding: Query vector embedding
+            k: Number of results to return
+
+        Returns:
+            List of (chunk id, cosine similarity) ordered best first
+        """
+        if not len(self):
+            return []
+
+        k = min(k, len(self))
+        labels, distances = self._knn_query(np.asarray(query_embedding, dtype=np.float32), k)
+        return self._hits(labels[0], distances[0])
+
+    def search_batch(self, query_embeddings: Any, k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Find approximately the k most similar chunks for each of many queries
+
+        hnswlib answers the whole batch in one call using its own threads.
+
+        Args:
+            query_embeddings: Query vectors (n_queries x dim)
+            k: Number of results per query
+
+        Returns:
+            One list of (chunk id, cosine similarity) per query, best first
+        """
+        queries = np.array(query_embeddings, dtype=np.float32, ndmin=2)
+        if not len(self) or queries.shape[0] == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        k = min(k, len(self))
+        labels, distances = self._knn_query(queries, k)
+        return [self._hits(row_labels, row_distances) for row_labels, row_distances in zip(labels, distances)]
+
+    def save(self, directory: Path) -> None:
+        """
+        Persist the graph and id table to a directory
+
+        Files are written to temporaries first and renamed into place, the id
+        table before the graph: ``load`` reads them in the opposite order, so
+        a reader racing a save never sees graph labels missing from the table.
+
+        Args:
+            directory: Target directory
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        graph_path = directory / GRAPH_FILE
+        ids_path = directory / IDS_FILE
+
+        self.graph.save_index(str(graph_path) + ".tmp")
+        with open(str(ids_path) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "m": self.m,
+                "ef_construction": self.ef_construction,
+                "ids": self.ids,
+                "deleted": sorted(self.deleted),
+            }, f)
+
+        os.replace(str(ids_path) + ".tmp", ids_path)
+        os.replace(str(graph_path) + ".tmp", graph_path)
+        logger.success(f"💾 Saved HNSW index with {len(self)} vectors to {directory}")
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """Whether a persisted index is present in a directory"""
+        return (directory / GRAPH_FILE).exists() and (directory / IDS_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: Path, ef_search: int = 64) -> "HNSWIndex":
+        """
+        Load a persisted index from a directory
+
+        Args:
+            directory: Directory written by ``save``
+            ef_search: Query-time candidate list size
+
+        Returns:
+            Loaded HNSWIndex
+        """
+        if hnswlib is None:
+            raise ImportError("HNSW index mode requires hnswlib: uv pip install hnswlib")
+
+        start_time = time.time()
+        graph_path = str(directory / GRAPH_FILE)
+        with open(directory / IDS_FILE, encoding="utf-8") as f:
+            dimension = json.load(f)["dimension"]
+        graph = hnswlib.Index(space="cosine", dim=dimension)
+        graph.load_index(graph_path)
+
+        # Read after the graph, so the table covers every label in it
+        with open(directory / IDS_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+        count = graph.get_current_count()
+
+        index = cls.__new__(cls)
+        index.dimension = meta["dimension"]
+        index.m = meta["m"]
+        index.ef_construction = meta["ef_construction"]
+        index.ids = meta["ids"][:count]
+        index._positions = {chunk_id: position for position, chunk_id in enumerate(index.ids)}
+        index.deleted = {label for label in meta.get("deleted", []) if label < count}
+        index._ef_lock = threading.Lock()
+        index.graph = graph
+        # Leave headroom so incremental inserts don't resize immediately
+        index.graph.resize_index(max(count * 2, 1))
+        for label in index.deleted:
+            try:
+                index.graph.mark_deleted(label)
+            except RuntimeError:
+                pass  # Already marked in the saved graph
+        index.ef_search = ef_search
+
+        logger.info(f"📥 Loaded HNSW index with {len(index)} vectors in {time.time() - start_time:.2f}s")
+        return index
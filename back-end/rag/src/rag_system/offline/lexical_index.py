@@ -0,0 +1,275 @@
+"""
+Lexical Index Service for RAG System
+BM25 inverted index over chunk content with Vietnamese-aware tokenisation
+"""
+
+import json
+import os
+import re
+import shutil
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Tuple, Sequence, Optional
+from loguru import logger
+import time
+
+import numpy as np
+
+from rag_system.offline.similarity_index import top_k_indices
+
+VOCABULARY_FILE = "vocabulary.json"
+ARRAY_FILES = ("indptr", "postings", "term_freqs", "idf", "doc_norms", "ids")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def fold_accents(text: str) -> str:
+    """
+    Lower-case text and strip Vietnamese diacritics
+
+    "Đại học Bách khoa" becomes "dai hoc bach khoa" so queries typed without
+    accents still match.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Accent-folded lower-case text
+    """
+    text = text.lower().replace("đ", "d")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str, bigrams: bool = True) -> List[str]:
+    """
+    Split text into folded syllable tokens
+
+    Vietnamese words span several space-separated syllables, so adjacent
+    syllable pairs are added as bigram tokens ("cong_nghe"). Codes such as
+    "A00" or "BKA" survive as single tokens.
+
+    Args:
+        text: Input text
+        bigrams: Whether to add syllable bigrams
+
+    Returns:
+        List of tokens
+    """
+    syllables = _TOKEN_PATTERN.findall(fold_accents(text))
+    if not bigrams:
+        return syllables
+    return syllables + [f"{a}_{b}" for a, b in zip(syllables, syllables[1:])]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked id lists with reciprocal rank fusion
+
+    Each list contributes ``weight / (k + rank)`` to every id it contains,
+    which needs no score calibration between retrievers.
+
+    Args:
+        rankings: Ranked id lists, best first
+        k: Rank smoothing constant
+        weights: Optional per-list weights
+
+    Returns:
+        List of (id, fused score) ordered best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, chunk_id in enumerate(ranking, 1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index with array-backed postings
+    Postings are stored CSR-style: ``indptr[t]:indptr[t + 1]`` slices the
+    document rows and term frequencies of term ``t``
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        term_freqs: np.ndarray,
+        idf: np.ndarray,
+        doc_norms: np.ndarray,
+        ids: Sequence,
+        k1: float = 1.2,
+    ):
+        """
+        Initialize LexicalIndex from prebuilt arrays (see ``build``)
+
+        Args:
+            vocabulary: Term to term id mapping
+            indptr: Posting offsets per term (V + 1)
+            postings: Document rows of all postings
+            term_freqs: Term frequencies of all postings
+            idf: BM25 inverse document frequency per term
+            doc_norms: Per-document BM25 length normalisation ``k1 * (1 - b + b * dl / avgdl)``
+            ids: Chunk identifiers per document row
+            k1: BM25 term-frequency saturation
+        """
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.postings = postings
+        self.term_freqs = term_freqs
+        self.idf = idf
+        self.doc_norms = doc_norms
+        self.ids = ids
+        self.k1 = k1
+
+    def __len__(self) -> int:
+        return self.doc_norms.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "LexicalIndex":
+        """
+        Build a BM25 index over a corpus
+
+        Args:
+            ids: Chunk identifiers
+            texts: Chunk contents aligned with ``ids``
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalisation strength
+
+        Returns:
+            Built LexicalIndex
+        """
+        start_time = time.time()
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_rows: List[int] = []
+        freqs: List[int] = []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text or "")
+            doc_lengths[row] = len(tokens)
+            for term, count in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_rows.append(row)
+                freqs.append(count)
+
+        term_array = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_array, kind="stable")
+        postings = np.asarray(doc_rows, dtype=np.int32)[order]
+        term_freqs = np.asarray(freqs, dtype=np.float32)[order]
+
+        doc_freqs = np.bincount(term_array, minlength=len(vocabulary))
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=indptr[1:])
+
+        num_docs = max(len(texts), 1)
+        idf = np.log1p((num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+        avg_length = (float(doc_lengths.mean()) if len(texts) else 0.0) or 1.0
+        doc_norms = (k1 * (1 - b + b * doc_lengths / avg_length)).astype(np.float32)
+
+        id_table = np.array([str(chunk_id).encode("ascii") for chunk_id in ids], dtype=bytes)
+        index = cls(vocabulary, indptr, postings, term_freqs, idf, doc_norms, id_table, k1=k1)
+        logger.info(
+            f"📇 Built BM25 index: {len(index)} chunks, {len(vocabulary)} terms, "
+            f"{postings.shape[0]} postings in {time.time() - start_time:.2f}s"
+        )
+        return index
+
+    def chunk_id(self, row: int) -> str:
+        """Chunk identifier of a document row"""
+        chunk_id = self.ids[row]
+        return chunk_id.decode("ascii") if isinstance(chunk_id, bytes) else chunk_id
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Score the corpus against a query with BM25
+
+        Args:
+            query: Query text
+            k: Number of results to return
+
+        Returns:
+            List of (chunk id, BM25 score) ordered best first, zero scores omitted
+        """
+        term_ids = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        if not term_ids or len(self) == 0:
+            return []
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            rows = self.postings[start:end]
+            tf = self.term_freqs[start:end]
+            # Rows are unique within one posting list, so fancy-index += is safe
+            scores[rows] += self.idf[term_id] * tf * (self.k1 + 1) / (tf + self.doc_norms[rows])
+
+        top = top_k_indices(scores, k)
+        return [(self.chunk_id(row), float(scores[row])) for row in top if scores[row] > 0]
+
+    def nbytes(self) -> int:
+        """Size of the array-backed index in bytes, vocabulary excluded"""
+        return sum(getattr(self, name).nbytes for name in ARRAY_FILES)
+
+    def save(self, directory: Path) -> None:
+        """
+        Persist the index, replacing any previous copy in one rename
+
+        Args:
+            directory: Target directory
+        """
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        for name in ARRAY_FILES:
+            np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+        with open(tmp_dir / VOCABULARY_FILE, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "terms": self.vocabulary}, f)
+
+        old_dir = directory.with_name(directory.name + ".old")
+        if directory.exists():
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.rename(directory, old_dir)
+        os.rename(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        logger.success(f"💾 Saved BM25 index ({self.nbytes() / 1024 ** 2:.1f} MB) to {directory}")
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """Whether a persisted index is present in a directory"""
+        return (directory / VOCABULARY_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: Path) -> "LexicalIndex":
+        """
+        Load a persisted index, memory-mapping the posting arrays
+
+        Args:
+            directory: Directory written by ``save``
+
+        Returns:
+            Loaded LexicalIndex
+        """
+        start_time = time.time()
+        with open(directory / VOCABULARY_FILE, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAY_FILES}
+        index = cls(meta["terms"], k1=meta["k1"], **arrays)
+        logger.info(f"📥 Loaded BM25 index with {len(index)} chunks in {time.time() - start_time:.2f}s")
+        return index
@@ -0,0 +1,187 @@
+"""
+Matryoshka Similarity Index for RAG System
+Two-stage search: a compact low-dimensional prefix array picks candidates,
+full-width vectors re-score them
+"""
+
+from typing import List, Tuple, Sequence, Optional, Any
+
+import numpy as np
+
+from rag_system.offline.metadata_filter import MetadataFilterIndex, SearchFilters
+from rag_system.offline.similarity_index import (
+    SimilarityIndex,
+    batch_top_k,
+    normalize_rows,
+    normalize_vector,
+    top_k_indices,
+)
+
+
+def truncate_embeddings(matrix: np.ndarray, dimension: int) -> np.ndarray:
+    """
+    Row-normalised copy of the first ``dimension`` columns of a matrix
+
+    Models trained with Matryoshka representation learning (e.g. OpenAI's
+    text-embedding-3 family) keep most of their signal in the leading
+    dimensions, so the renormalised prefix is itself a usable embedding.
+
+    Args:
+        matrix: Embeddings (n x dim)
+        dimension: Prefix width
+
+    Returns:
+        Contiguous float32 array (n x dimension)
+    """
+    if not 0 < dimension <= matrix.shape[1]:
+        raise ValueError(f"Prefix dimension {dimension} must be in 1..{matrix.shape[1]}")
+    return normalize_rows(np.array(matrix[:, :dimension], dtype=np.float32, order="C"))
+
+
+class MatryoshkaIndex(SimilarityIndex):
+    """
+    Similarity index searched on an embedding prefix and re-scored at full width
+    The prefix array is the hot set kept in memory; the full matrix is
+    normally a memory-mapped snapshot, so only the rows of the re-scored
+    candidates are paged in. Everything else (``score``, ``rows_for``,
+    ``matrix``) behaves as in ``SimilarityIndex``.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        prefix: np.ndarray,
+        normalized: bool = False,
+        metadata: Optional[MetadataFilterIndex] = None,
+        candidates: int = 100,
+    ):
+        """
+        Initialize MatryoshkaIndex
+
+        Args:
+            ids: Chunk identifiers, one per embedding row
+            embeddings: Full-width embeddings (n x dim), used for re-scoring
+            prefix: Row-normalised prefix embeddings (n x prefix dim)
+            normalized: Whether the full-width rows are already unit-length
+            metadata: Filterable field columns aligned with the rows
+            candidates: Prefix hits re-scored with full vectors per query
+        """
+        super().__init__(ids, embeddings, normalized=normalized, metadata=metadata)
+        if prefix.shape[0] != len(self):
+            raise ValueError(f"Got {prefix.shape[0]} prefix rows for {len(self)} embeddings")
+        self.prefix = np.ascontiguousarray(prefix, dtype=np.float32)
+        self.candidates = candidates
+
+    @classmethod
+    def from_index(cls, index: SimilarityIndex, dimension: int, candidates: int = 100) -> "MatryoshkaIndex":
+        """
+        Two-stage index over an existing index's matrix
+
+        Args:
+            index: Full-width index to wrap
+            dimension: Prefix width
+            candidates: Prefix hits re-scored per query
+
+        Returns:
+            MatryoshkaIndex sharing the index's matrix
+        """
+        return cls(
+            index.ids,
+            index.matrix,
+            truncate_embeddings(index.matrix, dimension),
+            normalized=True,
+            metadata=index.metadata,
+            candidates=candidates,
+        )
+
+    @property
+    def prefix_dimension(self) -> int:
+        """Width of the first-stage prefix"""
+        return self.prefix.shape[1]
+
+    @property
+    def hot_bytes(self) -> int:
+        """Bytes of the in-memory first-stage array"""
+        return self.prefix.nbytes
+
+    def add(self, ids: Sequence[str], embeddings: Any, chunks: Optional[Sequence[dict]] = None) -> None:
+        """Append new embeddings to both stages"""
+        super().add(ids, embeddings, chunks)
+        new_rows = self.matrix[-len(ids):]
+        self.prefix = np.vstack([self.prefix, truncate_embeddings(new_rows, self.prefix_dimension)])
+
+    def _rescore(self, query: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """Score candidate rows with full-width vectors and keep the top k"""
+        # Ascending rows keep reads from the mapped file sequential
+        rows = np.sort(rows)
+        scores = self.matrix[rows] @ query
+        return [(self.chunk_id(int(rows[i])), float(scores[i])) for i in top_k_indices(scores, k)]
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the k chunks most similar to a query in two stages
+
+        Args:
+            query_embedding: Full-width query vector embedding
+            k: Number of results to return
+            filters: Field name to required value(s), see ``FILTER_FIELDS``
+
+        Returns:
+            List of (chunk id, full-width cosine similarity) ordered best first
+        """
+        if len(self) == 0:
+            return []
+
+        query = normalize_vector(query_embedding)
+        if query.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+            )
+        prefix_query = normalize_vector(query[:self.prefix_dimension])
+        candidates = max(self.candidates, k)
+
+        if filters:
+            if self.metadata is None:
+                raise ValueError("Similarity index was built without metadata columns")
+            rows = self.metadata.rows_for(filters)
+            top = rows[top_k_indices(self.prefix[rows] @ prefix_query, candidates)]
+        else:
+            top = top_k_indices(self.prefix @ prefix_query, candidates)
+
+        return self._rescore(query, top, k)
+
+    def search_batch(
+        self,
+        query_embeddings: Any,
+        k: int = 5,
+        block_size: int = 16_384,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Find the k most similar chunks for each of many queries in two stages
+
+        Args:
+            query_embeddings: Full-width query vectors (n_queries x dim)
+            k: Number of results per query
+            block_size: Prefix rows scored per matrix product
+
+        Returns:
+            One list of (chunk id, full-width cosine similarity) per query, best first
+        """
+        queries = np.array(query_embeddings, dtype=np.float32, ndmin=2)
+        if queries.shape[0] == 0 or len(self) == 0:
+            return [[] for _ in range(queries.shape[0])]
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match index dimension {self.dimension}"
+            )
+        normalize_rows(queries)
+
+        prefix_queries = truncate_embeddings(queries, self.prefix_dimension)
+        candidate_rows, _ = batch_top_k(self.prefix, prefix_queries, max(self.candidates, k), block_size)
+        return [self._rescore(query, rows, k) for query, rows in zip(queries, candidate_rows)]
@@ -0,0 +1,166 @@
+"""
+Metadata Filter Index for RAG System
+Per-value row-id postings used to restrict vector search before scoring
+"""
+
+from typing import List, Dict, Any, Optional, Union, Sequence
+
+import numpy as np
+
+# Filter name -> chunk document path
+FILTER_FIELDS = {
+    "source": "metadata.source",
+    "title": "metadata.title",
+    "strategy": "strategy",
+    "parent_document_id": "metadata.parent_document_id",
+}
+
+FilterValue = Union[str, Sequence[str]]
+SearchFilters = Dict[str, FilterValue]
+
+
+def get_field(doc: Dict[str, Any], path: str) -> Optional[Any]:
+    """Read a dotted path such as ``metadata.source`` from a document"""
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def to_mongo_filter(filters: SearchFilters) -> Dict[str, Any]:
+    """
+    Translate search filters to a MongoDB / $vectorSearch filter
+
+    Args:
+        filters: Filter name to value or list of values
+
+    Returns:
+        MongoDB filter document
+    """
+    clauses = {}
+    for name, value in filters.items():
+        path = FILTER_FIELDS[name]
+        if isinstance(value, str):
+            clauses[path] = {"$eq": value}
+        else:
+            clauses[path] = {"$in": list(value)}
+    return clauses
+
+
+class MetadataFilterIndex:
+    """
+    Categorical columns for the filterable chunk fields
+    Each field is stored as an int32 code per row plus its distinct values;
+    the sorted row ids of every value are built on first use of the field
+    """
+
+    def __init__(self, values: Dict[str, List[str]], codes: Dict[str, np.ndarray]):
+        """
+        Initialize MetadataFilterIndex
+
+        Args:
+            values: Distinct values per field, indexed by code
+            codes: Code per row per field (-1 when the row has no value)
+        """
+        self.values = values
+        self.codes = codes
+        self._lookup = {name: {value: code for code, value in enumerate(vals)} for name, vals in values.items()}
+        # field -> (row ids grouped by code, offsets per code)
+        self._postings: Dict[str, tuple] = {}
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Optional[str]]]) -> "MetadataFilterIndex":
+        """
+        Encode raw per-row values into a filter index
+
+        Args:
+            columns: Field name to one value per row
+
+        Returns:
+            Built MetadataFilterIndex
+        """
+        values: Dict[str, List[str]] = {}
+        codes: Dict[str, np.ndarray] = {}
+        for name, column in columns.items():
+            lookup: Dict[str, int] = {}
+            codes[name] = np.fromiter(
+                (lookup.setdefault(str(value), len(lookup)) if value is not None else -1 for value in column),
+                dtype=np.int32,
+                count=len(column),
+            )
+            values[name] = list(lookup)
+        return cls(values, codes)
+
+    def __len__(self) -> int:
+        return next(iter(self.codes.values())).shape[0] if self.codes else 0
+
+    def append(self, columns: Dict[str, List[Optional[str]]]) -> None:
+        """
+        Append rows for newly indexed chunks
+
+        Args:
+            columns: Field name to one value per new row
+        """
+        for name, column in columns.items():
+            lookup = self._lookup.setdefault(name, {})
+            vals = self.values.setdefault(name, [])
+            new_codes = []
+            for value in column:
+                if value is None:
+                    new_codes.append(-1)
+                    continue
+                value = str(value)
+                if value not in lookup:
+                    lookup[value] = len(vals)
+                    vals.append(value)
+                new_codes.append(lookup[value])
+            existing = self.codes.get(name, np.full(len(self), -1, dtype=np.int32))
+            self.codes[name] = np.concatenate([existing, np.asarray(new_codes, dtype=np.int32)])
+            self._postings.pop(name, None)
+
+    def _field_postings(self, name: str) -> tuple:
+        """Row ids sorted by code, with per-code offsets"""
+        if name not in self._postings:
+            codes = np.asarray(self.codes[name])
+            order = np.argsort(codes, kind="stable").astype(np.int64)
+            offsets = np.searchsorted(codes[order], np.arange(len(self.values[name]) + 1))
+            self._postings[name] = (order, offsets)
+        return self._postings[name]
+
+    def rows_for_value(self, name: str, value: str) -> np.ndarray:
+        """Sorted row ids whose field equals a value"""
+        code = self._lookup.get(name, {}).get(value)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        order, offsets = self._field_postings(name)
+        return order[offsets[code]:offsets[code + 1]]
+
+    def rows_for(self, filters: Optional[SearchFilters]) -> Optional[np.ndarray]:
+        """
+        Rows matching every filter (values within one filter are OR-ed)
+
+        Args:
+            filters: Filter name to value or list of values
+
+        Returns:
+            Sorted row ids, or None when no filter is given
+        """
+        if not filters:
+            return None
+
+        matched: Optional[np.ndarray] = None
+        for name, value in filters.items():
+            if name not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field: {name} (expected one of {list(FILTER_FIELDS)})")
+
+            candidates = [value] if isinstance(value, str) else list(value)
+            rows = [self.rows_for_value(name, str(candidate)) for candidate in candidates]
+            rows = rows or [np.empty(0, dtype=np.int64)]
+            field_rows = np.unique(np.concatenate(rows)) if len(rows) > 1 else rows[0]
+
+            matched = field_rows if matched is None else np.intersect1d(matched, field_rows, assume_unique=True)
+            if matched.size == 0:
+                break
+        return matched
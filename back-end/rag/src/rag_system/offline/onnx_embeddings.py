@@ -0,0 +1,210 @@
+"""
+ONNX Embeddings for RAG System
+CPU sentence-embedding backend running an exported (optionally int8-quantized)
+model through onnxruntime with length-bucketed dynamic padding
+"""
+
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from loguru import logger
+import time
+
+import numpy as np
+
+# Sequence lengths are padded up to a multiple of this, so batches of similar
+# length share a handful of input shapes instead of one per batch
+_LENGTH_BUCKET = 16
+
+
+class ONNXEmbeddings:
+    """
+    Sentence embeddings from an ONNX model directory
+    The directory holds ``tokenizer.json`` and the ONNX graph (as written by
+    ``export_onnx_model``). Texts are sorted by token length and batched so
+    each batch is padded only to its own longest text, rounded up to a length
+    bucket; results are returned in input order. Implements the
+    ``embed_documents`` / ``embed_query`` interface of LangChain embeddings.
+    """
+
+    def __init__(
+        self,
+        model_dir: Path,
+        model_file: str = "model.onnx",
+        num_threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 512,
+        pooling: str = "mean",
+        normalize: bool = False,
+    ):
+        """
+        Load the tokenizer and create the inference session
+
+        Args:
+            model_dir: Directory with tokenizer.json and the ONNX graph
+            model_file: Graph file, e.g. ``model_quantized.onnx`` for int8
+            num_threads: Intra-op threads (0 = onnxruntime default, all cores)
+            batch_size: Texts per inference call
+            max_length: Tokens kept per text
+            pooling: "mean" (sentence-transformers default) or "cls"
+            normalize: L2-normalise the embeddings
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The onnx embedding backend needs onnxruntime and tokenizers: "
+                "pip install 'rag-system-optimized[onnx]'"
+            ) from e
+
+        if pooling not in ("mean", "cls"):
+            raise ValueError(f"Invalid pooling: {pooling}")
+
+        self.model_dir = Path(model_dir)
+        self.model_file = model_file
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.pooling = pooling
+        self.normalize = normalize
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.no_padding()
+        self.pad_id = next(
+            (self.tokenizer.token_to_id(token) for token in ("[PAD]", "<pad>")
+             if self.tokenizer.token_to_id(token) is not None),
+            0
+        )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            str(self.model_dir / model_file), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.num_threads = num_threads or os.cpu_count()
+
+        logger.info(
+            f"🧮 Loaded ONNX embedding model {self.model_dir / model_file} "
+            f"({self.num_threads} threads, batch {batch_size}, {pooling} pooling)"
+        )
+
+    def _encode_batch(self, encodings: List[Any]) -> np.ndarray:
+        """Run one batch padded to its longest text (rounded up to the length bucket)"""
+        longest = max(len(encoding.ids) for encoding in encodings)
+        length = min(self.max_length, -(-longest // _LENGTH_BUCKET) * _LENGTH_BUCKET)
+
+        input_ids = np.full((len(encodings), length), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        output = self.session.run(None, feeds)[0]
+        if output.ndim == 2:
+            # Graph already ends in a pooling layer
+            return output.astype(np.float32)
+
+        if self.pooling == "cls":
+            return output[:, 0].astype(np.float32)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return ((output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into a (n x dim) float32 matrix
+
+        Args:
+            texts: Input texts
+
+        Returns:
+            One row per text, in input order
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(texts))
+        # Longest first so the first batch fails fast if memory is short
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids), reverse=True)
+
+        rows: Optional[np.ndarray] = None
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            batch = self._encode_batch([encodings[i] for i in positions])
+            if rows is None:
+                rows = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            rows[positions] = batch
+
+        if self.normalize:
+            rows /= np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+        return rows
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents (LangChain interface)"""
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed one query (LangChain interface)"""
+        return self.embed_array([text])[0].tolist()
+
+    def info(self) -> Dict[str, Any]:
+        """Model file, threads and batching settings"""
+        return {
+            "model": str(self.model_dir / self.model_file),
+            "threads": self.num_threads,
+            "batch_size": self.batch_size,
+            "max_length": self.max_length,
+            "pooling": self.pooling,
+        }
+
+
+def export_onnx_model(model_name: str, output_dir: Path, quantize: bool = True) -> Path:
+    """
+    Export a HuggingFace sentence-embedding model to ONNX
+
+    Writes ``model.onnx`` and ``tokenizer.json`` to ``output_dir`` and, with
+    ``quantize``, a dynamically int8-quantized ``model_quantized.onnx``.
+
+    Args:
+        model_name: HuggingFace model id
+        output_dir: Directory to write the model to
+        quantize: Also write the int8 model
+
+    Returns:
+        The output directory
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise ImportError(
+            "Exporting needs optimum[onnxruntime] and transformers: pip install 'rag-system-optimized[onnx]'"
+        ) from e
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+
+    logger.info(f"📦 Exporting {model_name} to ONNX in {output_dir}")
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    if quantize:
+        logger.info("🗜️ Quantizing weights to int8")
+        quantize_dynamic(
+            str(output_dir / "model.onnx"),
+            str(output_dir / "model_quantized.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+
+    logger.success(f"✅ Exported ONNX model in {time.time() - start_time:.1f}s")
+    return output_dir
@@ -0,0 +1,139 @@
+"""
+Embedding Quantization for RAG System
+Compact BSON-binary storage formats for chunk embeddings
+"""
+
+from typing import Dict, Any, Literal, Sequence
+
+import numpy as np
+from bson.binary import Binary
+
+EmbeddingStorageFormat = Literal["float", "float16", "int8"]
+
+QUANTIZED_DTYPES = {
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+# Matches chunks stored in any format
+EMBEDDING_EXISTS_FILTER = {
+    "$or": [
+        {"embedding": {"$exists": True}},
+        {"embedding_q": {"$exists": True}},
+    ]
+}
+
+# Projection that drops every stored embedding representation
+EMBEDDING_EXCLUDE_PROJECTION = {
+    "embedding": 0,
+    "embedding_q": 0,
+    "embedding_f32": 0,
+}
+
+# Projection that loads only what the in-process index needs
+EMBEDDING_LOAD_PROJECTION = {
+    "embedding": 1,
+    "embedding_q": 1,
+    "embedding_scale": 1,
+    "embedding_format": 1,
+}
+
+# Projection that loads the full-precision embedding used for re-ranking,
+# with the quantized fields for chunks stored without a float32 copy
+FULL_PRECISION_PROJECTION = {
+    "embedding_f32": 1,
+    **EMBEDDING_LOAD_PROJECTION,
+}
+
+
+def encode_embedding(
+    embedding: Sequence[float],
+    storage_format: EmbeddingStorageFormat,
+    keep_full_precision: bool = True
+) -> Dict[str, Any]:
+    """
+    Encode an embedding into the chunk fields for a storage format
+
+    Quantized formats can also keep a packed float32 copy in ``embedding_f32``
+    so the top candidates of a search can be re-scored at full precision.
+
+    Args:
+        embedding: Float embedding
+        storage_format: "float", "float16" or "int8"
+        keep_full_precision: Store the float32 copy next to a quantized embedding
+
+    Returns:
+        Dictionary of fields to set on the chunk document
+    """
+    if storage_format == "float":
+        return {"embedding": list(embedding)}
+
+    vector = np.asarray(embedding, dtype=np.float32)
+    fields: Dict[str, Any] = {"embedding_format": storage_format}
+    if keep_full_precision:
+        fields["embedding_f32"] = Binary(vector.tobytes())
+
+    if storage_format == "float16":
+        fields["embedding_q"] = Binary(vector.astype(np.float16).tobytes())
+    elif storage_format == "int8":
+        # Symmetric per-vector scale so the largest component maps to ±127
+        max_abs = float(np.abs(vector).max())
+        scale = max_abs / 127.0 if max_abs > 0 else 1.0
+        fields["embedding_q"] = Binary(np.round(vector / scale).astype(np.int8).tobytes())
+        fields["embedding_scale"] = scale
+    else:
+        raise ValueError(f"Unknown embedding storage format: {storage_format}")
+
+    return fields
+
+
+def decode_embedding(doc: Dict[str, Any]) -> np.ndarray:
+    """
+    Decode the stored embedding of a chunk document into float32
+
+    Works for every storage format and never materialises Python floats for
+    binary formats.
+
+    Args:
+        doc: Chunk document with embedding fields
+
+    Returns:
+        1D float32 array
+    """
+    if "embedding_q" not in doc:
+        return np.asarray(doc["embedding"], dtype=np.float32)
+
+    storage_format = doc.get("embedding_format", "float16")
+    vector = np.frombuffer(doc["embedding_q"], dtype=QUANTIZED_DTYPES[storage_format]).astype(np.float32)
+    if storage_format == "int8":
+        vector *= doc["embedding_scale"]
+    return vector
+
+
+def decode_full_precision(doc: Dict[str, Any]) -> np.ndarray:
+    """
+    Decode the full-precision embedding of a chunk document
+
+    Falls back to the stored embedding for chunks written without a float32
+    copy.
+
+    Args:
+        doc: Chunk document with embedding fields
+
+    Returns:
+        1D float32 array
+    """
+    if "embedding_f32" in doc:
+        return np.frombuffer(doc["embedding_f32"], dtype=np.float32)
+    return decode_embedding(doc)
+
+
+def stored_dimension(doc: Dict[str, Any]) -> int:
+    """Embedding dimension of a chunk document in any storage format"""
+    if not doc:
+        return 0
+    if "embedding_q" in doc:
+        itemsize = np.dtype(QUANTIZED_DTYPES[doc.get("embedding_format", "float16")]).itemsize
+        return len(doc["embedding_q"]) // itemsize
+    return len(doc.get("embedding", []))
+
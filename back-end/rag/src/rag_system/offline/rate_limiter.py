@@ -0,0 +1,141 @@
+"""
+Rate Limiter for RAG System
+Token buckets that keep embedding requests under provider RPM / TPM limits
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at a per-minute rate
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize TokenBucket
+
+        Args:
+            per_minute: Refill rate in units per minute
+            capacity: Burst size, defaults to one minute's worth
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take ``amount`` units, going into debt if needed
+
+        Args:
+            amount: Units to take (capped at the capacity)
+
+        Returns:
+            Seconds the caller must wait before using them
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate) if self.rate > 0 else 0.0
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the provider reported a rate limit"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits shared by worker threads
+    A 429 from the provider pauses every worker, not only the one that hit it
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Initialize RateLimiter
+
+        Args:
+            requests_per_minute: Provider request limit (0 disables)
+            tokens_per_minute: Provider token limit (0 disables)
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.wait_time = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Reserve one request of ``tokens`` tokens without waiting
+
+        Args:
+            tokens: Estimated tokens in the request
+
+        Returns:
+            Seconds the caller must wait before sending it
+        """
+        with self._lock:
+            pause = max(0.0, self._paused_until - time.monotonic())
+
+        wait = pause
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+
+        if wait > 0:
+            self.wait_time += wait
+        return wait
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Block until one request of ``tokens`` tokens may be sent
+
+        Args:
+            tokens: Estimated tokens in the request
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Like ``acquire``, but yields to the event loop while waiting"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 60.0) -> float:
+        """
+        Pause all callers after a rate-limit response
+
+        Uses the server's Retry-After when given, otherwise exponential
+        backoff with full jitter.
+
+        Args:
+            attempt: Zero-based retry attempt
+            retry_after: Seconds suggested by the provider
+            base: Backoff base in seconds
+            cap: Maximum backoff in seconds
+
+        Returns:
+            Seconds paused
+        """
+        delay = retry_after if retry_after is not None else random.uniform(0, min(cap, base * 2 ** attempt))
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain()
+        return delay
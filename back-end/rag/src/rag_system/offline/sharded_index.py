@@ -0,0 +1,278 @@
+"""
+Sharded Similarity Index for RAG System
+Splits an embedding snapshot across worker processes and merges their results
+"""
+
+import heapq
+import multiprocessing as mp
+import threading
+from itertools import islice
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from loguru import logger
+import time
+
+import numpy as np
+
+from rag_system.offline import embedding_snapshot
+from rag_system.offline.metadata_filter import SearchFilters
+
+Hits = List[Tuple[str, float]]
+
+
+def _serve_shard(
+    conn: Connection,
+    snapshot_root: str,
+    version: str,
+    row_range: Tuple[int, int],
+    rerank_candidates: int = 0,
+) -> None:
+    """
+    Worker loop: map one shard's rows and answer search requests
+
+    Requests are ``("search", (queries, k, filters))``, ``("vectors", chunk_ids)``
+    or ``("close", None)``; replies are ``("ok", result)`` or ``("error", message)``.
+    """
+    try:
+        index, _ = embedding_snapshot.load_snapshot(
+            Path(snapshot_root), version, row_range=row_range, rerank_candidates=rerank_candidates
+        )
+    except Exception as e:
+        conn.send(("error", f"Failed to load shard {row_range}: {e}"))
+        return
+    conn.send(("ok", len(index)))
+
+    while True:
+        try:
+            op, payload = conn.recv()
+        except EOFError:
+            break
+        if op == "close":
+            break
+
+        try:
+            if op == "vectors":
+                rows = index.rows_for(payload)
+                found = [(chunk_id, row) for chunk_id, row in zip(payload, rows) if row is not None]
+                vectors = np.asarray(index.matrix[[row for _, row in found]], dtype=np.float32)
+                conn.send(("ok", {chunk_id: vector for (chunk_id, _), vector in zip(found, vectors)}))
+                continue
+
+            queries, k, filters = payload
+            if filters:
+                hit_lists = [index.search(query, k, filters=filters) for query in queries]
+            else:
+                hit_lists = index.search_batch(queries, k)
+            conn.send(("ok", hit_lists))
+        except Exception as e:
+            conn.send(("error", str(e)))
+    conn.close()
+
+
+def merge_hits(hit_lists: Sequence[Hits], k: int) -> Hits:
+    """
+    Merge per-shard hit lists (each best first) into the global top k
+
+    Args:
+        hit_lists: One sorted list of (chunk id, score) per shard
+        k: Number of results to keep
+
+    Returns:
+        Top k (chunk id, score) pairs, best first
+    """
+    return list(islice(heapq.merge(*hit_lists, key=lambda hit: -hit[1]), k))
+
+
+class ShardedIndex:
+    """
+    Embedding snapshot served by one worker process per shard
+    Shards are contiguous row ranges recorded in the snapshot manifest at build
+    time; each worker memory-maps only its own rows, queries fan out to every
+    shard over a pipe and the per-shard top k are merged with a heap
+    """
+
+    def __init__(
+        self,
+        snapshot_root: Path,
+        version: Optional[str] = None,
+        num_shards: Optional[int] = None,
+        rerank_candidates: int = 0,
+    ):
+        """
+        Start the shard workers
+
+        Args:
+            snapshot_root: Directory holding snapshot versions
+            version: Snapshot version to serve, defaults to the current one
+            num_shards: Override the shard layout recorded in the manifest
+            rerank_candidates: Two-stage prefix search in every shard, see
+                ``embedding_snapshot.load_snapshot`` (0 = full-width search)
+        """
+        start_time = time.time()
+        self.version = version or embedding_snapshot.current_version(snapshot_root)
+        if self.version is None:
+            raise FileNotFoundError(f"No embedding snapshot published in {snapshot_root}")
+
+        self.manifest = embedding_snapshot.read_manifest(snapshot_root, self.version)
+        if num_shards is not None:
+            self.shards = embedding_snapshot.shard_ranges(self.manifest["count"], num_shards)
+        else:
+            self.shards = self.manifest.get("shards") or [[0, self.manifest["count"]]]
+
+        # Pipes carry one request per shard at a time
+        self._lock = threading.Lock()
+        self._conns: List[Connection] = []
+        self._processes: List[mp.process.BaseProcess] = []
+
+        # Spawn rather than fork: the parent holds MongoDB clients and server threads
+        context = mp.get_context("spawn")
+        for start, end in self.shards:
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_serve_shard,
+                args=(child_conn, str(snapshot_root), self.version, (start, end), rerank_candidates),
+                daemon=True,
+                name=f"shard-{start}-{end}",
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+
+        try:
+            for conn in self._conns:
+                self._receive(conn)
+        except Exception:
+            self.close()
+            raise
+
+        logger.success(
+            f"✅ Started {len(self.shards)} shard workers for snapshot {self.version} "
+            f"({self.manifest['count']} vectors) in {time.time() - start_time:.2f}s"
+        )
+
+    def __len__(self) -> int:
+        return int(self.manifest["count"])
+
+    @property
+    def dimension(self) -> int:
+        return int(self.manifest["dimension"])
+
+    @staticmethod
+    def _receive(conn: Connection) -> Any:
+        try:
+            status, payload = conn.recv()
+        except EOFError:
+            raise RuntimeError("Shard worker exited unexpectedly")
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def search(self, query_embedding: Sequence[float], k: int = 5, filters: Optional[SearchFilters] = None) -> Hits:
+        """
+        Find the k chunks most similar to a query across all shards
+
+        Args:
+            query_embedding: Query vector embedding
+            k: Number of results to return
+            filters: Optional structured filters applied inside every shard
+
+        Returns:
+            List of (chunk id, cosine similarity) ordered best first
+        """
+        return self.search_batch([query_embedding], k, filters)[0]
+
+    def search_batch(
+        self,
+        query_embeddings: Any,
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Hits]:
+        """
+        Find the k most similar chunks for each of many queries across all shards
+
+        Args:
+            query_embeddings: Query vectors (n_queries x dim)
+            k: Number of results per query
+            filters: Optional structured filters applied inside every shard
+
+        Returns:
+            One list of (chunk id, cosine similarity) per query, best first
+        """
+        queries = np.array(query_embeddings, dtype=np.float32, ndmin=2)
+        replies = self._request(("search", (queries, k, filters)))
+        return [
+            merge_hits([hit_lists[query] for hit_lists in replies], k)
+            for query in range(queries.shape[0])
+        ]
+
+    def get_vectors(self, chunk_ids: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Stored vectors of chunks, read from the shards holding them
+
+        Args:
+            chunk_ids: Chunk identifiers
+
+        Returns:
+            Unit-length vector per chunk id found in the snapshot
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        if not chunk_ids:
+            return vectors
+        for shard_vectors in self._request(("vectors", list(chunk_ids))):
+            vectors.update(shard_vectors)
+        return vectors
+
+    def _request(self, request: Tuple[str, Any]) -> List[Any]:
+        """Send a request to every shard and gather the replies in shard order"""
+        with self._lock:
+            if not self._conns:
+                raise RuntimeError("Sharded index is closed")
+            # Fan out first so shards work in parallel, then gather
+            for conn in self._conns:
+                conn.send(request)
+            # Read every reply before raising so the pipes stay in step
+            replies = []
+            for conn in self._conns:
+                try:
+                    replies.append(self._receive(conn))
+                except RuntimeError as e:
+                    replies.append(e)
+
+        for reply in replies:
+            if isinstance(reply, RuntimeError):
+                raise reply
+        return replies
+
+    def close(self) -> None:
+        """Stop the shard workers"""
+        with self._lock:
+            for conn in self._conns:
+                try:
+                    conn.send(("close", None))
+                    conn.close()
+                except (OSError, BrokenPipeError):
+                    pass
+            for process in self._processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self._conns, self._processes = [], []
+        logger.debug(f"🔌 Stopped shard workers for snapshot {self.version}")
+
+    def __enter__(self) -> "ShardedIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Shard layout and worker liveness"""
+        return {
+            "version": self.version,
+            "shards": [
+                {"rows": end - start, "range": [start, end], "alive": process.is_alive()}
+                for (start, end), process in zip(self.shards, self._processes)
+            ],
+        }
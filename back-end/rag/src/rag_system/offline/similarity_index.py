@@ -0,0 +1,404 @@
+"""
+In-process Similarity Index for RAG System
+Exact cosine top-k search over chunk embeddings held in a NumPy matrix
+"""
+
+from typing import List, Tuple, Sequence, Optional, Any
+from loguru import logger
+import time
+
+import numpy as np
+from pymongo.collection import Collection
+
+from rag_system.offline.metadata_filter import (
+    FILTER_FIELDS,
+    MetadataFilterIndex,
+    SearchFilters,
+    get_field,
+)
+from rag_system.offline.quantization import (
+    EMBEDDING_EXISTS_FILTER,
+    EMBEDDING_LOAD_PROJECTION,
+    decode_embedding,
+)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalise the rows of a float32 matrix in place
+
+    Zero rows are left untouched so they score 0 against every query.
+
+    Args:
+        matrix: 2D float32 array
+
+    Returns:
+        The same array, normalised
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def normalize_vector(vector: Sequence[float]) -> np.ndarray:
+    """
+    Convert a vector to a unit-length float32 array
+
+    Args:
+        vector: Input vector
+
+    Returns:
+        Normalised 1D float32 array
+    """
+    query = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm > 0:
+        query = query / norm
+    return query
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+
+    Uses argpartition so only the k winners are sorted.
+
+    Args:
+        scores: 1D array of scores
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices ordered by descending score
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def rerank_hits(
+    query_embedding: Sequence[float],
+    hits: List[Tuple[str, float]],
+    vectors: np.ndarray,
+    k: int,
+) -> List[Tuple[str, float]]:
+    """
+    Re-score candidate hits with full-precision vectors
+
+    Args:
+        query_embedding: Query vector embedding
+        hits: Candidate (chunk id, approximate score) pairs
+        vectors: Full-precision embeddings aligned with ``hits``
+        k: Number of results to keep
+
+    Returns:
+        Top k (chunk id, cosine similarity) ordered best first
+    """
+    if not hits:
+        return []
+
+    matrix = normalize_rows(np.array(vectors, dtype=np.float32, ndmin=2))
+    scores = matrix @ normalize_vector(query_embedding)
+    return [(hits[i][0], float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def batch_top_k(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    block_size: int = 16_384,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top k rows of a matrix for each of many normalised queries
+
+    The queries are scored against one block of rows at a time with a single
+    matrix product, so the score buffer stays at ``len(queries) x block_size``
+    however large the matrix is. Each block's per-query top k is merged into a
+    running top k.
+
+    Args:
+        matrix: Row-normalised embeddings (n x dim)
+        queries: Normalised query vectors (n_queries x dim)
+        k: Number of rows per query
+        block_size: Matrix rows scored per matrix product
+
+    Returns:
+        Tuple of (rows, scores) arrays of shape n_queries x min(k, n), best first
+    """
+    k = min(k, matrix.shape[0])
+    best_scores = np.full((queries.shape[0], 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+
+    for start in range(0, matrix.shape[0], block_size):
+        block_scores = queries @ matrix[start:start + block_size].T
+        block_k = min(k, block_scores.shape[1])
+        top = np.argpartition(-block_scores, block_k - 1, axis=1)[:, :block_k]
+
+        # Merge this block's candidates into the running top k
+        best_scores = np.concatenate([best_scores, np.take_along_axis(block_scores, top, axis=1)], axis=1)
+        best_rows = np.concatenate([best_rows, top + start], axis=1)
+        if best_scores.shape[1] > k:
+            keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+            best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+class SimilarityIndex:
+    """
+    Exact cosine similarity index kept in process memory
+    Embeddings are stored as one contiguous, row-normalised float32 matrix so a
+    query is a single matrix-vector product followed by a partial sort
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        normalized: bool = False,
+        metadata: Optional[MetadataFilterIndex] = None,
+    ):
+        """
+        Initialize SimilarityIndex
+
+        Args:
+            ids: Chunk identifiers, one per embedding row (a list of strings
+                or a NumPy array of ASCII byte strings)
+            embeddings: 2D array of embeddings (n x dim); read-only memory
+                maps are used in place when already normalised
+            normalized: Whether the rows are already unit-length
+            metadata: Filterable field columns aligned with the rows
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2:
+            raise ValueError(f"Embeddings must be a 2D matrix, got shape {embeddings.shape}")
+        if len(ids) != embeddings.shape[0]:
+            raise ValueError(f"Got {len(ids)} ids for {embeddings.shape[0]} embeddings")
+
+        self.ids: Sequence = ids if isinstance(ids, np.ndarray) else list(ids)
+        self._rows: Optional[dict] = None
+        self.metadata = metadata
+        self.matrix = np.ascontiguousarray(embeddings)
+        if not normalized:
+            if not self.matrix.flags.writeable:
+                self.matrix = self.matrix.copy()
+            normalize_rows(self.matrix)
+
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the index"""
+        return self.matrix.shape[1]
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def chunk_id(self, row: int) -> str:
+        """Chunk identifier of a matrix row"""
+        chunk_id = self.ids[row]
+        return chunk_id.decode("ascii") if isinstance(chunk_id, bytes) else chunk_id
+
+    def chunk_ids(self) -> List[str]:
+        """All chunk identifiers in row order"""
+        return [self.chunk_id(row) for row in range(len(self))]
+
+    def rows_for(self, chunk_ids: Sequence[str]) -> List[Optional[int]]:
+        """
+        Matrix rows of chunk identifiers
+
+        The id-to-row map is built on first use.
+
+        Args:
+            chunk_ids: Chunk identifiers
+
+        Returns:
+            Row per id, None for ids not in the index
+        """
+        if self._rows is None:
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self.chunk_ids())}
+        return [self._rows.get(chunk_id) for chunk_id in chunk_ids]
+
+    def score(self, query_embedding: Sequence[float], chunk_ids: Sequence[str]) -> List[Optional[float]]:
+        """
+        Cosine similarity of a query to specific chunks
+
+        Args:
+            query_embedding: Query vector embedding
+            chunk_ids: Chunk identifiers to score
+
+        Returns:
+            Score per id, None for ids not in the index
+        """
+        rows = self.rows_for(chunk_ids)
+        known = [row for row in rows if row is not None]
+        if not known:
+            return [None] * len(rows)
+
+        scores = iter((self.matrix[known] @ normalize_vector(query_embedding)).tolist())
+        return [next(scores) if row is not None else None for row in rows]
+
+    @classmethod
+    def from_collection(
+        cls,
+        collection: Collection,
+        query: Optional[dict] = None,
+        batch_size: int = 1000,
+    ) -> "SimilarityIndex":
+        """
+        Load every chunk embedding of a MongoDB collection into a new index
+
+        Quantized embeddings are decoded straight from their BSON binary
+        payload; full-precision copies are never transferred. The filterable
+        metadata fields are loaded alongside for pre-filtered search.
+
+        Args:
+            collection: Collection holding chunks with stored embeddings
+            query: Optional extra filter on the chunks to load
+            batch_size: Cursor batch size
+
+        Returns:
+            Populated SimilarityIndex
+        """
+        start_time = time.time()
+        mongo_filter = {**EMBEDDING_EXISTS_FILTER, **(query or {})}
+
+        ids: List[str] = []
+        columns: dict = {name: [] for name in FILTER_FIELDS}
+        matrix: Optional[np.ndarray] = None
+        capacity = max(collection.count_documents(mongo_filter), 1)
+
+        projection = {**EMBEDDING_LOAD_PROJECTION, **{path: 1 for path in FILTER_FIELDS.values()}}
+        cursor = collection.find(mongo_filter, projection).batch_size(batch_size)
+        for doc in cursor:
+            embedding = decode_embedding(doc)
+            if matrix is None:
+                matrix = np.empty((capacity, len(embedding)), dtype=np.float32)
+            elif len(ids) == matrix.shape[0]:
+                # Collection grew while loading
+                matrix = np.resize(matrix, (matrix.shape[0] * 2, matrix.shape[1]))
+
+            matrix[len(ids)] = embedding
+            ids.append(str(doc["_id"]))
+            for name, path in FILTER_FIELDS.items():
+                columns[name].append(get_field(doc, path))
+
+        if matrix is None:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        else:
+            matrix = matrix[:len(ids)]
+
+        index = cls(ids, matrix, metadata=MetadataFilterIndex.from_columns(columns))
+        logger.info(
+            f"📥 Loaded {len(index)} embeddings into similarity index in {time.time() - start_time:.2f}s"
+        )
+        return index
+
+    def add(self, ids: Sequence[str], embeddings: Any, chunks: Optional[Sequence[dict]] = None) -> None:
+        """
+        Append new embeddings to the index
+
+        Args:
+            ids: Identifiers of the new chunks
+            embeddings: Embeddings of the new chunks (n x dim)
+            chunks: The new chunk documents, used to extend the metadata columns
+        """
+        new_rows = normalize_rows(np.array(embeddings, dtype=np.float32, ndmin=2))
+        if len(ids) != new_rows.shape[0]:
+            raise ValueError(f"Got {len(ids)} ids for {new_rows.shape[0]} embeddings")
+
+        if isinstance(self.ids, np.ndarray):
+            self.ids = self.chunk_ids()
+        self._rows = None
+
+        if len(self) == 0:
+            self.matrix = np.ascontiguousarray(new_rows)
+        else:
+            self.matrix = np.vstack([self.matrix, new_rows])
+        self.ids.extend(ids)
+
+        if self.metadata is not None:
+            self.metadata.append({
+                name: [get_field(chunk, path) for chunk in chunks] if chunks else [None] * len(ids)
+                for name, path in FILTER_FIELDS.items()
+            })
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the k chunks most similar to a query
+
+        With filters, only the rows matching them are scored.
+
+        Args:
+            query_embedding: Query vector embedding
+            k: Number of results to return
+            filters: Field name to required value(s), see ``FILTER_FIELDS``
+
+        Returns:
+            List of (chunk id, cosine similarity) ordered best first
+        """
+        if len(self) == 0:
+            return []
+
+        query = normalize_vector(query_embedding)
+        if query.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+            )
+
+        if filters:
+            if self.metadata is None:
+                raise ValueError("Similarity index was built without metadata columns")
+            rows = self.metadata.rows_for(filters)
+            scores = self.matrix[rows] @ query
+            top = top_k_indices(scores, k)
+            return [(self.chunk_id(rows[i]), float(scores[i])) for i in top]
+
+        scores = self.matrix @ query
+        top = top_k_indices(scores, k)
+        return [(self.chunk_id(i), float(scores[i])) for i in top]
+
+    def search_batch(
+        self,
+        query_embeddings: Any,
+        k: int = 5,
+        block_size: int = 16_384,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Find the k chunks most similar to each of many queries
+
+        Scores blocks of corpus rows with one matrix product each, see
+        ``batch_top_k``.
+
+        Args:
+            query_embeddings: Query vectors (n_queries x dim)
+            k: Number of results per query
+            block_size: Corpus rows scored per matrix product
+
+        Returns:
+            One list of (chunk id, cosine similarity) per query, best first
+        """
+        queries = np.array(query_embeddings, dtype=np.float32, ndmin=2)
+        if queries.shape[0] == 0 or len(self) == 0:
+            return [[] for _ in range(queries.shape[0])]
+        if queries.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {queries.shape[1]} does not match index dimension {self.dimension}"
+            )
+        normalize_rows(queries)
+
+        best_rows, best_scores = batch_top_k(self.matrix, queries, k, block_size)
+        return [
+            [(self.chunk_id(row), float(score)) for row, score in zip(rows.tolist(), scores.tolist())]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
@@ -3,18 +3,45 @@ Vector Store Service for RAG System
 Handles vector storage and similarity search using MongoDB Atlas Vector Search
 """
 
-from typing import List, Dict, Any, Optional, Literal
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Literal, Tuple
 from loguru import logger
 import time
 
+import numpy as np
+from bson import ObjectId
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_mongodb import MongoDBAtlasVectorSearch
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from pymongo.collection import Collection
 
+from rag_system.offline import embedding_snapshot
+from rag_system.offline.adaptive_batching import TokenCounter
+from rag_system.offline.hnsw_index import HNSWIndex
+from rag_system.offline.lexical_index import LexicalIndex
+from rag_system.offline.metadata_filter import FILTER_FIELDS, SearchFilters, to_mongo_filter
+from rag_system.offline.quantization import (
+    EMBEDDING_EXCLUDE_PROJECTION,
+    EMBEDDING_EXISTS_FILTER,
+    EMBEDDING_LOAD_PROJECTION,
+    FULL_PRECISION_PROJECTION,
+    EmbeddingStorageFormat,
+    decode_embedding,
+    decode_full_precision,
+    encode_embedding,
+    stored_dimension,
+)
+from rag_system.offline.sharded_index import ShardedIndex
+from rag_system.offline.similarity_index import SimilarityIndex, normalize_vector, rerank_hits
 from rag_system.shared.config import RagSystemConfig
 
 ChunkingStrategy = Literal["simple", "contextual", "parent"]
+SearchBackend = Literal["auto", "atlas", "local"]
+IndexMode = Literal["exact", "hnsw"]
 
 
 class VectorStore:
@@ -23,6 +50,16 @@ class VectorStore:
     Supports multiple chunking strategies and vector similarity search
     """
 
+    # Parent fields read when collapsing children
+    PARENT_PROJECTION = {"content": 1, "token_count": 1}
+    
+    # Subdirectories of a snapshot version holding its HNSW graph and BM25 index
+    HNSW_SUBDIR = "hnsw"
+    LEXICAL_SUBDIR = "lexical"
+    
+    # Share of deleted graph nodes above which a build rebuilds the graph
+    HNSW_REBUILD_DELETED_RATIO = 0.25
+
     def __init__(self, config: RagSystemConfig):
         """
         Initialize VectorStore
@@ -33,9 +70,39 @@ class VectorStore:
         self.config = config
         self.client: Optional[MongoClient] = None
         self.collection: Optional[Collection] = None
+        self.parent_collection: Optional[Collection] = None
+        self.build_collection: Optional[Collection] = None
         self.vector_store: Optional[MongoDBAtlasVectorSearch] = None
+        self.similarity_index: Optional[SimilarityIndex] = None
+        self.sharded_index: Optional[ShardedIndex] = None
+        self._sharded_load_attempted = False
+        self.hnsw_index: Optional[HNSWIndex] = None
+        self._hnsw_load_attempted = False
+        # Snapshot version the HNSW graph was loaded from or published with
+        self.hnsw_version: Optional[str] = None
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.lexical_version: Optional[str] = None
+        self._token_counter: Optional[TokenCounter] = None
+        
+        # Version of the mapped embedding snapshot, None when loaded from MongoDB
+        self.snapshot_version: Optional[str] = None
+        self._snapshot_checked_at = 0.0
+        # Build last published in MongoDB, re-read with the snapshot check
+        self.build_version: Optional[str] = None
+        
+        # None until the first query tells us whether $vectorSearch works
+        self._atlas_search_available: Optional[bool] = None
+        
+        # Chunk embeddings ``embeddings_for`` had to read from MongoDB
+        self.embedding_fallbacks = 0
+        
+        # Lazy index loads and snapshot refreshes run on request threads; one
+        # at a time, so a graph or the shard workers are never loaded twice
+        self._index_lock = threading.RLock()
         
         self._connect()
+        self.build_version = self.read_published_build()
+        self._warn_unused_matryoshka()
 
     def _connect(self) -> None:
         """Establish connection to MongoDB"""
@@ -51,6 +118,8 @@ class VectorStore:
             # Setup collection
             database = self.client[self.config.mongodb_database_name]
             self.collection = database[self.config.mongodb_rag_collection_name]
+            self.parent_collection = database[self.config.mongodb_parent_collection_name]
+            self.build_collection = database[self.config.mongodb_index_build_collection_name]
             
             logger.success(f"✅ Connected to vector store: {self.config.mongodb_rag_collection_name}")
             
@@ -58,12 +127,21 @@ class VectorStore:
             logger.error(f"❌ Failed to connect to MongoDB for vector store: {str(e)}")
             raise
 
-    def store_chunks(self, chunks: List[Dict[str, Any]]) -> int:
+    @property
+    def token_counter(self) -> TokenCounter:
+        """Tokenizer of the chat model, for the token counts stored with chunks"""
+        if self._token_counter is None:
+            self._token_counter = TokenCounter(self.config.openai_model_name)
+        return self._token_counter
+
+    def store_chunks(self, chunks: List[Dict[str, Any]], build_id: Optional[str] = None) -> int:
         """
         Store text chunks with embeddings in vector database
         
         Args:
             chunks: List of chunk dictionaries with embeddings
+            build_id: Index build the chunks belong to, recorded in the
+                ``builds`` of every chunk and parent (see ``remove_superseded_chunks``)
             
         Returns:
             Number of chunks stored
@@ -80,17 +158,60 @@ class VectorStore:
                     if field not in chunk:
                         raise ValueError(f"Chunk {i} missing required field: {field}")
 
-            # Clean chunks (remove MongoDB _id if present)
+            # Clean chunks (remove MongoDB _id if present) and encode embeddings
+            storage_format: EmbeddingStorageFormat = self.config.embedding_storage_format
             clean_chunks = []
+            embeddings = []
+            parents: Dict[str, Dict[str, Any]] = {}
             for chunk in chunks:
                 clean_chunk = chunk.copy()
                 clean_chunk.pop("_id", None)
+                embedding = clean_chunk.pop("embedding")
+                clean_chunk.update(encode_embedding(embedding, storage_format, self.quantized_rerank))
+                if build_id is not None:
+                    clean_chunk["builds"] = [build_id]
+                
+                # Parent text is stored once in the parent collection, not per child
+                parent_content = clean_chunk.pop("parent_content", None)
+                parent_id = clean_chunk.get("parent_chunk_id")
+                if parent_content is not None and parent_id and parent_id not in parents:
+                    parents[parent_id] = self._parent_document(clean_chunk, parent_content)
+                
                 clean_chunks.append(clean_chunk)
+                embeddings.append(embedding)
+
+            # Prompt token counts, so context packing does not tokenise at query time
+            token_counts = self.token_counter.count_many([chunk["content"] for chunk in clean_chunks])
+            for clean_chunk, token_count in zip(clean_chunks, token_counts):
+                clean_chunk["token_count"] = token_count
+            parent_counts = self.token_counter.count_many([parent["content"] for parent in parents.values()])
+            for parent, token_count in zip(parents.values(), parent_counts):
+                parent["token_count"] = token_count
+
+            if parents:
+                # Parents are shared by builds: keep the builds already using them
+                builds = {"$addToSet": {"builds": build_id}} if build_id is not None else {}
+                self.parent_collection.bulk_write(
+                    [
+                        UpdateOne({"_id": parent_id}, {"$set": parent, **builds}, upsert=True)
+                        for parent_id, parent in parents.items()
+                    ],
+                    ordered=False
+                )
+                logger.info(f"👪 Stored {len(parents)} parent chunks")
 
             # Insert chunks
             result = self.collection.insert_many(clean_chunks)
             count = len(result.inserted_ids)
             
+            # Keep already loaded local indexes in sync with the collection
+            inserted_ids = [str(_id) for _id in result.inserted_ids]
+            if self.similarity_index is not None:
+                self.similarity_index.add(inserted_ids, embeddings, chunks=clean_chunks)
+            if self.hnsw_index is not None:
+                self.hnsw_index.add(inserted_ids, embeddings)
+                self.save_hnsw_index()
+            
             logger.success(f"✅ Stored {count} chunks in vector database")
             return count
             
@@ -98,6 +219,20 @@ class VectorStore:
             logger.error(f"❌ Error storing chunks: {str(e)}")
             raise
 
+    @staticmethod
+    def _parent_document(child: Dict[str, Any], parent_content: str) -> Dict[str, Any]:
+        """Build the parent collection document for a child chunk's parent"""
+        metadata = child.get("metadata", {})
+        return {
+            "content": parent_content,
+            "parent_index": child.get("parent_index"),
+            "metadata": {
+                key: metadata[key]
+                for key in ("parent_document_id", "title", "source")
+                if key in metadata
+            }
+        }
+
     def create_vector_index(self) -> bool:
         """
         Create vector search index on the collection
@@ -110,13 +245,17 @@ class VectorStore:
             logger.info("🏗️ Creating vector search index...")
             
             # Check if we have vector data
-            sample_doc = self.collection.find_one({"embedding": {"$exists": True}})
+            sample_doc = self.collection.find_one(EMBEDDING_EXISTS_FILTER)
             if not sample_doc:
                 logger.warning("⚠️  No documents with embeddings found")
                 return False
 
-            embedding_dim = len(sample_doc.get("embedding", []))
+            embedding_dim = stored_dimension(sample_doc)
             logger.info(f"📐 Detected embedding dimension: {embedding_dim}")
+            
+            if "embedding_q" in sample_doc:
+                logger.info("💡 Quantized embeddings are searched with the in-process index, skipping Atlas index")
+                return True
 
             # Vector search index definition
             index_definition = {
@@ -130,10 +269,10 @@ class VectorStore:
                             "numDimensions": embedding_dim,
                             "similarity": "cosine"
                         },
-                        {
-                            "type": "filter",
-                            "path": "metadata.source"
-                        }
+                        *[
+                            {"type": "filter", "path": path}
+                            for path in FILTER_FIELDS.values()
+                        ]
                     ]
                 }
             }
@@ -165,6 +304,14 @@ class VectorStore:
         try:
             result = self.collection.delete_many({})
             count = result.deleted_count
+            self.parent_collection.delete_many({})
+            self.similarity_index = None
+            self._close_sharded_index()
+            self.hnsw_index = None
+            self.hnsw_version = None
+            self.lexical_index = None
+            self.lexical_version = None
+            self.snapshot_version = None
             logger.warning(f"🧹 Cleared {count} chunks from vector collection")
             return count
             
@@ -172,34 +319,690 @@ class VectorStore:
             logger.error(f"❌ Error clearing vector collection: {str(e)}")
             raise
 
-    def search_similar(self, query_embedding: List[float], k: int = 5) -> List[Dict[str, Any]]:
+    def remove_superseded_chunks(self, build_id: str) -> int:
+        """
+        Delete the chunks and parents no longer used by build ``build_id``
+        
+        Call once the snapshot of ``build_id`` is published and servers had
+        time to swap it in: until then they still fetch the old chunks.
+        Chunks stored without a build count as superseded.
+        
+        Args:
+            build_id: The published build
+            
+        Returns:
+            Number of chunks deleted
+        """
+        superseded = {"builds": {"$ne": build_id}}
+        count = self.collection.delete_many(superseded).deleted_count
+        parents = self.parent_collection.delete_many(superseded).deleted_count
+        for collection in (self.collection, self.parent_collection):
+            collection.update_many({"builds.1": {"$exists": True}}, {"$set": {"builds": [build_id]}})
+        logger.info(f"🧹 Removed {count} superseded chunks and {parents} parents (build {build_id} kept)")
+        return count
+
+    def remove_build(self, build_id: str) -> int:
+        """
+        Undo an unpublished build, e.g. after it failed
+        
+        Chunks and parents only this build uses are deleted; ones carried
+        over from earlier builds just lose the build.
+        
+        Returns:
+            Number of chunks deleted
+        """
+        count = self.collection.delete_many({"builds": [build_id]}).deleted_count
+        self.parent_collection.delete_many({"builds": [build_id]})
+        for collection in (self.collection, self.parent_collection):
+            collection.update_many({"builds": build_id}, {"$pull": {"builds": build_id}})
+        logger.warning(f"🧹 Removed {count} chunks of unpublished build {build_id}")
+        return count
+
+    def publish_build(self, build_id: str) -> None:
+        """
+        Record ``build_id`` as the published build in MongoDB
+        
+        Servers read it as the index version of their caches, whichever
+        backend answers searches (see ``index_version``).
+        """
+        self.build_collection.replace_one(
+            {"_id": "current"},
+            {"version": build_id, "published_at": datetime.now()},
+            upsert=True
+        )
+        self.build_version = build_id
+        logger.info(f"📣 Published build {build_id}")
+
+    def read_published_build(self) -> Optional[str]:
+        """
+        Build last recorded by ``publish_build``
+        
+        Returns:
+            Build id, or the known one (None at first) if it can't be read
+        """
+        try:
+            doc = self.build_collection.find_one({"_id": "current"})
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read the published index build: {str(e)}")
+            return self.build_version
+        return doc["version"] if doc else None
+
+    @property
+    def index_version(self) -> Optional[str]:
+        """
+        Version of the index searches are answered from, None when unknown
+        
+        The version of the locally loaded snapshot or HNSW graph, else the
+        build published in MongoDB, which also versions Atlas search. Both
+        are re-read once per ``snapshot_check_interval``.
+        """
+        return self.snapshot_version or self.hnsw_version or self.build_version
+
+    def content_hash(self, chunk: Dict[str, Any]) -> str:
+        """
+        Fingerprint of a chunk as it would be stored, embedding excluded
+        
+        Covers the chunk text, parent text and metadata plus the embedding
+        model, storage format and whether a float32 copy is kept, so a chunk
+        with the same hash can be kept instead of embedded and stored again.
+        """
+        fields = {key: value for key, value in chunk.items() if key not in ("_id", "embedding", "content_hash")}
+        payload = json.dumps(
+            [fields, self.config.embedding_model_name, self.config.embedding_storage_format, self.quantized_rerank],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def carry_over_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        build_id: str,
+        previous_build: Optional[str],
+        batch_size: int = 1000
+    ) -> List[Dict[str, Any]]:
+        """
+        Add the unchanged chunks of the previous build to a new build
+        
+        Sets ``content_hash`` on every chunk. Stored chunks of
+        ``previous_build`` with the same hash, and their parents, get
+        ``build_id`` added to their ``builds`` and keep their ids, so the
+        new build's indexes only change where the content did.
+        
+        Args:
+            chunks: Chunks of the new build, without embeddings
+            build_id: The new build
+            previous_build: The published build, None for a full build
+            batch_size: Chunk ids per update
+            
+        Returns:
+            Chunks that still have to be embedded and stored
+        """
+        for chunk in chunks:
+            chunk["content_hash"] = self.content_hash(chunk)
+        if previous_build is None:
+            return chunks
+        
+        stored: Dict[str, Dict[str, Any]] = {}
+        cursor = self.collection.find(
+            {"builds": previous_build, "content_hash": {"$exists": True}},
+            {"content_hash": 1, "parent_chunk_id": 1}
+        )
+        for doc in cursor.batch_size(batch_size):
+            stored.setdefault(doc["content_hash"], doc)
+        
+        fresh, kept_ids, parent_ids = [], [], set()
+        for chunk in chunks:
+            doc = stored.pop(chunk["content_hash"], None)
+            if doc is None:
+                fresh.append(chunk)
+                continue
+            kept_ids.append(doc["_id"])
+            if doc.get("parent_chunk_id"):
+                parent_ids.add(doc["parent_chunk_id"])
+        
+        add_build = {"$addToSet": {"builds": build_id}}
+        for i in range(0, len(kept_ids), batch_size):
+            self.collection.update_many({"_id": {"$in": kept_ids[i:i + batch_size]}}, add_build)
+        parent_ids = list(parent_ids)
+        for i in range(0, len(parent_ids), batch_size):
+            self.parent_collection.update_many({"_id": {"$in": parent_ids[i:i + batch_size]}}, add_build)
+        
+        logger.info(f"♻️ Kept {len(kept_ids)} unchanged chunks of build {previous_build}, {len(fresh)} to embed")
+        return fresh
+
+    def load_similarity_index(self) -> SimilarityIndex:
+        """
+        Load all chunk embeddings into the in-process similarity index
+        
+        Memory-maps the current embedding snapshot when one is published
+        (see ``use_embedding_snapshot``) and reads MongoDB otherwise.
+        
+        Returns:
+            Loaded SimilarityIndex
+        """
+        if self.config.use_embedding_snapshot and embedding_snapshot.current_version(self.snapshot_dir):
+            self.similarity_index, manifest = embedding_snapshot.load_snapshot(
+                self.snapshot_dir, rerank_candidates=self._rerank_candidates
+            )
+            self.snapshot_version = manifest["version"]
+        else:
+            self.similarity_index = SimilarityIndex.from_collection(self.collection)
+            self.snapshot_version = None
+        
+        self._snapshot_checked_at = time.time()
+        return self.similarity_index
+
+    def load_sharded_index(self) -> Optional[ShardedIndex]:
+        """
+        Serve the current embedding snapshot from shard worker processes
+        
+        The parent process never maps the matrix; each worker maps the rows of
+        its shard (see ``vector_index_shards``). A previously running set of
+        workers is stopped once the new one is up.
+        
+        Returns:
+            Started ShardedIndex, or None if no snapshot has been published
+        """
+        self._snapshot_checked_at = time.time()
+        self._sharded_load_attempted = True
+        if not embedding_snapshot.current_version(self.snapshot_dir):
+            logger.warning(f"⚠️  No embedding snapshot in {self.snapshot_dir}, sharded search needs build_rag_index.py")
+            return None
+        
+        previous = self.sharded_index
+        self.sharded_index = ShardedIndex(self.snapshot_dir, rerank_candidates=self._rerank_candidates)
+        self.snapshot_version = self.sharded_index.version
+        if previous is not None:
+            previous.close()
+        return self.sharded_index
+
+    def _close_sharded_index(self) -> None:
+        """Stop the shard workers, if running"""
+        if self.sharded_index is not None:
+            self.sharded_index.close()
+            self.sharded_index = None
+
+    def _warn_unused_matryoshka(self) -> None:
+        """Warn when ``matryoshka_dimension`` is set but no search uses the prefix"""
+        if self.config.matryoshka_dimension <= 0:
+            return
+        reason = None
+        if not self.config.use_embedding_snapshot:
+            reason = "USE_EMBEDDING_SNAPSHOT is off"
+        elif self.config.matryoshka_rerank_candidates <= 0:
+            reason = "MATRYOSHKA_RERANK_CANDIDATES is 0"
+        elif self.config.vector_search_backend == "atlas":
+            reason = "searches go to Atlas"
+        elif self.config.vector_index_mode == "hnsw":
+            reason = "the HNSW graph searches full vectors"
+        if reason is not None:
+            logger.warning(f"⚠️  MATRYOSHKA_DIMENSION={self.config.matryoshka_dimension} is ignored: {reason}")
+
+    @property
+    def _rerank_candidates(self) -> int:
+        """Candidates re-scored per query when searching on the Matryoshka prefix (0 = off)"""
+        return self.config.matryoshka_rerank_candidates if self.config.matryoshka_dimension > 0 else 0
+
+    @property
+    def snapshot_dir(self) -> Path:
+        """Directory holding versioned embedding snapshots"""
+        return self.config.index_dir / "snapshots"
+
+    def export_snapshot(
+        self,
+        source: Optional[SimilarityIndex] = None,
+        num_shards: Optional[int] = None,
+        version: Optional[str] = None,
+        hnsw: Optional[HNSWIndex] = None,
+        lexical: Optional[LexicalIndex] = None
+    ) -> str:
+        """
+        Publish the collection's embeddings as a new memory-mappable snapshot
+        
+        Args:
+            source: Index to export, loaded from MongoDB when omitted
+            num_shards: Shard layout to record, defaults to ``vector_index_shards``
+            version: Version name, e.g. the build id of the exported chunks
+            hnsw: HNSW graph over the same chunks, published with the version
+            lexical: BM25 index over the same chunks, published with the version
+            
+        Returns:
+            Name of the published snapshot version
+        """
+        source = source or SimilarityIndex.from_collection(self.collection)
+        
+        def write_indexes(version_dir: Path) -> None:
+            if hnsw is not None:
+                hnsw.save(version_dir / self.HNSW_SUBDIR)
+            if lexical is not None:
+                lexical.save(version_dir / self.LEXICAL_SUBDIR)
+        
+        version = embedding_snapshot.write_snapshot(
+            self.snapshot_dir,
+            source.chunk_ids(),
+            source.matrix,
+            filter_index=source.metadata,
+            num_shards=num_shards or self.config.vector_index_shards,
+            prefix_dimension=self.config.matryoshka_dimension,
+            version=version,
+            attachments=write_indexes,
+            metadata={
+                "embedding_model": self.config.embedding_model_name,
+                "collection": self.config.mongodb_rag_collection_name,
+            }
+        )
+        if hnsw is not None and hnsw is self.hnsw_index:
+            self.hnsw_version = version
+        if lexical is not None and lexical is self.lexical_index:
+            self.lexical_version = version
+        return version
+
+    def refresh_snapshot(self) -> bool:
+        """
+        Swap in a newer published snapshot if there is one
+        
+        Re-reads the published build and reloads the mapped embeddings (with
+        ``use_embedding_snapshot``), the HNSW graph and the BM25 index,
+        whichever are loaded from an older version.
+        
+        Returns:
+            True if a new snapshot version was loaded
+        """
+        self._snapshot_checked_at = time.time()
+        self.build_version = self.read_published_build()
+        latest = embedding_snapshot.current_version(self.snapshot_dir)
+        if latest is None:
+            return False
+        
+        refreshed = False
+        embeddings_loaded = self.sharded_index is not None or self.similarity_index is not None
+        if self.config.use_embedding_snapshot and embeddings_loaded and latest != self.snapshot_version:
+            logger.info(f"🔄 Embedding snapshot changed: {self.snapshot_version} -> {latest}")
+            if self.sharded_index is not None:
+                self.load_sharded_index()
+            else:
+                self.load_similarity_index()
+            refreshed = True
+        
+        # Also picks up indexes first published after start-up
+        hnsw_wanted = self.hnsw_index is not None or self._hnsw_load_attempted
+        if hnsw_wanted and latest != self.hnsw_version:
+            logger.info(f"🔄 HNSW graph changed: {self.hnsw_version} -> {latest}")
+            self.load_hnsw_index()
+            refreshed = True
+        
+        lexical_wanted = self.lexical_index is not None or self.config.hybrid_search_enabled
+        if lexical_wanted and latest != self.lexical_version:
+            logger.info(f"🔄 BM25 index changed: {self.lexical_version} -> {latest}")
+            self.load_lexical_index()
+            refreshed = True
+        return refreshed
+
+    @property
+    def snapshot_check_due(self) -> bool:
+        """Whether ``snapshot_check_interval`` has passed since the last check"""
+        return time.time() - self._snapshot_checked_at > self.config.snapshot_check_interval
+
+    def refresh_if_due(self) -> None:
+        """Check for a newer snapshot and build once per ``snapshot_check_interval``"""
+        if not self.snapshot_check_due:
+            return
+        with self._index_lock:
+            # Another thread may have refreshed while this one waited
+            if self.snapshot_check_due:
+                self.refresh_snapshot()
+
+    def hnsw_index_dir(self, version: Optional[str] = None) -> Optional[Path]:
+        """
+        Directory of the HNSW graph published with a snapshot version
+        
+        Args:
+            version: Snapshot version, defaults to the current one
+            
+        Returns:
+            Graph directory, or None if no snapshot has been published
+        """
+        version = version or embedding_snapshot.current_version(self.snapshot_dir)
+        return self.snapshot_dir / version / self.HNSW_SUBDIR if version else None
+
+    def build_hnsw_index(self, source: Optional[SimilarityIndex] = None) -> HNSWIndex:
+        """
+        Build the HNSW graph over every chunk embedding in the collection
+        
+        The graph is published with the next ``export_snapshot(hnsw=...)``.
+        
+        Args:
+            source: Exact index to build from, loaded from MongoDB when omitted
+            
+        Returns:
+            Built HNSWIndex
+        """
+        start_time = time.time()
+        exact = source or SimilarityIndex.from_collection(self.collection)
+        
+        self.hnsw_index = HNSWIndex(
+            dimension=exact.dimension or self.config.embedding_dimension,
+            max_elements=len(exact),
+            m=self.config.hnsw_m,
+            ef_construction=self.config.hnsw_ef_construction,
+            ef_search=self.config.hnsw_ef_search
+        )
+        self.hnsw_index.add(exact.chunk_ids(), exact.matrix)
+        self.hnsw_version = None
+        logger.success(f"✅ Built HNSW index over {len(exact)} chunks in {time.time() - start_time:.2f}s")
+        return self.hnsw_index
+
+    def update_hnsw_index(self, source: SimilarityIndex, rebuild: bool = False) -> HNSWIndex:
+        """
+        Bring the published HNSW graph in line with a new build's chunks
+        
+        Chunks no longer in ``source`` are deleted from the graph and new ones
+        inserted, so carried-over chunks are not re-indexed. The graph is
+        rebuilt instead when none is published, when ``rebuild`` is set, or
+        once more than ``HNSW_REBUILD_DELETED_RATIO`` of its nodes are deleted.
+        
+        Args:
+            source: Exact index over the chunks of the new build
+            rebuild: Build the graph from scratch
+            
+        Returns:
+            Updated HNSWIndex, published with the next ``export_snapshot(hnsw=...)``
+        """
+        if rebuild or self.load_hnsw_index() is None:
+            return self.build_hnsw_index(source)
+        
+        start_time = time.time()
+        graph = self.hnsw_index
+        chunk_ids = source.chunk_ids()
+        wanted = set(chunk_ids)
+        removed = graph.remove([chunk_id for chunk_id in graph.ids if chunk_id not in wanted])
+        if graph.deleted_ratio > self.HNSW_REBUILD_DELETED_RATIO:
+            logger.info(f"🕸️ {graph.deleted_ratio:.0%} of HNSW nodes deleted, rebuilding")
+            return self.build_hnsw_index(source)
+        
+        new_rows = [row for row, chunk_id in enumerate(chunk_ids) if chunk_id not in graph]
+        graph.add([chunk_ids[row] for row in new_rows], source.matrix[new_rows])
+        self.hnsw_version = None
+        logger.success(
+            f"✅ Updated HNSW index: {len(new_rows)} added, {removed} deleted, "
+            f"{len(graph)} live in {time.time() - start_time:.2f}s"
+        )
+        return graph
+
+    def save_hnsw_index(self) -> None:
+        """
+        Persist the loaded HNSW graph after incremental inserts
+        
+        Writes back into the snapshot version the graph was loaded from,
+        unless a newer version has been published since.
+        """
+        if self.hnsw_index is None:
+            raise RuntimeError("No HNSW index loaded")
+        current = embedding_snapshot.current_version(self.snapshot_dir)
+        if self.hnsw_version is None or self.hnsw_version != current:
+            logger.warning(f"⚠️  HNSW graph of {self.hnsw_version} is not the current snapshot ({current}), not saved")
+            return
+        self.hnsw_index.save(self.hnsw_index_dir(self.hnsw_version))
+
+    def load_hnsw_index(self) -> Optional[HNSWIndex]:
+        """
+        Load the HNSW graph of the current snapshot if it has one
+        
+        Returns:
+            Loaded HNSWIndex, or None if no graph has been published yet
+        """
+        self._hnsw_load_attempted = True
+        self._snapshot_checked_at = time.time()
+        version = embedding_snapshot.current_version(self.snapshot_dir)
+        directory = self.hnsw_index_dir(version)
+        if directory is None or not HNSWIndex.exists(directory):
+            logger.warning(f"⚠️  No HNSW index published in {self.snapshot_dir}, run build_rag_index.py")
+            return None
+        
+        self.hnsw_index = HNSWIndex.load(directory, ef_search=self.config.hnsw_ef_search)
+        self.hnsw_version = version
+        return self.hnsw_index
+
+    def load_local_index(self) -> None:
+        """
+        Load the in-process index searches will use, instead of on the first query
+        
+        Nothing is loaded when ``vector_search_backend`` is "atlas".
+        """
+        if self.config.vector_search_backend == "atlas":
+            return
+        if self.config.vector_index_mode == "hnsw":
+            self.load_hnsw_index()
+        elif self.config.vector_index_shards > 1:
+            self.load_sharded_index()
+        else:
+            self.load_similarity_index()
+
+    def _ensure_hnsw_index(self) -> bool:
+        """
+        Load the HNSW graph on first use
+        
+        Returns:
+            True if searches should go to the HNSW graph
+        """
+        mode: IndexMode = self.config.vector_index_mode
+        if mode != "hnsw":
+            return False
+        if self.hnsw_index is None and not self._hnsw_load_attempted:
+            with self._index_lock:
+                if self.hnsw_index is None and not self._hnsw_load_attempted:
+                    self.load_hnsw_index()
+        return self.hnsw_index is not None
+
+    def lexical_index_dir(self, version: Optional[str] = None) -> Optional[Path]:
+        """
+        Directory of the BM25 index published with a snapshot version
+        
+        Args:
+            version: Snapshot version, defaults to the current one
+            
+        Returns:
+            Index directory, or None if no snapshot has been published
+        """
+        version = version or embedding_snapshot.current_version(self.snapshot_dir)
+        return self.snapshot_dir / version / self.LEXICAL_SUBDIR if version else None
+
+    def build_lexical_index(self, query: Optional[dict] = None) -> LexicalIndex:
+        """
+        Build the BM25 index over the content of every chunk
+        
+        The index is published with the next ``export_snapshot(lexical=...)``.
+        
+        Args:
+            query: Optional filter on the chunks to index, e.g. one build
+            
+        Returns:
+            Built LexicalIndex
+        """
+        ids, texts = [], []
+        for doc in self.collection.find(query or {}, {"content": 1}).batch_size(1000):
+            ids.append(str(doc["_id"]))
+            texts.append(doc.get("content", ""))
+        
+        self.lexical_index = LexicalIndex.build(ids, texts)
+        self.lexical_version = None
+        return self.lexical_index
+
+    def load_lexical_index(self) -> Optional[LexicalIndex]:
+        """
+        Load the BM25 index of the current snapshot if it has one
+        
+        Returns:
+            Loaded LexicalIndex, or None if none has been published yet
+        """
+        self._snapshot_checked_at = time.time()
+        version = embedding_snapshot.current_version(self.snapshot_dir)
+        directory = self.lexical_index_dir(version)
+        if directory is None or not LexicalIndex.exists(directory):
+            logger.warning(f"⚠️  No BM25 index published in {self.snapshot_dir}, run build_rag_index.py")
+            return None
+        
+        self.lexical_index = LexicalIndex.load(directory)
+        self.lexical_version = version
+        return self.lexical_index
+
+    def search_lexical(self, query: str, k: int = 10) -> List[tuple]:
+        """
+        Search chunk content with BM25
+        
+        Args:
+            query: Query text
+            k: Number of results to return
+            
+        Returns:
+            List of (chunk id, BM25 score), empty if no lexical index is loaded
+        """
+        self.refresh_if_due()
+        if self.lexical_index is None:
+            return []
+        return self.lexical_index.search(query, k)
+
+    def get_chunks_by_ids(
+        self,
+        chunk_ids: List[str],
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch chunks by id in one query, preserving the given order
+        
+        Args:
+            chunk_ids: Chunk identifiers
+            query_embedding: If given, ``similarity_score`` is the cosine to the
+                chunk vector in whichever local index is loaded (see
+                ``local_vectors``)
+                
+        Returns:
+            List of chunk dictionaries without embeddings, without
+            ``similarity_score`` when no local index holds the chunk
+        """
+        scores: Dict[str, float] = {}
+        if query_embedding is not None:
+            query = normalize_vector(query_embedding)
+            scores = {
+                chunk_id: float(np.dot(vector, query))
+                for chunk_id, vector in self.local_vectors(chunk_ids).items()
+            }
+        
+        docs = self._fetch_chunks([(chunk_id, scores.get(chunk_id)) for chunk_id in chunk_ids])
+        for doc in docs:
+            if doc["similarity_score"] is None:
+                del doc["similarity_score"]
+        return docs
+
+    def embeddings_for(self, docs: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Row-normalised embeddings of retrieved chunks, in the given order
+        
+        Taken from the results themselves when the search returned them
+        (Atlas with ``with_embeddings``), else from whichever local index is
+        loaded: the exact index, the HNSW graph or the shard workers. Only
+        chunks none of these hold are read from MongoDB, counted in
+        ``embedding_fallbacks``. ``embedding`` is removed from every doc.
+        
+        Args:
+            docs: Chunk dictionaries with ``_id``
+            
+        Returns:
+            float32 matrix (len(docs) x dim), zero rows for unknown chunks
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        for doc in docs:
+            embedding = doc.pop("embedding", None)
+            if embedding is not None:
+                vectors[doc["_id"]] = normalize_vector(embedding)
+        
+        chunk_ids = [doc["_id"] for doc in docs]
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in vectors]
+        if missing:
+            vectors.update(self.local_vectors(missing))
+            missing = [chunk_id for chunk_id in missing if chunk_id not in vectors]
+        
+        if missing:
+            cursor = self.collection.find(
+                {"_id": {"$in": self.object_ids(missing)}, **EMBEDDING_EXISTS_FILTER},
+                EMBEDDING_LOAD_PROJECTION
+            )
+            for doc in cursor:
+                vectors[str(doc["_id"])] = normalize_vector(decode_embedding(doc))
+            self.embedding_fallbacks += len(missing)
+            logger.info(f"💾 Read {len(missing)}/{len(chunk_ids)} chunk embeddings from MongoDB, not in a local index")
+        
+        dimension = next(iter(vectors.values())).shape[0] if vectors else self.config.embedding_dimension
+        matrix = np.zeros((len(chunk_ids), dimension), dtype=np.float32)
+        for position, chunk_id in enumerate(chunk_ids):
+            if chunk_id in vectors:
+                matrix[position] = vectors[chunk_id]
+        return matrix
+
+    def local_vectors(self, chunk_ids: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Row-normalised embeddings the loaded in-process indexes hold
+        
+        Args:
+            chunk_ids: Chunk identifiers
+            
+        Returns:
+            Vector per chunk id found, without touching MongoDB
+        """
+        vectors: Dict[str, np.ndarray] = {}
+        if self.similarity_index is not None:
+            rows = self.similarity_index.rows_for(chunk_ids)
+            known = [(chunk_id, row) for chunk_id, row in zip(chunk_ids, rows) if row is not None]
+            if known:
+                gathered = np.asarray(self.similarity_index.matrix[[row for _, row in known]], dtype=np.float32)
+                vectors.update({chunk_id: gathered[i] for i, (chunk_id, _) in enumerate(known)})
+        
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in vectors]
+        if missing and self.hnsw_index is not None:
+            vectors.update(self.hnsw_index.get_vectors(missing))
+            missing = [chunk_id for chunk_id in missing if chunk_id not in vectors]
+        if missing and self.sharded_index is not None:
+            try:
+                vectors.update(self.sharded_index.get_vectors(missing))
+            except RuntimeError as e:
+                logger.warning(f"⚠️  Could not read embeddings from shard workers: {str(e)}")
+        return vectors
+
+    def search_similar(
+        self,
+        query_embedding: List[float],
+        k: int = 5,
+        filters: Optional[SearchFilters] = None,
+        with_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Search for similar chunks using vector similarity
         
+        Uses Atlas $vectorSearch when available and the in-process
+        similarity index otherwise (see ``vector_search_backend``).
+        Filters are applied before scoring, so only matching chunks are scored.
+        
         Args:
             query_embedding: Query vector embedding
             k: Number of results to return
+            filters: Optional structured filters on ``source``, ``title``,
+                ``strategy`` or ``parent_document_id`` (a value or list of values)
+            with_embeddings: Keep ``embedding`` in Atlas results for
+                ``embeddings_for`` (local results are looked up in the index)
             
         Returns:
-            List of similar chunk dictionaries
+            List of similar chunk dictionaries with ``similarity_score``
         """
         try:
-            # For local development without Atlas Vector Search,
-            # we'll implement a basic similarity search
             logger.info(f"🔍 Searching for {k} similar chunks")
+            self.refresh_if_due()
+            results = None
+            if self.use_atlas_search:
+                results = self._search_atlas(query_embedding, k, filters, with_embeddings)
             
-            # Simple MongoDB query (won't use vector similarity without Atlas)
-            # This is a fallback for local development
-            cursor = self.collection.find({
-                "embedding": {"$exists": True}
-            }).limit(k)
-            
-            results = []
-            for doc in cursor:
-                # Convert ObjectId to string
-                if "_id" in doc:
-                    doc["_id"] = str(doc["_id"])
-                results.append(doc)
+            if results is None:
+                results = self._search_local(query_embedding, k, filters)
             
             logger.info(f"📊 Found {len(results)} similar chunks")
             return results
@@ -208,6 +1011,349 @@ class VectorStore:
             logger.error(f"❌ Error searching similar chunks: {str(e)}")
             return []
 
+    @property
+    def use_atlas_search(self) -> bool:
+        """Whether the next search should try Atlas $vectorSearch"""
+        backend: SearchBackend = self.config.vector_search_backend
+        # Atlas indexes the float "embedding" field only
+        atlas_usable = self.config.embedding_storage_format == "float"
+        return backend == "atlas" or (backend == "auto" and atlas_usable and self._atlas_search_available is not False)
+
+    def atlas_pipeline(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filters: Optional[SearchFilters] = None,
+        with_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Aggregation pipeline of an Atlas $vectorSearch query, optionally keeping the float embedding"""
+        vector_search = {
+            "index": self.config.vector_index_name,
+            "path": "embedding",
+            "queryVector": list(query_embedding),
+            "numCandidates": max(k * 10, 100),
+            "limit": k
+        }
+        if filters:
+            vector_search["filter"] = to_mongo_filter(filters)
+        
+        projection = dict(EMBEDDING_EXCLUDE_PROJECTION)
+        if with_embeddings:
+            del projection["embedding"]
+        return [
+            {"$vectorSearch": vector_search},
+            {"$addFields": {"similarity_score": {"$meta": "vectorSearchScore"}}},
+            {"$project": projection}
+        ]
+
+    def atlas_search_failed(self, error: Exception) -> None:
+        """Fall back to the local index for good, unless Atlas was explicitly requested"""
+        if self.config.vector_search_backend == "atlas":
+            raise error
+        logger.info(f"💡 Atlas vector search unavailable, using local similarity index: {str(error)}")
+        self._atlas_search_available = False
+
+    def atlas_results(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Convert $vectorSearch documents to search results"""
+        self._atlas_search_available = True
+        for doc in docs:
+            doc["_id"] = str(doc["_id"])
+            # Atlas reports cosine as (1 + cos) / 2; keep scores on the cosine scale
+            doc["similarity_score"] = 2 * doc["similarity_score"] - 1
+        return docs
+
+    def _search_atlas(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filters: Optional[SearchFilters] = None,
+        with_embeddings: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search with MongoDB Atlas $vectorSearch
+        
+        Returns:
+            Results, or None if $vectorSearch is not supported by the server
+        """
+        try:
+            docs = list(self.collection.aggregate(self.atlas_pipeline(query_embedding, k, filters, with_embeddings)))
+        except Exception as e:
+            self.atlas_search_failed(e)
+            return None
+        return self.atlas_results(docs)
+
+    @property
+    def quantized_rerank(self) -> bool:
+        """Whether quantized search scores are re-ranked with float32 embeddings"""
+        return self.config.embedding_storage_format != "float" and self.config.quantized_rerank_candidates > 0
+
+    def search_hits(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filters: Optional[SearchFilters] = None
+    ) -> List[tuple]:
+        """
+        Search the in-process index without touching MongoDB
+        
+        Args:
+            query_embedding: Query vector embedding
+            k: Number of results wanted
+            filters: Optional structured filters
+            
+        Returns:
+            (chunk id, score) hits, over-fetched to ``quantized_rerank_candidates``
+            when ``quantized_rerank`` is on
+        """
+        self.refresh_if_due()
+        
+        # Over-fetch candidates when quantized scores will be re-ranked
+        fetch_k = max(k, self.config.quantized_rerank_candidates) if self.quantized_rerank else k
+        
+        # Filtered queries score the matching rows exactly instead of walking the graph
+        if not filters and self._ensure_hnsw_index():
+            return self.hnsw_index.search(query_embedding, fetch_k)
+        if self._ensure_sharded_index():
+            return self.sharded_index.search(query_embedding, fetch_k, filters=filters)
+        self._ensure_similarity_index()
+        return self.similarity_index.search(query_embedding, fetch_k, filters=filters)
+
+    def _search_local(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Dict[str, Any]]:
+        """Search with the in-process similarity index"""
+        hits = self.search_hits(query_embedding, k, filters)
+        if self.quantized_rerank:
+            hits = self._rerank_full_precision(query_embedding, hits, k)
+        return self._fetch_chunks(hits)
+
+    def search_similar_batch(self, query_embeddings: List[List[float]], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar chunks for many queries at once
+        
+        Always uses the in-process index: the exact index scores all queries
+        against blocks of the corpus with one matrix product per block, the
+        HNSW index answers the batch in one call. Chunk documents for every
+        query are fetched with a single MongoDB query.
+        
+        Args:
+            query_embeddings: Query vector embeddings
+            k: Number of results per query
+            
+        Returns:
+            One list of similar chunk dictionaries with ``similarity_score`` per query
+        """
+        if len(query_embeddings) == 0:
+            return []
+        
+        start_time = time.time()
+        self.refresh_if_due()
+        rerank = self.quantized_rerank
+        fetch_k = max(k, self.config.quantized_rerank_candidates) if rerank else k
+        
+        if self._ensure_hnsw_index():
+            hit_lists = self.hnsw_index.search_batch(query_embeddings, fetch_k)
+        elif self._ensure_sharded_index():
+            hit_lists = self.sharded_index.search_batch(query_embeddings, fetch_k)
+        else:
+            self._ensure_similarity_index()
+            hit_lists = self.similarity_index.search_batch(query_embeddings, fetch_k)
+        
+        if rerank:
+            hit_lists = self._rerank_full_precision_batch(query_embeddings, hit_lists, k)
+        results = self._fetch_chunks_batch(hit_lists)
+        
+        logger.info(f"📊 Searched {len(results)} queries (k={k}) in {time.time() - start_time:.2f}s")
+        return results
+
+    def _ensure_sharded_index(self) -> bool:
+        """
+        Start the shard workers when sharding is configured
+        
+        Returns:
+            True if searches should go to the sharded index
+        """
+        if self.config.vector_index_shards <= 1 or not self.config.use_embedding_snapshot:
+            return False
+        if self.sharded_index is None:
+            with self._index_lock:
+                if self.sharded_index is None and not self._sharded_load_attempted:
+                    self.load_sharded_index()
+        return self.sharded_index is not None
+
+    def _ensure_similarity_index(self) -> None:
+        """Load the similarity index on first use"""
+        if self.similarity_index is None:
+            with self._index_lock:
+                if self.similarity_index is None:
+                    self.load_similarity_index()
+
+    def _rerank_full_precision(self, query_embedding: List[float], hits: List[tuple], k: int) -> List[tuple]:
+        """
+        Re-score quantized search candidates with their float32 embeddings
+        
+        Args:
+            query_embedding: Query vector embedding
+            hits: Candidate (chunk id, approximate score) pairs
+            k: Number of results to keep
+            
+        Returns:
+            Top k (chunk id, cosine similarity) pairs
+        """
+        return self._rerank_full_precision_batch([query_embedding], [hits], k)[0]
+
+    def _rerank_full_precision_batch(
+        self,
+        query_embeddings: List[List[float]],
+        hit_lists: List[List[tuple]],
+        k: int
+    ) -> List[List[tuple]]:
+        """Re-score candidates of several queries, loading all float32 embeddings in one query"""
+        chunk_ids = list({chunk_id for hits in hit_lists for chunk_id, _ in hits})
+        if not chunk_ids:
+            return hit_lists
+        
+        cursor = self.collection.find({"_id": {"$in": self.object_ids(chunk_ids)}}, FULL_PRECISION_PROJECTION)
+        vectors = {str(doc["_id"]): decode_full_precision(doc) for doc in cursor}
+        return self.rerank_with_vectors(query_embeddings, hit_lists, vectors, k)
+
+    @staticmethod
+    def object_ids(chunk_ids: List[str]) -> List[Any]:
+        """Chunk ids as stored in MongoDB (ObjectIds where valid)"""
+        return [ObjectId(chunk_id) if ObjectId.is_valid(chunk_id) else chunk_id for chunk_id in chunk_ids]
+
+    @staticmethod
+    def rerank_with_vectors(
+        query_embeddings: List[List[float]],
+        hit_lists: List[List[tuple]],
+        vectors: Dict[str, np.ndarray],
+        k: int
+    ) -> List[List[tuple]]:
+        """Re-score candidates of several queries with loaded float32 embeddings"""
+        reranked = []
+        for query_embedding, hits in zip(query_embeddings, hit_lists):
+            # Chunks deleted since the index was loaded drop out here
+            hits = [hit for hit in hits if hit[0] in vectors]
+            reranked.append(rerank_hits(query_embedding, hits, [vectors[chunk_id] for chunk_id, _ in hits], k))
+        return reranked
+
+    def _fetch_chunks(self, hits: List[tuple]) -> List[Dict[str, Any]]:
+        """
+        Fetch chunk documents for (id, score) hits, preserving hit order
+        
+        Args:
+            hits: List of (chunk id, similarity score)
+            
+        Returns:
+            List of chunk dictionaries without embeddings
+        """
+        return self._fetch_chunks_batch([hits])[0]
+
+    def _fetch_chunks_batch(self, hit_lists: List[List[tuple]]) -> List[List[Dict[str, Any]]]:
+        """
+        Fetch chunk documents for several hit lists with one query
+        
+        Args:
+            hit_lists: One list of (chunk id, similarity score) per query
+            
+        Returns:
+            One list of chunk dictionaries without embeddings per query
+        """
+        chunk_ids = list({chunk_id for hits in hit_lists for chunk_id, _ in hits})
+        if not chunk_ids:
+            return [[] for _ in hit_lists]
+        
+        cursor = self.collection.find({"_id": {"$in": self.object_ids(chunk_ids)}}, EMBEDDING_EXCLUDE_PROJECTION)
+        return self.assemble_hits(hit_lists, {str(doc["_id"]): doc for doc in cursor})
+
+    @staticmethod
+    def assemble_hits(hit_lists: List[List[tuple]], docs: Dict[str, Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Pair (chunk id, score) hits with their fetched chunk documents
+        
+        Args:
+            hit_lists: One list of (chunk id, similarity score) per query
+            docs: Chunk documents by string id
+            
+        Returns:
+            One list of chunk dictionaries with ``similarity_score`` per query
+        """
+        results = []
+        for hits in hit_lists:
+            query_results = []
+            for chunk_id, score in hits:
+                doc = docs.get(chunk_id)
+                if doc is None:
+                    continue
+                # Copy so queries sharing a chunk keep their own score
+                query_results.append({**doc, "_id": chunk_id, "similarity_score": score})
+            results.append(query_results)
+        return results
+
+    def collapse_parents(self, docs: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """
+        Collapse child chunks to their unique parents, best child first
+
+        Each parent keeps the rank and scores of its best-ranked child and gets
+        ``parent_content`` filled in from the parent collection with one $in
+        query. Chunks without a parent pass through unchanged.
+
+        Args:
+            docs: Retrieved chunks, best first (over-fetch to still get k parents)
+            k: Number of results to keep
+
+        Returns:
+            Up to k chunks, at most one per parent, with ``matched_children``
+        """
+        collapsed, by_parent = self.group_parents(docs, k)
+
+        # Chunks built before parents moved out still carry parent_content inline
+        missing = [parent_id for parent_id, doc in by_parent.items() if "parent_content" not in doc]
+        if missing:
+            self.attach_parent_content(
+                by_parent, self.parent_collection.find({"_id": {"$in": missing}}, self.PARENT_PROJECTION)
+            )
+
+        logger.debug(f"👪 Collapsed {len(docs)} chunks to {len(collapsed)} results ({len(by_parent)} parents)")
+        return collapsed
+
+    @staticmethod
+    def group_parents(docs: List[Dict[str, Any]], k: int) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """
+        Keep the best-ranked child of each parent, without fetching parent texts
+
+        Returns:
+            Up to k collapsed chunks, and the kept child of each parent by parent id
+        """
+        collapsed: List[Dict[str, Any]] = []
+        by_parent: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            parent_id = doc.get("parent_chunk_id")
+            if parent_id is None:
+                if len(collapsed) < k:
+                    collapsed.append(doc)
+                continue
+            if parent_id in by_parent:
+                by_parent[parent_id]["matched_children"] += 1
+                continue
+            if len(collapsed) < k:
+                doc["matched_children"] = 1
+                by_parent[parent_id] = doc
+                collapsed.append(doc)
+        return collapsed, by_parent
+
+    @staticmethod
+    def attach_parent_content(by_parent: Dict[str, Dict[str, Any]], parents: Any) -> None:
+        """Fill in ``parent_content`` (and ``parent_token_count``) from fetched parent documents"""
+        for parent in parents:
+            if parent["_id"] in by_parent:
+                by_parent[parent["_id"]]["parent_content"] = parent["content"]
+                if "token_count" in parent:
+                    by_parent[parent["_id"]]["parent_token_count"] = parent["token_count"]
+
     def create_text_chunks(
         self, 
         documents: List[Dict[str, Any]], 
@@ -333,7 +1479,7 @@ class VectorStore:
             for j, child_text in enumerate(child_texts):
                 chunk = {
                     "content": child_text,
-                    "parent_content": parent_text,  # Store parent for context
+                    "parent_content": parent_text,  # Moved to the parent collection by store_chunks
                     "chunk_id": f"{document.get('id', 'unknown')}_{i}_{j}",
                     "parent_chunk_id": f"{document.get('id', 'unknown')}_{i}",
                     "chunk_index": j,
@@ -360,11 +1506,11 @@ class VectorStore:
         """
         try:
             total_chunks = self.collection.count_documents({})
-            chunks_with_embeddings = self.collection.count_documents({"embedding": {"$exists": True}})
+            chunks_with_embeddings = self.collection.count_documents(EMBEDDING_EXISTS_FILTER)
             
             # Get sample for embedding info
-            sample_chunk = self.collection.find_one({"embedding": {"$exists": True}})
-            embedding_dim = len(sample_chunk.get("embedding", [])) if sample_chunk else 0
+            sample_chunk = self.collection.find_one(EMBEDDING_EXISTS_FILTER)
+            embedding_dim = stored_dimension(sample_chunk)
             
             # Get strategy distribution
             pipeline = [
@@ -376,7 +1522,9 @@ class VectorStore:
                 "total_chunks": total_chunks,
                 "chunks_with_embeddings": chunks_with_embeddings,
                 "embedding_dimension": embedding_dim,
+                "embedding_format": sample_chunk.get("embedding_format", "float") if sample_chunk else None,
                 "strategy_distribution": strategy_counts,
+                "parent_chunks": self.parent_collection.estimated_document_count(),
                 "index_name": self.config.vector_index_name
             }
             
@@ -388,7 +1536,8 @@ class VectorStore:
             return {}
 
     def close(self) -> None:
-        """Close MongoDB connection"""
+        """Close MongoDB connection and stop shard workers"""
+        self._close_sharded_index()
         if self.client:
             self.client.close()
             logger.debug("🔌 Closed vector store connection")
@@ -0,0 +1,356 @@
+"""
+Async Career Counseling Agent for RAG System
+Answers questions on an event loop: LLM, embedding and MongoDB round trips are
+awaited instead of each holding a thread
+"""
+
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Awaitable, Tuple, TypeVar
+from loguru import logger
+
+from rag_system.offline.quantization import EMBEDDING_EXCLUDE_PROJECTION, FULL_PRECISION_PROJECTION, decode_full_precision
+from rag_system.online.career_agent import CareerCounselingAgent
+
+T = TypeVar("T")
+
+
+class AsyncCareerAgent:
+    """
+    Asyncio front end of a CareerCounselingAgent
+    Question embeddings and LLM calls go through the async OpenAI clients and
+    chunk, full-precision and parent documents are read with motor.
+
+    The remaining steps reuse the synchronous VectorStore and agent code and
+    are offloaded with ``asyncio.to_thread`` to the loop's default executor
+    (``async_worker_threads``): the snapshot refresh check, the in-process
+    index search (``search_hits``), BM25 fusion and MMR. They are CPU-bound
+    numpy / hnswlib work that mostly releases the GIL, take the store's index
+    locks, and BM25 fusion and MMR may still read missing chunks or
+    embeddings from MongoDB with pymongo, so none of them may run on the
+    loop. Prompts, thresholds, caches and domain references are the wrapped
+    agent's, so answers match ``CareerCounselingAgent.answer_question``
+    """
+
+    def __init__(self, agent: CareerCounselingAgent):
+        """
+        Initialize AsyncCareerAgent; create it inside the running event loop
+
+        Args:
+            agent: Initialized synchronous agent to share state with
+        """
+        try:
+            from motor.motor_asyncio import AsyncIOMotorClient
+        except ImportError as e:
+            raise ImportError(
+                "The async server needs motor: pip install 'rag-system-optimized[asgi]'"
+            ) from e
+
+        self.agent = agent
+        self.config = agent.config
+        self.vector_store = agent.vector_store
+
+        self.client = AsyncIOMotorClient(
+            self.config.mongodb_uri,
+            appname="rag-system-async",
+            maxPoolSize=self.config.async_mongodb_pool_size
+        )
+        database = self.client[self.config.mongodb_database_name]
+        self.collection = database[self.config.mongodb_rag_collection_name]
+        self.parent_collection = database[self.config.mongodb_parent_collection_name]
+
+        # Questions currently being answered, for the status endpoint and load tests
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.answered = 0
+
+    @staticmethod
+    async def _timed(timings: Dict[str, float], stage: str, awaitable: Awaitable[T]) -> T:
+        """Await one answer stage and record its wall time in seconds"""
+        stage_start = time.time()
+        try:
+            return await awaitable
+        finally:
+            timings[stage] = round(time.time() - stage_start, 4)
+
+    async def embed_question(self, question: str) -> List[float]:
+        """
+        Embed a user question, through the process-wide query cache when enabled
+
+        Args:
+            question: User's question
+
+        Returns:
+            Question embedding
+        """
+        cache = self.agent.query_cache
+        if cache is not None:
+            embedding = cache.get(question)
+            if embedding is not None:
+                return embedding
+        embedding = await self.agent.embedding_generator.agenerate_single(question)
+        if cache is not None:
+            cache.put(question, embedding)
+        return embedding
+
+    async def _find_by_ids(self, chunk_ids: List[str], projection: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        """Chunk documents by string id, read in one query"""
+        cursor = self.collection.find({"_id": {"$in": self.vector_store.object_ids(chunk_ids)}}, projection)
+        return {str(doc["_id"]): doc for doc in await cursor.to_list(length=None)}
+
+    async def search_similar(self, query_embedding: List[float], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Async variant of ``VectorStore.search_similar``
+
+        Args:
+            query_embedding: Query vector embedding
+            k: Number of results to return
+
+        Returns:
+            List of similar chunk dictionaries with ``similarity_score``
+        """
+        store = self.vector_store
+        try:
+            if store.snapshot_check_due:
+                await asyncio.to_thread(store.refresh_if_due)
+            if store.use_atlas_search:
+                try:
+                    cursor = self.collection.aggregate(
+                        store.atlas_pipeline(query_embedding, k, with_embeddings=self.config.mmr_enabled)
+                    )
+                    return store.atlas_results(await cursor.to_list(length=None))
+                except Exception as e:
+                    store.atlas_search_failed(e)
+
+            hits = await asyncio.to_thread(store.search_hits, query_embedding, k)
+            if store.quantized_rerank and hits:
+                docs = await self._find_by_ids([chunk_id for chunk_id, _ in hits], FULL_PRECISION_PROJECTION)
+                vectors = {chunk_id: decode_full_precision(doc) for chunk_id, doc in docs.items()}
+                hits = store.rerank_with_vectors([query_embedding], [hits], vectors, k)[0]
+            if not hits:
+                return []
+
+            docs = await self._find_by_ids([chunk_id for chunk_id, _ in hits], EMBEDDING_EXCLUDE_PROJECTION)
+            return store.assemble_hits([hits], docs)[0]
+
+        except Exception as e:
+            logger.error(f"❌ Error searching similar chunks: {str(e)}")
+            return []
+
+    async def rank_candidates(
+        self,
+        question: str,
+        question_embedding: List[float],
+        similar_docs: List[Dict[str, Any]],
+        max_results: int = 5
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """Async variant of ``CareerCounselingAgent.rank_candidates`` reading parents with motor"""
+        agent = self.agent
+        candidates, keep = agent.candidate_counts(max_results)
+        max_confidence = max((doc.get("similarity_score", 0) for doc in similar_docs), default=0)
+
+        if self.vector_store.lexical_index is not None:
+            similar_docs = await asyncio.to_thread(
+                agent.fuse_lexical_results, question, question_embedding, similar_docs, keep
+            )
+        else:
+            similar_docs = similar_docs[:keep]
+
+        if self.config.parent_collapse_enabled:
+            similar_docs, by_parent = self.vector_store.group_parents(similar_docs, candidates)
+            missing = [parent_id for parent_id, doc in by_parent.items() if "parent_content" not in doc]
+            if missing:
+                cursor = self.parent_collection.find({"_id": {"$in": missing}}, self.vector_store.PARENT_PROJECTION)
+                self.vector_store.attach_parent_content(by_parent, await cursor.to_list(length=None))
+
+        if self.config.mmr_enabled:
+            similar_docs = await asyncio.to_thread(agent.diversify, similar_docs, max_results)
+        else:
+            similar_docs = similar_docs[:max_results]
+
+        logger.info(f"🔍 Retrieved {len(similar_docs)} docs, max confidence: {max_confidence:.3f}")
+        return similar_docs, max_confidence
+
+    async def retrieve_context_with_confidence(
+        self,
+        question: str,
+        question_embedding: Optional[List[float]],
+        max_results: int = 5
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Async variant of ``CareerCounselingAgent.retrieve_context_with_confidence``
+
+        Args:
+            question: User's question
+            question_embedding: Embedding of the question, computed when omitted
+            max_results: Number of documents to return
+
+        Returns:
+            tuple: (documents, max_confidence_score)
+        """
+        try:
+            if question_embedding is None:
+                question_embedding = await self.embed_question(question)
+            similar_docs = await self.search_similar(question_embedding, self.agent.retrieval_fetch_k(max_results))
+            return await self.rank_candidates(question, question_embedding, similar_docs, max_results)
+        except Exception as e:
+            logger.warning(f"⚠️ Context retrieval failed: {str(e)}")
+            return [], 0.0
+
+    async def compute_semantic_relevance(self, question: str, question_embedding: Optional[List[float]]) -> float:
+        """Async variant of ``CareerCounselingAgent.compute_semantic_relevance``"""
+        if question_embedding is None and len(self.agent.domain_references) > 0:
+            try:
+                question_embedding = await self.embed_question(question)
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic relevance computation failed: {str(e)}")
+                return 0.5
+        return self.agent.compute_semantic_relevance(question, question_embedding)
+
+    async def llm_topic_verdict(self, question: str) -> Optional[bool]:
+        """Async variant of ``CareerCounselingAgent.llm_topic_verdict``"""
+        try:
+            response = await self.agent.llm.ainvoke(self.agent.topic_check_messages(question))
+            is_relevant = "CÓ" in response.content.strip().upper()
+            logger.info(f"🤖 LLM topic check: {is_relevant}")
+            return is_relevant
+        except Exception as e:
+            logger.warning(f"⚠️ LLM topic check failed: {str(e)}")
+            return None
+
+    async def check_topic_relevance(self, question: str, question_embedding: Optional[List[float]]) -> bool:
+        """Async variant of ``CareerCounselingAgent.check_topic_relevance``"""
+        decided = self.agent.quick_topic_verdict(question, question_embedding)
+        if decided is not None:
+            return decided
+        return await self.confirm_topic_with_llm(question)
+
+    async def confirm_topic_with_llm(self, question: str) -> bool:
+        """Async variant of ``CareerCounselingAgent.confirm_topic_with_llm``"""
+        start_time = time.time()
+        verdict = await self.llm_topic_verdict(question)
+        if verdict is None:
+            return True  # Default to allowing the question, and do not cache the failure
+        if self.agent.topic_classifier is not None:
+            self.agent.topic_classifier.record_llm_verdict(question, verdict, time.time() - start_time)
+        return verdict
+
+    async def generate_response(self, question: str, context: str, confidence: float) -> str:
+        """Async variant of ``CareerCounselingAgent.generate_response``"""
+        try:
+            start_time = time.time()
+            response = await self.agent.llm.ainvoke(self.agent.build_messages(question, context, confidence))
+            logger.success(f"✅ Generated response in {time.time() - start_time:.2f}s")
+            return response.content
+        except Exception as e:
+            logger.error(f"❌ Response generation failed: {str(e)}")
+            return self.agent.GENERATION_ERROR_RESPONSE
+
+    async def answer_question(self, question: str) -> Dict[str, Any]:
+        """
+        Answer a career counselling question without blocking the event loop
+
+        Same stages, decisions and result dict as
+        ``CareerCounselingAgent.answer_question``: retrieval runs as a task
+        while relevance is scored, and a speculative LLM topic check is a
+        task that is cancelled (closing its request) when not needed.
+
+        Args:
+            question: User's question
+
+        Returns:
+            Dict with response and metadata
+        """
+        question = question.strip()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            result = await self._answer(question)
+            self.agent.log_question(question, result)
+            return result
+        finally:
+            self.in_flight -= 1
+            self.answered += 1
+
+    async def _answer(self, question: str) -> Dict[str, Any]:
+        """Stages of ``answer_question``; every decision is the wrapped agent's"""
+        start_time = time.time()
+        agent = self.agent
+
+        early = agent.early_result(question, start_time)
+        if early is not None:
+            return early
+
+        timings: Dict[str, float] = {}
+
+        try:
+            question_embedding = await self._timed(timings, "embedding", self.embed_question(question))
+        except Exception as e:
+            logger.warning(f"⚠️ Question embedding failed: {str(e)}")
+            question_embedding = None
+
+        faq = agent.faq_result(question_embedding, start_time, timings)
+        if faq is not None:
+            return faq
+
+        retrieval = asyncio.create_task(self._timed(
+            timings, "retrieval", self.retrieve_context_with_confidence(question, question_embedding)
+        ))
+        semantic_relevance = await self._timed(
+            timings, "relevance", self.compute_semantic_relevance(question, question_embedding)
+        )
+
+        # Same speculation as the synchronous agent: the cheap tiers first, the
+        # LLM as a task while retrieval runs when they cannot decide
+        topic_check = None
+        topic_verdict = None
+        if agent.is_low_confidence(semantic_relevance):
+            topic_verdict = agent._timed(
+                timings, "topic_precheck", agent.quick_topic_verdict, question, question_embedding
+            )
+            if topic_verdict is None:
+                topic_check = asyncio.create_task(self._timed(
+                    timings, "topic_check", self.confirm_topic_with_llm(question)
+                ))
+        relevant_docs, retrieval_confidence = await retrieval
+
+        speculative = topic_check is not None
+        if agent.is_low_confidence(max(retrieval_confidence, semantic_relevance)):
+            is_relevant = topic_verdict if topic_verdict is not None else await topic_check
+            if not is_relevant:
+                return agent.off_topic_result(
+                    semantic_relevance, retrieval_confidence, speculative, start_time, timings
+                )
+        elif topic_check is not None:
+            # Best effort: the LLM request is abandoned at its next await;
+            # a verdict that already arrived is still cached
+            topic_check.cancel()
+
+        prepared = agent.answer_inputs(
+            question_embedding, relevant_docs, semantic_relevance, retrieval_confidence, speculative, timings
+        )
+        cached = prepared["cached"]
+        if cached is not None:
+            response = cached["response"]
+        else:
+            response = await self._timed(
+                timings, "generation",
+                self.generate_response(question, prepared["context"], prepared["combined_confidence"])
+            )
+            agent.store_answer(question, question_embedding, response, prepared["fingerprint"], timings["generation"])
+
+        result = agent.answer_result(response, prepared, start_time, timings)
+        logger.success(f"✅ Question answered in {result['processing_time']:.2f}s")
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency counters of the event loop"""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "answered": self.answered
+        }
+
+    def close(self) -> None:
+        """Close the motor client"""
+        self.client.close()
@@ -3,7 +3,8 @@ Enhanced Career Counseling Agent for RAG System
 Uses semantic similarity instead of keyword matching
 """
 
-from typing import List, Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple, TypeVar
 from loguru import logger
 import time
 import numpy as np
@@ -12,9 +13,21 @@ from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
 
 from rag_system.shared.config import RagSystemConfig
+from rag_system.offline.adaptive_batching import TokenCounter
 from rag_system.offline.document_store import DocumentStore
 from rag_system.offline.embeddings import EmbeddingGenerator
+from rag_system.offline.lexical_index import reciprocal_rank_fusion
 from rag_system.offline.vector_store import VectorStore
+from rag_system.online.context_packer import ContextPacker
+from rag_system.online.diversification import maximal_marginal_relevance
+from rag_system.online.domain_references import DomainReferences
+from rag_system.online.faq_store import FAQRefresher, FAQStore
+from rag_system.online.query_cache import QueryEmbeddingCache, get_query_cache
+from rag_system.online.question_log import QuestionLog
+from rag_system.online.semantic_cache import SemanticAnswerCache
+from rag_system.online.topic_classifier import TOPIC_CLASSIFIER_FILE, TieredTopicClassifier, TopicClassifier
+
+T = TypeVar("T")
 
 
 class CareerCounselingAgent:
@@ -23,6 +36,10 @@ class CareerCounselingAgent:
     instead of keyword-based domain detection
     """
 
+    GENERATION_ERROR_RESPONSE = "Xin lỗi, tôi gặp lỗi kỹ thuật. Vui lòng thử lại sau."
+    EMPTY_QUESTION_RESPONSE = "Bạn chưa đặt câu hỏi. Hãy hỏi tôi về các vấn đề liên quan đến nghề nghiệp nhé!"
+    OFF_TOPIC_RESPONSE = "Tôi chuyên tư vấn về các vấn đề liên quan đến nghề nghiệp, học tập và định hướng tương lai. Bạn có thể đặt câu hỏi khác liên quan đến những chủ đề này không?"
+
     def __init__(self, config: RagSystemConfig):
         """
         Initialize Enhanced Career Counseling Agent
@@ -35,6 +52,54 @@ class CareerCounselingAgent:
         self.document_store = None
         self.embedding_generator = None
         self.vector_store = None
+        self.query_cache: Optional[QueryEmbeddingCache] = (
+            get_query_cache(config) if config.query_cache_enabled else None
+        )
+        # Short relevance-scoring stages and the LLM topic checks, which take
+        # seconds, get separate pools so checks never queue ahead of scoring
+        self.stage_executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=config.stage_workers, thread_name_prefix="agent-stage")
+            if config.parallel_stages_enabled else None
+        )
+        self.topic_check_executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=config.topic_check_workers, thread_name_prefix="agent-topic-check")
+            if config.parallel_stages_enabled else None
+        )
+        self.answer_cache: Optional[SemanticAnswerCache] = (
+            SemanticAnswerCache(
+                dimension=config.embedding_dimension,
+                max_entries=config.semantic_cache_max_entries,
+                threshold=config.semantic_cache_threshold,
+                ttl_seconds=config.semantic_cache_ttl_seconds,
+                min_context_overlap=config.semantic_cache_min_context_overlap
+            )
+            if config.semantic_cache_enabled else None
+        )
+        self.context_packer: Optional[ContextPacker] = (
+            ContextPacker(TokenCounter(config.openai_model_name), config.context_min_fragment_tokens)
+            if config.context_packing_enabled else None
+        )
+        self.question_log: Optional[QuestionLog] = (
+            QuestionLog(config.question_log_path, config.question_log_max_bytes, config.question_log_backups)
+            if config.question_log_enabled else None
+        )
+        self.faq_store: Optional[FAQStore] = None
+        self.topic_classifier: Optional[TieredTopicClassifier] = (
+            TieredTopicClassifier(
+                TopicClassifier.load(config.index_dir / TOPIC_CLASSIFIER_FILE, config.embedding_model_name),
+                max_entries=config.topic_verdict_cache_max_entries,
+                verdict_log=(
+                    QuestionLog(
+                        config.topic_verdict_log_path,
+                        config.topic_verdict_log_max_bytes,
+                        config.topic_verdict_log_backups
+                    )
+                    if config.topic_verdict_log_enabled else None
+                )
+            )
+            if config.topic_classifier_enabled else None
+        )
+        self.faq_refresher: Optional[FAQRefresher] = None
         
         # Thresholds for semantic filtering
         self.relevance_threshold = 0.6  # Minimum similarity score for relevance
@@ -43,21 +108,27 @@ class CareerCounselingAgent:
         self._initialize_components()
         self._setup_prompt_templates()
         self._initialize_domain_references()
+        self._initialize_faq_store()
 
     def _initialize_components(self) -> None:
         """Initialize RAG components"""
         try:
             # Initialize LLM
+            extra = {"openai_api_base": self.config.openai_api_base} if self.config.openai_api_base else {}
             self.llm = ChatOpenAI(
                 model=self.config.openai_model_name,
                 temperature=self.config.temperature,
-                openai_api_key=self.config.openai_api_key
+                openai_api_key=self.config.openai_api_key,
+                **extra
             )
             
             # Initialize RAG components
             self.document_store = DocumentStore(self.config)
-            self.embedding_generator = EmbeddingGenerator(self.config)
+            # Questions are cached in the in-memory query LRU, not the on-disk cache
+            self.embedding_generator = EmbeddingGenerator(self.config, use_cache=False)
             self.vector_store = VectorStore(self.config)
+            if self.config.hybrid_search_enabled:
+                self.vector_store.load_lexical_index()
             
             logger.success("✅ Enhanced career counseling agent initialized")
             
@@ -109,16 +180,52 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             "Học bằng cấp 2 có thể làm nghề gì?",
         ]
         
-        # Pre-compute embeddings for reference questions
+        # Load saved reference embeddings; only questions missing from the
+        # file are embedded, in one batch call
+        self.domain_references = DomainReferences(
+            self.config.index_dir / "domain_references.npz",
+            model_name=self.config.embedding_model_name
+        )
         try:
-            self.reference_embeddings = []
-            for question in self.career_reference_questions:
-                embedding = self.embedding_generator.generate_single(question)
-                self.reference_embeddings.append(embedding)
-            logger.info(f"✅ Computed {len(self.reference_embeddings)} reference embeddings")
+            self.domain_references.add(self.career_reference_questions, self.embedding_generator.generate_batch)
         except Exception as e:
             logger.warning(f"⚠️ Failed to compute reference embeddings: {str(e)}")
-            self.reference_embeddings = []
+        # References added at runtime are persisted along with the defaults
+        self.career_reference_questions = list(self.domain_references.questions) or self.career_reference_questions
+
+    def _initialize_faq_store(self) -> None:
+        """Load the precomputed FAQ answers"""
+        if not self.config.faq_enabled:
+            return
+        try:
+            database = self.vector_store.client[self.config.mongodb_database_name]
+            self.faq_store = FAQStore(
+                database[self.config.mongodb_faq_collection_name],
+                dimension=self.config.embedding_dimension,
+                threshold=self.config.faq_match_threshold,
+                max_age_seconds=self.config.faq_max_age_seconds
+            )
+            logger.info(f"📚 {len(self.faq_store)} precomputed FAQ answers")
+        except Exception as e:
+            logger.warning(f"⚠️ FAQ answers unavailable: {str(e)}")
+
+    def start_faq_refresher(self) -> Optional[FAQRefresher]:
+        """
+        Regenerate stale FAQ answers in a background thread (long-running servers)
+        
+        Returns:
+            The running refresher, None without an FAQ store
+        """
+        if self.faq_store is None or self.faq_refresher is not None:
+            return self.faq_refresher
+        self.faq_refresher = FAQRefresher(
+            self.faq_store,
+            answer=self.precompute_answer,
+            index_version=self.current_index_version,
+            interval_seconds=self.config.faq_refresh_interval_seconds,
+            lease_seconds=self.config.faq_refresh_lease_seconds
+        ).start()
+        return self.faq_refresher
 
     def is_greeting(self, question: str) -> bool:
         """Check if the question is a greeting"""
@@ -131,35 +238,55 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
         question_lower = question.lower().strip()
         return any(greeting in question_lower for greeting in greetings)
 
-    def compute_semantic_relevance(self, question: str) -> float:
+    @property
+    def index_version(self) -> Optional[str]:
+        """Version of the index answers are retrieved from, None when unknown (see ``VectorStore.index_version``)"""
+        return self.vector_store.index_version
+
+    def current_index_version(self) -> Optional[str]:
+        """Index version after checking for a newer build, for callers that don't search (the FAQ refresher)"""
+        self.vector_store.refresh_if_due()
+        return self.index_version
+
+    def use_answer_cache(self, question_embedding: Optional[List[float]]) -> bool:
+        """Whether the semantic answer cache applies; bypassed while the index version is unknown"""
+        return self.answer_cache is not None and question_embedding is not None and self.index_version is not None
+
+    def embed_question(self, question: str) -> List[float]:
+        """
+        Embed a user question, through the process-wide query cache when enabled
+        
+        Args:
+            question: User's question
+            
+        Returns:
+            Question embedding
+        """
+        if self.query_cache is None:
+            return self.embedding_generator.generate_single(question)
+        return self.query_cache.get_or_compute(question, self.embedding_generator.generate_single)
+
+    def compute_semantic_relevance(self, question: str, question_embedding: Optional[List[float]] = None) -> float:
         """
         Compute semantic relevance to career domain using reference questions
         
         Args:
             question: User's question
+            question_embedding: Embedding of the question, computed when omitted
             
         Returns:
             float: Relevance score (0-1)
         """
-        if not self.reference_embeddings:
+        if len(self.domain_references) == 0:
             logger.warning("⚠️ No reference embeddings available, using fallback")
             return 0.5  # Neutral score if no references
         
         try:
-            # Generate embedding for user question
-            question_embedding = self.embedding_generator.generate_single(question)
-            
-            # Compute similarity with reference questions
-            similarities = []
-            for ref_embedding in self.reference_embeddings:
-                # Cosine similarity
-                similarity = np.dot(question_embedding, ref_embedding) / (
-                    np.linalg.norm(question_embedding) * np.linalg.norm(ref_embedding)
-                )
-                similarities.append(similarity)
+            if question_embedding is None:
+                question_embedding = self.embed_question(question)
             
-            # Return maximum similarity
-            max_similarity = max(similarities)
+            # Maximum cosine similarity to the reference questions
+            max_similarity = self.domain_references.max_similarity(question_embedding)
             logger.info(f"🎯 Semantic relevance score: {max_similarity:.3f}")
             return max_similarity
             
@@ -167,56 +294,253 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             logger.warning(f"⚠️ Semantic relevance computation failed: {str(e)}")
             return 0.5
 
-    def retrieve_context_with_confidence(self, question: str, max_results: int = 5) -> tuple[List[Dict[str, Any]], float]:
+    def retrieve_context_with_confidence(
+        self,
+        question: str,
+        max_results: int = 5,
+        question_embedding: Optional[List[float]] = None
+    ) -> tuple[List[Dict[str, Any]], float]:
         """
         Retrieve relevant context and compute confidence score
         
+        When a BM25 index is loaded, vector and lexical rankings are fused
+        with reciprocal rank fusion; confidence stays on the cosine scale.
+        Child chunks of the "parent" strategy are over-fetched and collapsed
+        so each parent appears once, then MMR picks a diverse subset of the
+        top ``mmr_fetch_k`` candidates.
+        
+        Args:
+            question: User's question
+            max_results: Number of documents to return
+            question_embedding: Embedding of the question, computed when omitted
+        
         Returns:
             tuple: (documents, max_confidence_score)
         """
         try:
-            # Generate embedding for question
-            question_embedding = self.embedding_generator.generate_single(question)
+            if question_embedding is None:
+                question_embedding = self.embed_question(question)
             
             # Search for similar documents
+            # MMR reuses the embeddings of Atlas results instead of re-reading them
             similar_docs = self.vector_store.search_similar(
                 query_embedding=question_embedding,
-                k=max_results
+                k=self.retrieval_fetch_k(max_results),
+                with_embeddings=self.config.mmr_enabled
             )
-            
-            # Compute confidence from similarity scores
-            if similar_docs:
-                scores = [doc.get('similarity_score', 0) for doc in similar_docs]
-                max_confidence = max(scores) if scores else 0
-            else:
-                max_confidence = 0
-            
-            logger.info(f"🔍 Retrieved {len(similar_docs)} docs, max confidence: {max_confidence:.3f}")
-            return similar_docs, max_confidence
+            return self.rank_candidates(question, question_embedding, similar_docs, max_results)
             
         except Exception as e:
             logger.warning(f"⚠️ Context retrieval failed: {str(e)}")
             return [], 0.0
 
+    def candidate_counts(self, max_results: int) -> Tuple[int, int]:
+        """
+        Candidate list sizes of the ranking steps
+        
+        Returns:
+            (candidates left for MMR after parent collapse, chunks kept before the collapse)
+        """
+        mmr = self.config.mmr_enabled
+        candidates = max(max_results, self.config.mmr_fetch_k) if mmr else max_results
+        collapse = self.config.parent_collapse_enabled
+        keep = candidates * max(self.config.parent_fetch_multiplier, 1) if collapse else candidates
+        return candidates, keep
+
+    def retrieval_fetch_k(self, max_results: int) -> int:
+        """Vector hits to fetch so fusion, parent collapse and MMR still leave ``max_results``"""
+        _, keep = self.candidate_counts(max_results)
+        hybrid = self.vector_store.lexical_index is not None
+        return max(keep, self.config.hybrid_fetch_k) if hybrid else keep
+
+    def rank_candidates(
+        self,
+        question: str,
+        question_embedding: List[float],
+        similar_docs: List[Dict[str, Any]],
+        max_results: int = 5
+    ) -> tuple[List[Dict[str, Any]], float]:
+        """
+        Turn vector search hits into the final context documents
+        
+        Fuses with BM25, collapses parents and applies MMR as configured.
+        MongoDB is only read for chunks found by BM25 alone, parent texts and
+        embeddings missing from the local index.
+        
+        Args:
+            question: User's question
+            question_embedding: Embedding of the question
+            similar_docs: Vector search results (``retrieval_fetch_k`` of them), best first
+            max_results: Number of documents to return
+            
+        Returns:
+            tuple: (documents, max_confidence_score)
+        """
+        candidates, keep = self.candidate_counts(max_results)
+        
+        # Compute confidence from similarity scores
+        if similar_docs:
+            scores = [doc.get('similarity_score', 0) for doc in similar_docs]
+            max_confidence = max(scores) if scores else 0
+        else:
+            max_confidence = 0
+        
+        if self.vector_store.lexical_index is not None:
+            similar_docs = self.fuse_lexical_results(question, question_embedding, similar_docs, keep)
+        else:
+            similar_docs = similar_docs[:keep]
+        
+        if self.config.parent_collapse_enabled:
+            similar_docs = self.vector_store.collapse_parents(similar_docs, candidates)
+        
+        if self.config.mmr_enabled:
+            similar_docs = self.diversify(similar_docs, max_results)
+        else:
+            similar_docs = similar_docs[:max_results]
+        
+        logger.info(f"🔍 Retrieved {len(similar_docs)} docs, max confidence: {max_confidence:.3f}")
+        return similar_docs, max_confidence
+
+    def fuse_lexical_results(
+        self,
+        question: str,
+        question_embedding: List[float],
+        vector_docs: List[Dict[str, Any]],
+        max_results: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse vector results with BM25 results using reciprocal rank fusion
+        
+        Args:
+            question: User's question
+            question_embedding: Embedding of the question
+            vector_docs: Vector search results, best first
+            max_results: Number of documents to keep
+            
+        Returns:
+            Fused documents with ``fusion_score`` and ``lexical_score``
+        """
+        lexical_hits = self.vector_store.search_lexical(question, k=self.config.hybrid_fetch_k)
+        if not lexical_hits:
+            return vector_docs[:max_results]
+        
+        fused = reciprocal_rank_fusion(
+            [[doc["_id"] for doc in vector_docs], [chunk_id for chunk_id, _ in lexical_hits]],
+            k=self.config.rrf_k
+        )[:max_results]
+        
+        # Fetch chunks only BM25 found in one round trip
+        docs_by_id = {doc["_id"]: doc for doc in vector_docs}
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in docs_by_id]
+        if missing:
+            for doc in self.vector_store.get_chunks_by_ids(missing, question_embedding):
+                docs_by_id[doc["_id"]] = doc
+        
+        lexical_scores = dict(lexical_hits)
+        results = []
+        for chunk_id, fusion_score in fused:
+            doc = docs_by_id.get(chunk_id)
+            if doc is None:
+                continue
+            doc["fusion_score"] = fusion_score
+            doc["lexical_score"] = lexical_scores.get(chunk_id, 0.0)
+            results.append(doc)
+        
+        logger.debug(f"🔀 Fused {len(vector_docs)} vector and {len(lexical_hits)} BM25 results")
+        return results
+
+    def diversify(
+        self,
+        docs: List[Dict[str, Any]],
+        max_results: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Re-rank candidates with Maximal Marginal Relevance
+        
+        Relevance is the upstream score (fused when hybrid retrieval ran,
+        cosine otherwise) rescaled to [0, 1], so MMR keeps the existing order
+        unless a candidate is redundant with one already selected.
+        
+        Args:
+            docs: Candidate documents, best first
+            max_results: Number of documents to keep
+            
+        Returns:
+            Selected documents in MMR order
+        """
+        if len(docs) <= 1:
+            # Embeddings Atlas returned are not part of the results
+            for doc in docs:
+                doc.pop("embedding", None)
+            return docs[:max_results]
+        
+        start_time = time.perf_counter()
+        vectors = self.vector_store.embeddings_for(docs)
+        relevance = np.array(
+            [doc.get("fusion_score", doc.get("similarity_score", 0.0)) for doc in docs],
+            dtype=np.float32
+        )
+        spread = relevance.max() - relevance.min()
+        relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+        
+        selected = maximal_marginal_relevance(relevance, vectors, max_results, self.config.mmr_lambda)
+        
+        logger.debug(
+            f"🎯 MMR selected {len(selected)}/{len(docs)} candidates "
+            f"in {(time.perf_counter() - start_time) * 1000:.2f}ms"
+        )
+        return [docs[position] for position in selected]
+
     def format_context(self, documents: List[Dict[str, Any]], confidence: float) -> str:
         """Format retrieved documents into context string"""
         if not documents:
             return "Không tìm thấy tài liệu liên quan trong cơ sở dữ liệu."
         
+        if self.context_packer is not None:
+            token_budget = self.context_token_budget(confidence)
+            packed = self.context_packer.pack(documents, token_budget)
+            logger.debug(
+                f"📦 Packed {packed['documents']}/{len(documents)} docs into "
+                f"{packed['tokens']}/{token_budget} tokens{' (last trimmed)' if packed['trimmed'] else ''}"
+            )
+            return packed["context"]
+        
         context_parts = []
         for i, doc in enumerate(documents, 1):
-            content = doc.get("content", "")
-            score = doc.get("similarity_score", 0)
+            score = doc.get("similarity_score")
             
-            # Limit content length
-            if len(content) > 500:
-                content = content[:500] + "..."
+            # Collapsed parents are sent whole, they are bounded by the parent chunk size
+            content = doc.get("parent_content")
+            if content is None:
+                content = doc.get("content", "")
+                # Limit content length
+                if len(content) > 500:
+                    content = content[:500] + "..."
             
             source = doc.get("metadata", {}).get("title", f"Tài liệu {i}")
-            context_parts.append(f"[{source}] (độ liên quan: {score:.2f})\n{content}")
+            relevance = f" (độ liên quan: {score:.2f})" if score is not None else ""
+            context_parts.append(f"[{source}]{relevance}\n{content}")
         
         return "\n\n".join(context_parts)
 
+    def context_token_budget(self, confidence: float) -> int:
+        """
+        Tokens of retrieved context to send at a retrieval confidence
+
+        Linear from ``context_min_tokens`` at the relevance threshold (and
+        below) to ``context_max_tokens`` at the high-confidence threshold.
+
+        Args:
+            confidence: Retrieval confidence score
+
+        Returns:
+            Token budget for the context
+        """
+        low, high = self.config.context_min_tokens, self.config.context_max_tokens
+        span = self.high_confidence_threshold - self.relevance_threshold
+        fraction = min(max((confidence - self.relevance_threshold) / span, 0.0), 1.0)
+        return int(low + fraction * (high - low))
+
     def get_confidence_level_text(self, confidence: float) -> str:
         """Convert confidence score to descriptive text"""
         if confidence >= self.high_confidence_threshold:
@@ -226,28 +550,32 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
         else:
             return "thấp"
 
+    def build_messages(self, question: str, context: str, confidence: float) -> List[Any]:
+        """Chat messages for answering a question from its context"""
+        confidence_level = self.get_confidence_level_text(confidence)
+        
+        if confidence >= self.relevance_threshold:
+            # Use context-based template
+            formatted_prompt = self.answer_template.format(
+                context=context,
+                question=question,
+                confidence_level=confidence_level
+            )
+        else:
+            # Use insufficient context template
+            formatted_prompt = self.insufficient_context_template.format(
+                question=question
+            )
+        
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content=formatted_prompt)
+        ]
+
     def generate_response(self, question: str, context: str, confidence: float) -> str:
         """Generate response using LLM with context and confidence"""
         try:
-            confidence_level = self.get_confidence_level_text(confidence)
-            
-            if confidence >= self.relevance_threshold:
-                # Use context-based template
-                formatted_prompt = self.answer_template.format(
-                    context=context,
-                    question=question,
-                    confidence_level=confidence_level
-                )
-            else:
-                # Use insufficient context template
-                formatted_prompt = self.insufficient_context_template.format(
-                    question=question
-                )
-            
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=formatted_prompt)
-            ]
+            messages = self.build_messages(question, context, confidence)
             
             # Generate response
             start_time = time.time()
@@ -259,21 +587,54 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             
         except Exception as e:
             logger.error(f"❌ Response generation failed: {str(e)}")
-            return "Xin lỗi, tôi gặp lỗi kỹ thuật. Vui lòng thử lại sau."
+            return self.GENERATION_ERROR_RESPONSE
 
-    def check_topic_relevance_with_llm(self, question: str) -> bool:
+    def stream_response(self, question: str, context: str, confidence: float) -> Iterator[str]:
         """
-        Use LLM to check if question is career-related (fallback method)
+        Generate a response like ``generate_response``, yielding text as the LLM produces it
+        
+        A failure yields ``GENERATION_ERROR_RESPONSE`` as the last piece, after
+        whatever text was already produced.
+        
+        Args:
+            question: User question
+            context: Formatted retrieval context
+            confidence: Combined confidence of the answer
+            
+        Yields:
+            Pieces of the response text
         """
+        start_time = time.time()
+        first_token_time = None
         try:
-            formatted_prompt = self.off_topic_check_template.format(question=question)
+            messages = self.build_messages(question, context, confidence)
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    if first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    yield chunk.content
             
-            messages = [
-                SystemMessage(content="Bạn là chuyên gia phân loại câu hỏi."),
-                HumanMessage(content=formatted_prompt)
-            ]
+            logger.success(
+                f"✅ Streamed response in {time.time() - start_time:.2f}s "
+                f"(first token {first_token_time or 0:.2f}s)"
+            )
             
-            response = self.llm.invoke(messages)
+        except Exception as e:
+            logger.error(f"❌ Response streaming failed: {str(e)}")
+            yield self.GENERATION_ERROR_RESPONSE
+
+    def topic_check_messages(self, question: str) -> List[Any]:
+        """Chat messages asking the LLM whether a question is career-related"""
+        formatted_prompt = self.off_topic_check_template.format(question=question)
+        return [
+            SystemMessage(content="Bạn là chuyên gia phân loại câu hỏi."),
+            HumanMessage(content=formatted_prompt)
+        ]
+
+    def llm_topic_verdict(self, question: str) -> Optional[bool]:
+        """LLM judgement of whether a question is career-related, None if the call failed"""
+        try:
+            response = self.llm.invoke(self.topic_check_messages(question))
             response_text = response.content.strip().upper()
             
             is_relevant = "CÓ" in response_text
@@ -282,7 +643,56 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             
         except Exception as e:
             logger.warning(f"⚠️ LLM topic check failed: {str(e)}")
-            return True  # Default to allowing the question
+            return None
+
+    def check_topic_relevance_with_llm(self, question: str) -> bool:
+        """
+        Use LLM to check if question is career-related (fallback method)
+        """
+        verdict = self.llm_topic_verdict(question)
+        return True if verdict is None else verdict  # Default to allowing the question
+
+    def check_topic_relevance(self, question: str, question_embedding: Optional[List[float]] = None) -> bool:
+        """
+        Check if a question is career-related, calling the LLM only when needed
+        
+        A cached LLM verdict for the same normalised question or a confident
+        embedding classifier decides without a round trip; otherwise the LLM
+        decides and its verdict is cached and logged for training.
+        
+        Args:
+            question: User's question
+            question_embedding: Embedding of the question, if computed
+            
+        Returns:
+            True if the question is career-related
+        """
+        decided = self.quick_topic_verdict(question, question_embedding)
+        if decided is not None:
+            return decided
+        return self.confirm_topic_with_llm(question)
+
+    def confirm_topic_with_llm(self, question: str) -> bool:
+        """LLM tier of ``check_topic_relevance``: the verdict is cached and logged for training"""
+        if self.topic_classifier is None:
+            return self.check_topic_relevance_with_llm(question)
+        
+        start_time = time.time()
+        verdict = self.llm_topic_verdict(question)
+        if verdict is None:
+            return True  # Default to allowing the question, and do not cache the failure
+        self.topic_classifier.record_llm_verdict(question, verdict, time.time() - start_time)
+        return verdict
+
+    def quick_topic_verdict(self, question: str, question_embedding: Optional[List[float]]) -> Optional[bool]:
+        """Topic verdict of the cached-verdict and classifier tiers, None when the LLM has to decide"""
+        if self.topic_classifier is None:
+            return None
+        decided = self.topic_classifier.precheck(question, question_embedding)
+        if decided is None:
+            return None
+        logger.info(f"🏷️ Topic check ({decided[1]}): {decided[0]}")
+        return decided[0]
 
     def handle_greeting(self, question: str) -> str:
         """Handle greeting messages"""
@@ -301,23 +711,151 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
         else:
             return greetings_responses[0]
 
-    def answer_question(self, question: str) -> Dict[str, Any]:
+    @staticmethod
+    def _timed(timings: Dict[str, float], stage: str, function: Callable[..., T], *args, **kwargs) -> T:
+        """Run one answer stage and record its wall time in seconds"""
+        stage_start = time.time()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[stage] = round(time.time() - stage_start, 4)
+
+    def _relevance_stage(
+        self,
+        question: str,
+        question_embedding: Optional[List[float]],
+        timings: Dict[str, float]
+    ) -> Tuple[float, Optional[bool], Optional[Future]]:
         """
-        Main method to answer career counseling questions using semantic approach
+        Score domain relevance and start the topic check it calls for
+        
+        Combined confidence can only end up below the off-topic threshold if
+        semantic relevance already is, so below it the check starts before
+        retrieval says whether it is needed: the cheap tiers here, the LLM
+        speculatively in ``topic_check_executor`` when they cannot decide.
+        
+        Returns:
+            (semantic relevance, cheap-tier verdict or None, LLM check future or None)
+        """
+        semantic_relevance = self._timed(
+            timings, "relevance", self.compute_semantic_relevance, question, question_embedding
+        )
+        if not self.is_low_confidence(semantic_relevance):
+            return semantic_relevance, None, None
+        
+        topic_verdict = self._timed(
+            timings, "topic_precheck", self.quick_topic_verdict, question, question_embedding
+        )
+        if topic_verdict is not None:
+            return semantic_relevance, topic_verdict, None
+        topic_check = self.topic_check_executor.submit(
+            self._timed, timings, "topic_check", self.confirm_topic_with_llm, question
+        )
+        return semantic_relevance, None, topic_check
+
+    def _prepare_answer(
+        self,
+        question: str,
+        start_time: float,
+        timings: Dict[str, float],
+        use_caches: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Run every answer stage that comes before generation
         
         Args:
-            question: User's question
+            question: Trimmed user question
+            start_time: When processing of the question started
+            timings: Stage wall times, filled in place
+            use_caches: Serve precomputed FAQ and semantically cached answers
             
         Returns:
-            Dict with response and metadata
+            Dict with the final ``result`` when nothing has to be generated
+            (empty question, greeting, off-topic, FAQ answer); otherwise the
+            generation inputs, the cached answer (or None) and the result
+            ``metadata``
         """
-        start_time = time.time()
+        early = self.early_result(question, start_time)
+        if early is not None:
+            return {"result": early}
         
-        # Trim and clean question
-        question = question.strip()
+        # Embed the question once for both retrieval and domain relevance
+        try:
+            question_embedding = self._timed(timings, "embedding", self.embed_question, question)
+        except Exception as e:
+            logger.warning(f"⚠️ Question embedding failed: {str(e)}")
+            question_embedding = None
+        
+        # Frequent questions have a precomputed answer: skip every later stage
+        if use_caches:
+            faq = self.faq_result(question_embedding, start_time, timings)
+            if faq is not None:
+                return {"result": faq}
+        
+        if self.stage_executor is not None:
+            # Relevance is scored in the pool while retrieval runs on this thread
+            relevance = self.stage_executor.submit(self._relevance_stage, question, question_embedding, timings)
+            relevant_docs, retrieval_confidence = self._timed(
+                timings, "retrieval", self.retrieve_context_with_confidence,
+                question, question_embedding=question_embedding
+            )
+            semantic_relevance, topic_verdict, topic_check = relevance.result()
+        else:
+            # Always retrieve context first
+            relevant_docs, retrieval_confidence = self._timed(
+                timings, "retrieval", self.retrieve_context_with_confidence,
+                question, question_embedding=question_embedding
+            )
+            
+            # Compute semantic relevance to career domain
+            semantic_relevance = self._timed(
+                timings, "relevance", self.compute_semantic_relevance, question, question_embedding
+            )
+            topic_verdict, topic_check = None, None
+        
+        # Combine retrieval confidence and semantic relevance
+        combined_confidence = max(retrieval_confidence, semantic_relevance)
+        speculative = topic_check is not None
+        
+        # Decision logic based on confidence scores
+        if self.is_low_confidence(combined_confidence):
+            # Very low confidence - likely off-topic
+            if topic_check is not None:
+                is_relevant = topic_check.result()
+            elif topic_verdict is not None:
+                is_relevant = topic_verdict
+            else:
+                is_relevant = self._timed(
+                    timings, "topic_precheck", self.quick_topic_verdict, question, question_embedding
+                )
+                if is_relevant is None:
+                    # Use LLM as final check
+                    is_relevant = self._timed(timings, "topic_check", self.confirm_topic_with_llm, question)
+            
+            if not is_relevant:
+                return {"result": self.off_topic_result(
+                    semantic_relevance, retrieval_confidence, speculative, start_time, timings
+                )}
+        elif topic_check is not None:
+            # Speculation not needed. Best effort: cancel() only drops a check
+            # still queued; one already running finishes in the background
+            # (its LLM verdict is still cached) and its result is ignored
+            topic_check.cancel()
+        
+        return self.answer_inputs(
+            question_embedding, relevant_docs, semantic_relevance, retrieval_confidence,
+            speculative, timings, use_caches
+        )
+
+    # The helpers below hold every decision of the answer flow; the synchronous
+    # ``_prepare_answer`` and ``AsyncCareerAgent`` only differ in how they wait
+    # for the stages in between
+
+    def early_result(self, question: str, start_time: float) -> Optional[Dict[str, Any]]:
+        """Result of a question answered before any stage runs (empty or greeting), else None"""
         if not question:
             return {
-                "response": "Bạn chưa đặt câu hỏi. Hãy hỏi tôi về các vấn đề liên quan đến nghề nghiệp nhé!",
+                "response": self.EMPTY_QUESTION_RESPONSE,
                 "type": "empty_question",
                 "processing_time": 0
             }
@@ -326,41 +864,142 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
         
         # Handle greetings
         if self.is_greeting(question):
-            response = self.handle_greeting(question)
             return {
-                "response": response,
+                "response": self.handle_greeting(question),
                 "type": "greeting",
                 "processing_time": time.time() - start_time
             }
+        return None
+
+    def is_low_confidence(self, confidence: float) -> bool:
+        """Whether a confidence is low enough for the topic check (and speculating on it)"""
+        return confidence < self.config.off_topic_confidence_threshold
+
+    def off_topic_result(
+        self,
+        semantic_relevance: float,
+        retrieval_confidence: float,
+        speculative: bool,
+        start_time: float,
+        timings: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """Result of a question the topic check rejected"""
+        return {
+            "response": self.OFF_TOPIC_RESPONSE,
+            "type": "off_topic",
+            "semantic_relevance": semantic_relevance,
+            "retrieval_confidence": retrieval_confidence,
+            "processing_time": time.time() - start_time,
+            "stage_timings": dict(timings),
+            "speculative_topic_check": speculative
+        }
+
+    def answer_inputs(
+        self,
+        question_embedding: Optional[List[float]],
+        relevant_docs: List[Dict[str, Any]],
+        semantic_relevance: float,
+        retrieval_confidence: float,
+        speculative: bool,
+        timings: Dict[str, float],
+        use_caches: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Generation inputs of an on-topic question
         
-        # Always retrieve context first
-        relevant_docs, retrieval_confidence = self.retrieve_context_with_confidence(question)
-        
-        # Compute semantic relevance to career domain
-        semantic_relevance = self.compute_semantic_relevance(question)
+        Formats the context and looks for the answer to an equivalent question.
         
-        # Combine retrieval confidence and semantic relevance
+        Returns:
+            Dict with the ``context``, ``combined_confidence``, chunk
+            ``fingerprint``, the ``cached`` answer (or None), the result
+            ``metadata`` and the ``question_embedding``
+        """
         combined_confidence = max(retrieval_confidence, semantic_relevance)
+        context = self._timed(timings, "format_context", self.format_context, relevant_docs, retrieval_confidence)
         
-        # Decision logic based on confidence scores
-        if combined_confidence < 0.3:
-            # Very low confidence - likely off-topic
-            # Use LLM as final check
-            if not self.check_topic_relevance_with_llm(question):
-                return {
-                    "response": "Tôi chuyên tư vấn về các vấn đề liên quan đến nghề nghiệp, học tập và định hướng tương lai. Bạn có thể đặt câu hỏi khác liên quan đến những chủ đề này không?",
-                    "type": "off_topic",
-                    "semantic_relevance": semantic_relevance,
-                    "retrieval_confidence": retrieval_confidence,
-                    "processing_time": time.time() - start_time
-                }
-        
-        # Format context and generate response
-        context = self.format_context(relevant_docs, retrieval_confidence)
-        response = self.generate_response(question, context, combined_confidence)
-        
-        processing_time = time.time() - start_time
+        # Look for the answer to an equivalent question
+        fingerprint = [str(doc.get("_id")) for doc in relevant_docs]
+        cached = None
+        if use_caches and self.use_answer_cache(question_embedding):
+            cached = self._timed(
+                timings, "answer_cache", self.answer_cache.lookup,
+                question_embedding, self.index_version, fingerprint
+            )
+            if cached is not None:
+                logger.info(f"💾 Semantic cache hit ({cached['similarity']:.3f}): {cached['question'][:80]}")
+        
+        metadata = self.answer_metadata(
+            relevant_docs, semantic_relevance, retrieval_confidence, combined_confidence, speculative, cached
+        )
+        
+        return {
+            "question_embedding": question_embedding,
+            "context": context,
+            "combined_confidence": combined_confidence,
+            "fingerprint": fingerprint,
+            "cached": cached,
+            "metadata": metadata
+        }
+
+    @staticmethod
+    def answer_result(
+        response: str,
+        prepared: Dict[str, Any],
+        start_time: float,
+        timings: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """Result of an answered question from its response and ``answer_inputs``"""
+        return {
+            "response": response,
+            **prepared["metadata"],
+            "processing_time": time.time() - start_time,
+            "stage_timings": dict(timings)
+        }
+
+    def faq_result(
+        self,
+        question_embedding: Optional[List[float]],
+        start_time: float,
+        timings: Dict[str, float]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Result built from the precomputed answer of the nearest FAQ question
         
+        Args:
+            question_embedding: Embedding of the question
+            start_time: When processing of the question started
+            timings: Stage wall times, filled in place
+            
+        Returns:
+            Result dict, None when no fresh FAQ entry is close enough
+        """
+        if self.faq_store is None or question_embedding is None:
+            return None
+        faq = self._timed(timings, "faq_lookup", self.faq_store.lookup, question_embedding, self.index_version)
+        if faq is None:
+            return None
+        
+        logger.info(f"📚 FAQ answer ({faq['similarity']:.3f}): {faq['question'][:80]}")
+        return {
+            "response": faq["response"],
+            **faq["metadata"],
+            "faq_hit": True,
+            "faq_question": faq["question"],
+            "faq_similarity": faq["similarity"],
+            "processing_time": time.time() - start_time,
+            "stage_timings": dict(timings)
+        }
+
+    def answer_metadata(
+        self,
+        relevant_docs: List[Dict[str, Any]],
+        semantic_relevance: float,
+        retrieval_confidence: float,
+        combined_confidence: float,
+        speculative: bool,
+        cached: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Result fields of an answered question, everything but the response and timings"""
         # Determine response type based on confidence
         if combined_confidence >= self.high_confidence_threshold:
             response_type = "high_confidence_advice"
@@ -369,19 +1008,179 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
         else:
             response_type = "general_advice"
         
-        result = {
-            "response": response,
+        metadata = {
             "type": response_type,
             "context_docs": len(relevant_docs),
             "semantic_relevance": semantic_relevance,
             "retrieval_confidence": retrieval_confidence,
             "combined_confidence": combined_confidence,
-            "processing_time": processing_time
+            "speculative_topic_check": speculative,
+            "cache_hit": cached is not None,
+            "faq_hit": False
         }
+        if cached is not None:
+            metadata["cached_question"] = cached["question"]
+            metadata["cache_similarity"] = cached["similarity"]
+        return metadata
+
+    def store_answer(
+        self,
+        question: str,
+        question_embedding: Optional[List[float]],
+        response: str,
+        fingerprint: List[str],
+        generation_time: float
+    ) -> None:
+        """Cache a generated answer unless generation failed"""
+        if self.use_answer_cache(question_embedding) and self.GENERATION_ERROR_RESPONSE not in response:
+            self.answer_cache.store(
+                question, question_embedding, response, fingerprint, self.index_version, generation_time
+            )
+
+    def answer_question(self, question: str) -> Dict[str, Any]:
+        """
+        Main method to answer career counseling questions using semantic approach
+        
+        With ``parallel_stages_enabled``, retrieval runs concurrently with
+        domain-relevance scoring, and the LLM off-topic check starts
+        speculatively when relevance is borderline. Per-stage wall times are
+        returned in ``stage_timings``.
         
-        logger.success(f"✅ Question answered in {processing_time:.2f}s")
+        Args:
+            question: User's question
+            
+        Returns:
+            Dict with response and metadata
+        """
+        start_time = time.time()
+        timings: Dict[str, float] = {}
+        
+        # Trim and clean question
+        question = question.strip()
+        prepared = self._prepare_answer(question, start_time, timings)
+        if "result" in prepared:
+            self.log_question(question, prepared["result"])
+            return prepared["result"]
+        
+        # Generate response, or reuse the answer to an equivalent question
+        cached = prepared["cached"]
+        if cached is not None:
+            response = cached["response"]
+        else:
+            response = self._timed(
+                timings, "generation", self.generate_response,
+                question, prepared["context"], prepared["combined_confidence"]
+            )
+            self.store_answer(
+                question, prepared["question_embedding"], response, prepared["fingerprint"], timings["generation"]
+            )
+        
+        result = self.answer_result(response, prepared, start_time, timings)
+        
+        self.log_question(question, result)
+        logger.success(f"✅ Question answered in {result['processing_time']:.2f}s")
         return result
 
+    def answer_question_stream(self, question: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of ``answer_question``
+        
+        Yields events as dicts with ``event`` and ``data``: a ``metadata``
+        event as soon as retrieval and the cache lookup are done, ``token``
+        events with response text as the LLM produces it, and a ``done``
+        event with the same result dict ``answer_question`` returns (plus the
+        ``first_token`` timing). Responses that need no generation (greetings,
+        off-topic, cache hits) arrive as a single token event.
+        
+        Args:
+            question: User's question
+            
+        Yields:
+            Event dicts
+        """
+        start_time = time.time()
+        timings: Dict[str, float] = {}
+        
+        question = question.strip()
+        prepared = self._prepare_answer(question, start_time, timings)
+        if "result" in prepared:
+            result = prepared["result"]
+            self.log_question(question, result)
+            yield {"event": "metadata", "data": {key: value for key, value in result.items() if key != "response"}}
+            yield {"event": "token", "data": result["response"]}
+            yield {"event": "done", "data": result}
+            return
+        
+        yield {"event": "metadata", "data": {**prepared["metadata"], "stage_timings": dict(timings)}}
+        
+        cached = prepared["cached"]
+        if cached is not None:
+            response = cached["response"]
+            yield {"event": "token", "data": response}
+        else:
+            generation_start = time.time()
+            pieces: List[str] = []
+            for piece in self.stream_response(question, prepared["context"], prepared["combined_confidence"]):
+                if not pieces:
+                    timings["first_token"] = round(time.time() - generation_start, 4)
+                pieces.append(piece)
+                yield {"event": "token", "data": piece}
+            timings["generation"] = round(time.time() - generation_start, 4)
+            response = "".join(pieces)
+            self.store_answer(
+                question, prepared["question_embedding"], response, prepared["fingerprint"], timings["generation"]
+            )
+        
+        result = self.answer_result(response, prepared, start_time, timings)
+        self.log_question(question, result)
+        yield {"event": "done", "data": result}
+        
+        logger.success(f"✅ Question streamed in {result['processing_time']:.2f}s")
+
+    def log_question(self, question: str, result: Dict[str, Any]) -> None:
+        """Record an answered question in the question log (empty questions are skipped)"""
+        if self.question_log is not None and question:
+            self.question_log.record(question, result)
+
+    def precompute_answer(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a question from scratch for the FAQ store, bypassing every answer cache
+        
+        Args:
+            question: FAQ question
+            
+        Returns:
+            ``FAQStore.upsert`` arguments, None when the question gets no
+            generated answer (greeting, off-topic, embedding failure)
+            
+        Raises:
+            RuntimeError: If generation failed
+        """
+        timings: Dict[str, float] = {}
+        question = question.strip()
+        # Version of the context retrieval is about to use: an index flip during
+        # generation must not tag an answer built from the old context as new
+        index_version = self.current_index_version()
+        prepared = self._prepare_answer(question, time.time(), timings, use_caches=False)
+        if "result" in prepared or prepared["question_embedding"] is None:
+            return None
+        
+        response = self._timed(
+            timings, "generation", self.generate_response,
+            question, prepared["context"], prepared["combined_confidence"]
+        )
+        if self.GENERATION_ERROR_RESPONSE in response:
+            raise RuntimeError("response generation failed")
+        
+        return {
+            "question": question,
+            "question_embedding": prepared["question_embedding"],
+            "response": response,
+            "metadata": prepared["metadata"],
+            "index_version": index_version,
+            "generation_time": timings["generation"]
+        }
+
     def update_domain_references(self, new_questions: List[str]) -> None:
         """
         Update domain reference questions for better semantic matching
@@ -390,13 +1189,9 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             new_questions: List of new reference questions
         """
         try:
-            self.career_reference_questions.extend(new_questions)
-            
-            # Recompute all embeddings
-            self.reference_embeddings = []
-            for question in self.career_reference_questions:
-                embedding = self.embedding_generator.generate_single(question)
-                self.reference_embeddings.append(embedding)
+            # Only questions not already referenced are embedded, in one batch
+            self.domain_references.add(new_questions, self.embedding_generator.generate_batch)
+            self.career_reference_questions = list(self.domain_references.questions)
             
             logger.success(f"✅ Updated domain references: {len(self.career_reference_questions)} questions")
             
@@ -420,5 +1215,13 @@ Trả lời chỉ "CÓ" hoặc "KHÔNG" và giải thích ngắn gọn."""
             "embedding_model": self.config.embedding_model_name,
             "relevance_threshold": self.relevance_threshold,
             "high_confidence_threshold": self.high_confidence_threshold,
-            "reference_questions": len(self.career_reference_questions)
+            "reference_questions": len(self.career_reference_questions),
+            "query_embedding_cache": self.query_cache.stats() if self.query_cache is not None else None,
+            "semantic_answer_cache": self.answer_cache.stats() if self.answer_cache is not None else None,
+            "mmr_embeddings_from_mongodb": self.vector_store.embedding_fallbacks,
+            "topic_check": self.topic_classifier.stats() if self.topic_classifier is not None else None,
+            "faq_answers": (
+                {**self.faq_store.stats(), **(self.faq_refresher.stats() if self.faq_refresher is not None else {})}
+                if self.faq_store is not None else None
+            )
         }
\ No newline at end of file
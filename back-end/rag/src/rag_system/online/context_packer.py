@@ -0,0 +1,137 @@
+"""
+Context Packer for RAG System
+Fills a prompt token budget with the best-scoring retrieved documents,
+trimming the last one at a sentence boundary
+"""
+
+import re
+from typing import List, Dict, Any, Tuple
+
+from rag_system.offline.adaptive_batching import TokenCounter
+
+# End of a sentence (., !, ?, … followed by whitespace) or a line break
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\s*\n+")
+_WORD_END = re.compile(r"\s+")
+
+
+def _longest_prefix(text: str, cuts: List[int], max_tokens: int, counter: TokenCounter) -> int:
+    """Largest cut position whose prefix fits in ``max_tokens`` (0 if none does)"""
+    best, low, high = 0, 0, len(cuts) - 1
+    # Prefix token counts grow with the cut, so binary search needs O(log n) counts
+    while low <= high:
+        middle = (low + high) // 2
+        if counter.count(text[:cuts[middle]]) <= max_tokens:
+            best, low = cuts[middle], middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def trim_to_tokens(text: str, max_tokens: int, counter: TokenCounter) -> str:
+    """
+    Longest run of whole sentences from the start of a text within a token budget
+
+    Falls back to whole words (marked with "...") when even the first sentence
+    is too long.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget
+        counter: Tokenizer of the chat model
+
+    Returns:
+        Trimmed text, empty if not even one word fits
+    """
+    if counter.count(text) <= max_tokens:
+        return text
+
+    cut = _longest_prefix(text, [match.start() for match in _SENTENCE_END.finditer(text)], max_tokens, counter)
+    if cut:
+        return text[:cut].rstrip()
+
+    # "..." costs a token of its own
+    cut = _longest_prefix(text, [match.start() for match in _WORD_END.finditer(text)], max_tokens - 1, counter)
+    return text[:cut].rstrip() + "..." if cut else ""
+
+
+class ContextPacker:
+    """
+    Greedy token-budgeted context builder
+    Documents are taken best score first while they fit whole. The first one
+    that does not fit is trimmed to the remaining budget at a sentence
+    boundary, if enough budget is left for a useful fragment, and packing
+    stops there. Token counts stored on the chunks at index time are used
+    when present, so usually only the trimmed document is tokenised.
+    """
+
+    def __init__(self, counter: TokenCounter, min_fragment_tokens: int = 64):
+        """
+        Initialize ContextPacker
+
+        Args:
+            counter: Tokenizer of the chat model
+            min_fragment_tokens: Smallest remaining budget worth a trimmed document
+        """
+        self.counter = counter
+        self.min_fragment_tokens = min_fragment_tokens
+
+    @staticmethod
+    def score(doc: Dict[str, Any]) -> float:
+        """Ranking score of a retrieved document (fused when hybrid retrieval ran)"""
+        return doc.get("fusion_score", doc.get("similarity_score", 0.0))
+
+    def document_text(self, doc: Dict[str, Any]) -> Tuple[str, int]:
+        """Text a document contributes (the whole parent for collapsed chunks) and its tokens"""
+        if doc.get("parent_content") is not None:
+            text, tokens = doc["parent_content"], doc.get("parent_token_count")
+        else:
+            text, tokens = doc.get("content", ""), doc.get("token_count")
+        return text, tokens if tokens is not None else self.counter.count(text)
+
+    def pack(self, documents: List[Dict[str, Any]], token_budget: int) -> Dict[str, Any]:
+        """
+        Format documents into a context within a token budget
+
+        Args:
+            documents: Retrieved documents
+            token_budget: Tokens the context may use
+
+        Returns:
+            Dict with the ``context`` string, the ``tokens`` it uses, the number
+            of ``documents`` included and whether the last one was ``trimmed``
+        """
+        parts: List[str] = []
+        used = 0
+        trimmed = False
+
+        ranked = sorted(enumerate(documents), key=lambda item: -self.score(item[1]))
+        for i, doc in ranked:
+            source = doc.get("metadata", {}).get("title", f"Tài liệu {i + 1}")
+            score = doc.get("similarity_score")
+            # BM25-only hits no local index holds have no vector score to show
+            relevance = f" (độ liên quan: {score:.2f})" if score is not None else ""
+            header = f"[{source}]{relevance}\n"
+            # Headers and the blank lines between documents count against the budget
+            overhead = self.counter.count(header) + (1 if parts else 0)
+            text, tokens = self.document_text(doc)
+
+            remaining = token_budget - used - overhead
+            if tokens <= remaining:
+                parts.append(header + text)
+                used += overhead + tokens
+                continue
+
+            if remaining >= self.min_fragment_tokens:
+                fragment = trim_to_tokens(text, remaining, self.counter)
+                if fragment:
+                    parts.append(header + fragment)
+                    used += overhead + self.counter.count(fragment)
+                    trimmed = True
+            break
+
+        return {
+            "context": "\n\n".join(parts),
+            "tokens": used,
+            "documents": len(parts),
+            "trimmed": trimmed,
+        }
@@ -0,0 +1,54 @@
+"""
+Result Diversification for RAG System
+Maximal Marginal Relevance re-ranking of retrieved chunks
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray,
+    candidates: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+) -> List[int]:
+    """
+    Select k candidates balancing relevance against redundancy
+
+    Each step picks the candidate maximising
+    ``lambda * relevance - (1 - lambda) * max similarity to the selected ones``.
+    Pairwise similarities come from one matrix product and the running
+    maximum is updated with one vector operation per selected item.
+
+    Args:
+        relevance: Relevance score per candidate (n)
+        candidates: Row-normalised candidate embeddings (n x dim)
+        k: Number of candidates to select
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+
+    Returns:
+        Selected candidate positions in selection order
+    """
+    n = relevance.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = pairwise[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+    return selected
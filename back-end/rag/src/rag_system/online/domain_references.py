@@ -0,0 +1,111 @@
+"""
+Domain References for RAG System
+Reference questions of the counselling domain kept as a pre-normalised
+embedding matrix, persisted so agent startup does not re-embed them
+"""
+
+import os
+from pathlib import Path
+from typing import List, Callable, Sequence
+from loguru import logger
+
+import numpy as np
+
+from rag_system.offline.embedding_cache import normalize_text
+from rag_system.offline.similarity_index import normalize_rows, normalize_vector
+
+
+class DomainReferences:
+    """
+    Reference questions and their row-normalised embeddings
+    Relevance of a question is one matrix-vector product; the matrix is
+    saved as an .npz next to the other indexes and only reused for the same
+    embedding model
+    """
+
+    def __init__(self, path: Path, model_name: str):
+        """
+        Initialize DomainReferences, loading the saved matrix if present
+
+        Args:
+            path: .npz file the references are persisted to
+            model_name: Embedding model the vectors must come from
+        """
+        self.path = Path(path)
+        self.model_name = model_name
+        self.questions: List[str] = []
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def _load(self) -> None:
+        """Load the saved references, ignoring files of another model"""
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    logger.info(f"♻️ Domain references in {self.path} are for {data['model']}, re-embedding")
+                    return
+                self.questions = data["questions"].tolist()
+                self.matrix = np.ascontiguousarray(data["matrix"], dtype=np.float32)
+            logger.info(f"📂 Loaded {len(self.questions)} domain reference embeddings from {self.path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load domain references from {self.path}: {str(e)}")
+            self.questions, self.matrix = [], np.empty((0, 0), dtype=np.float32)
+
+    def save(self) -> None:
+        """Write the references atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.stem}.tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.array(self.model_name),
+            questions=np.array(self.questions, dtype=str),
+            matrix=self.matrix,
+        )
+        os.replace(tmp_path, self.path)
+
+    def add(self, questions: Sequence[str], embed_batch: Callable[[List[str]], List[List[float]]]) -> int:
+        """
+        Embed questions not yet referenced in one batch call and append them
+
+        Args:
+            questions: Reference questions
+            embed_batch: Embeds a list of texts, e.g. ``EmbeddingGenerator.generate_batch``
+
+        Returns:
+            Number of questions added
+        """
+        known = {normalize_text(question) for question in self.questions}
+        new_questions = []
+        for question in questions:
+            key = normalize_text(question)
+            if key and key not in known:
+                known.add(key)
+                new_questions.append(question)
+        if not new_questions:
+            return 0
+
+        rows = normalize_rows(np.array(embed_batch(new_questions), dtype=np.float32, ndmin=2))
+        self.matrix = rows if len(self.questions) == 0 else np.vstack([self.matrix, rows])
+        self.questions.extend(new_questions)
+        self.save()
+        logger.info(f"✅ Embedded {len(new_questions)} new domain references ({len(self.questions)} total)")
+        return len(new_questions)
+
+    def max_similarity(self, query_embedding: Sequence[float]) -> float:
+        """
+        Highest cosine similarity of a query to any reference
+
+        Args:
+            query_embedding: Query vector embedding
+
+        Returns:
+            Maximum similarity, 0.0 without references
+        """
+        if len(self.questions) == 0:
+            return 0.0
+        return float(np.max(self.matrix @ normalize_vector(query_embedding)))
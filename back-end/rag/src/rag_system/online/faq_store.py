@@ -0,0 +1,327 @@
+"""
+FAQ Answer Store for RAG System
+Precomputed answers to the most frequent questions, served by nearest
+question embedding and regenerated in the background when they go stale
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable, Sequence
+
+import numpy as np
+from loguru import logger
+from pymongo.collection import Collection
+
+from rag_system.offline.similarity_index import normalize_rows, normalize_vector
+from rag_system.online.question_log import question_hash
+
+
+class FAQStore:
+    """
+    Precomputed question/answer pairs persisted in MongoDB
+    Every process keeps the entries in memory as a row-normalised embedding
+    matrix, so a lookup is one matrix-vector product. An entry is only
+    served for the index version it was generated on and while it is young
+    enough; stale entries are left to ``FAQRefresher``.
+    """
+
+    # Max age when none is configured, so entries expire even if the index version never changes
+    DEFAULT_MAX_AGE_SECONDS = 86_400.0
+
+    def __init__(
+        self,
+        collection: Collection,
+        dimension: int,
+        threshold: float = 0.95,
+        max_age_seconds: float = 0.0,
+    ):
+        """
+        Initialize FAQStore, loading the stored entries
+
+        Args:
+            collection: MongoDB collection of FAQ entries
+            dimension: Question embedding dimension
+            threshold: Minimum cosine similarity between questions to serve an entry
+            max_age_seconds: Seconds before an entry is regenerated
+                (0 = ``DEFAULT_MAX_AGE_SECONDS``)
+        """
+        self.collection = collection
+        self.dimension = dimension
+        self.threshold = threshold
+        self.max_age_seconds = max_age_seconds or self.DEFAULT_MAX_AGE_SECONDS
+
+        self.entries: List[Dict[str, Any]] = []
+        self.matrix = np.empty((0, dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_matches = 0
+        self.saved_seconds = 0.0
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def reload(self) -> int:
+        """
+        Re-read every entry from MongoDB (picks up other processes' writes)
+
+        Returns:
+            Number of entries loaded
+        """
+        try:
+            docs = [
+                doc for doc in self.collection.find({}, {"refreshing_until": 0})
+                if len(doc.get("embedding", [])) == self.dimension
+            ]
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load FAQ answers: {str(e)}")
+            return len(self.entries)
+
+        matrix = (
+            normalize_rows(np.array([doc.pop("embedding") for doc in docs], dtype=np.float32))
+            if docs else np.empty((0, self.dimension), dtype=np.float32)
+        )
+        entries = []
+        for doc in docs:
+            doc["key"] = doc.pop("_id")
+            entries.append(doc)
+        with self._lock:
+            self.entries, self.matrix = entries, matrix
+        logger.debug(f"📚 Loaded {len(entries)} FAQ answers")
+        return len(entries)
+
+    def is_fresh(self, entry: Dict[str, Any], index_version: Optional[str]) -> bool:
+        """Whether an entry was generated on the current index version and is within the max age"""
+        if entry["index_version"] != index_version:
+            return False
+        return time.time() - entry["generated_at"] <= self.max_age_seconds
+
+    def lookup(self, question_embedding: Sequence[float], index_version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed answer of the nearest FAQ question, if close enough and fresh
+
+        Args:
+            question_embedding: Embedding of the new question
+            index_version: Version of the index the question is answered from
+
+        Returns:
+            Entry (question, response, metadata, ...) with ``similarity``, or None
+        """
+        with self._lock:
+            entries, matrix = self.entries, self.matrix
+        if not entries:
+            return None
+
+        query = normalize_vector(question_embedding)
+        if query.shape[0] != self.dimension:
+            return None
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        entry = entries[best]
+
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+        if not self.is_fresh(entry, index_version):
+            self.stale_matches += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.saved_seconds += entry.get("generation_time", 0.0)
+        return {**entry, "similarity": float(scores[best])}
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """Entry stored for a question, matched by normalised text"""
+        key = question_hash(question)
+        return next((entry for entry in self.entries if entry["key"] == key), None)
+
+    def upsert(
+        self,
+        question: str,
+        question_embedding: Sequence[float],
+        response: str,
+        metadata: Dict[str, Any],
+        index_version: Optional[str],
+        generation_time: float = 0.0,
+        frequency: Optional[int] = None,
+    ) -> None:
+        """
+        Store (or replace) the precomputed answer to a question
+
+        Args:
+            question: FAQ question
+            question_embedding: Its embedding
+            response: Generated answer
+            metadata: Result fields of the answer (type, confidences, ...)
+            index_version: Version of the index the answer came from
+            generation_time: Seconds the generation took (reported as saved on hits)
+            frequency: Times the question was asked in the request logs
+        """
+        fields = {
+            "question": question,
+            "embedding": [float(value) for value in question_embedding],
+            "response": response,
+            "metadata": metadata,
+            "index_version": index_version,
+            "generated_at": time.time(),
+            "generation_time": generation_time,
+        }
+        if frequency is not None:
+            fields["frequency"] = frequency
+        self.collection.update_one(
+            {"_id": question_hash(question)},
+            {"$set": fields, "$unset": {"refreshing_until": ""}},
+            upsert=True
+        )
+        self.reload()
+
+    def stale_entries(self, index_version: Optional[str]) -> List[Dict[str, Any]]:
+        """Entries that need regenerating for the current index version, most asked first"""
+        stale = [entry for entry in self.entries if not self.is_fresh(entry, index_version)]
+        return sorted(stale, key=lambda entry: -entry.get("frequency", 0))
+
+    def claim(self, entry: Dict[str, Any], lease_seconds: float) -> bool:
+        """
+        Take the lease on regenerating an entry, so only one process does it
+
+        Fails when another process holds the lease or already replaced the
+        entry since it was loaded.
+        """
+        now = time.time()
+        result = self.collection.update_one(
+            {
+                "_id": entry["key"],
+                "generated_at": entry["generated_at"],
+                "$or": [{"refreshing_until": {"$exists": False}}, {"refreshing_until": {"$lt": now}}],
+            },
+            {"$set": {"refreshing_until": now + lease_seconds}}
+        )
+        return result.modified_count == 1
+
+    def release(self, key: str) -> None:
+        """Give up the lease on an entry without replacing it"""
+        self.collection.update_one({"_id": key}, {"$unset": {"refreshing_until": ""}})
+
+    def remove(self, key: str) -> None:
+        """Delete an entry"""
+        self.collection.delete_one({"_id": key})
+        self.reload()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate figures for the status dashboard"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stale_matches": self.stale_matches,
+            "generation_seconds_saved": round(self.saved_seconds, 2),
+        }
+
+
+class FAQRefresher:
+    """
+    Background thread that keeps FAQ answers current
+    Every interval it reloads the store and regenerates, most asked first,
+    the entries that are stale for the current index version. A question
+    that no longer gets a generated answer (e.g. now judged off-topic) is
+    removed; a failed generation is retried on the next pass.
+    """
+
+    def __init__(
+        self,
+        store: FAQStore,
+        answer: Callable[[str], Optional[Dict[str, Any]]],
+        index_version: Callable[[], Optional[str]],
+        interval_seconds: float = 300.0,
+        lease_seconds: float = 600.0,
+    ):
+        """
+        Initialize FAQRefresher
+
+        Args:
+            store: FAQ store to refresh
+            answer: Generates the entry fields for a question, e.g.
+                ``CareerCounselingAgent.precompute_answer``; None when the
+                question gets no generated answer, raises when generation fails
+            index_version: Current index version
+            interval_seconds: Seconds between refresh passes
+            lease_seconds: Lease taken on an entry while it is regenerated
+        """
+        self.store = store
+        self.answer = answer
+        self.index_version = index_version
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+
+        self.refreshed = 0
+        self.removed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="faq-refresher", daemon=True)
+
+    def start(self) -> "FAQRefresher":
+        self._thread.start()
+        logger.info(f"🔄 FAQ refresher started (every {self.interval_seconds:.0f}s)")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                logger.warning(f"⚠️ FAQ refresh pass failed: {str(e)}")
+            self._stop.wait(self.interval_seconds)
+
+    def refresh_once(self) -> int:
+        """
+        Regenerate the stale entries this process can claim
+
+        Returns:
+            Number of entries regenerated
+        """
+        self.store.reload()
+        index_version = self.index_version()
+        stale = self.store.stale_entries(index_version)
+        if not stale:
+            return 0
+
+        logger.info(f"🔄 {len(stale)} stale FAQ answers for index version {index_version}")
+        refreshed = 0
+        for entry in stale:
+            if self._stop.is_set():
+                break
+            if not self.store.claim(entry, self.lease_seconds):
+                continue
+            try:
+                answer = self.answer(entry["question"])
+            except Exception as e:
+                logger.warning(f"⚠️ Could not regenerate FAQ answer for '{entry['question'][:60]}': {str(e)}")
+                self.store.release(entry["key"])
+                self.failed += 1
+                continue
+
+            if answer is None:
+                logger.info(f"🗑️ FAQ question no longer gets a generated answer, removing: {entry['question'][:60]}")
+                self.store.remove(entry["key"])
+                self.removed += 1
+                continue
+
+            self.store.upsert(**answer, frequency=entry.get("frequency"))
+            refreshed += 1
+
+        self.refreshed += refreshed
+        logger.info(f"✅ Regenerated {refreshed} FAQ answers")
+        return refreshed
+
+    def stats(self) -> Dict[str, Any]:
+        return {"refreshed": self.refreshed, "removed": self.removed, "failed": self.failed}
@@ -0,0 +1,136 @@
+"""
+Query Embedding Cache for RAG System
+Process-wide bounded LRU with TTL so popular questions are embedded once
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from loguru import logger
+
+from rag_system.offline.embedding_cache import normalize_text
+from rag_system.shared.config import RagSystemConfig
+
+
+def question_key(question: str) -> str:
+    """
+    Cache key of a question
+
+    The embedding cache's normalisation (NFC, collapsed whitespace) plus
+    casefolding: users type the same question with and without capitals,
+    and the difference in embedding is not worth an API call.
+    """
+    return normalize_text(question).casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU of question embeddings with a time-to-live
+    Entries older than the TTL are treated as misses and dropped; beyond
+    ``max_entries`` the least recently used entry is evicted
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0):
+        """
+        Initialize QueryEmbeddingCache
+
+        Args:
+            max_entries: Entries kept before LRU eviction
+            ttl_seconds: Seconds an embedding stays valid (0 = forever)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, question: str) -> Optional[List[float]]:
+        """Cached embedding of a question, or None on a miss"""
+        key = question_key(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, question: str, embedding: List[float]) -> None:
+        """Store the embedding of a question"""
+        key = question_key(question)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, question: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Cached embedding of a question, computing and storing it on a miss
+
+        Args:
+            question: User question
+            compute: Embeds the question on a miss
+
+        Returns:
+            Question embedding
+        """
+        embedding = self.get(question)
+        if embedding is None:
+            embedding = compute(question)
+            self.put(question, embedding)
+        return embedding
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit-rate counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide instance shared by every agent in the process
+_query_cache: Optional[QueryEmbeddingCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache(config: RagSystemConfig) -> QueryEmbeddingCache:
+    """Process-wide query embedding cache, created on first use"""
+    global _query_cache
+
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryEmbeddingCache(
+                max_entries=config.query_cache_max_entries,
+                ttl_seconds=config.query_cache_ttl_seconds
+            )
+            logger.info(
+                f"🧠 Query embedding cache: {config.query_cache_max_entries} entries, "
+                f"TTL {config.query_cache_ttl_seconds:.0f}s"
+            )
+    return _query_cache
@@ -0,0 +1,161 @@
+"""
+Question Log for RAG System
+Append-only JSON-lines record of the questions the agent answered, read by
+the offline jobs that learn from production traffic
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, Iterator, List
+
+from loguru import logger
+
+from rag_system.online.query_cache import question_key
+
+
+def question_hash(question: str) -> str:
+    """Fixed-length id of a question's cache key, so case and spacing variants share it"""
+    return hashlib.sha256(question_key(question).encode("utf-8")).hexdigest()
+
+
+class QuestionLog:
+    """
+    Thread-safe JSON-lines log of answered questions
+    One line per question with its result type (or, for the topic verdict
+    log, the LLM verdict); write failures are logged and never fail the
+    request. The file is rotated by size to ``<path>.1`` ... ``<path>.N``
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 0, backups: int = 1):
+        """
+        Initialize QuestionLog
+
+        Args:
+            path: JSON-lines file to append to
+            max_bytes: Size at which the file is rotated (0 = never)
+            backups: Rotated files kept, oldest dropped first
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def record(self, question: str, result: Dict[str, Any]) -> None:
+        """
+        Append an answered question
+
+        Args:
+            question: User's question
+            result: Result dict returned for it
+        """
+        self.append({
+            "timestamp": time.time(),
+            "question": question,
+            "type": result.get("type"),
+            "faq_hit": result.get("faq_hit", False),
+        })
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Append one JSON line"""
+        try:
+            line = json.dumps(entry, ensure_ascii=False)
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._rotate_if_full(len(line.encode("utf-8")) + 1)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not log question to {self.path}: {str(e)}")
+
+    def _backup_path(self, number: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{number}")
+
+    def _rotate_if_full(self, incoming: int) -> None:
+        """Shift the file to ``<path>.1`` when ``incoming`` more bytes would pass ``max_bytes``"""
+        if self.max_bytes <= 0:
+            return
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size == 0 or size + incoming <= self.max_bytes:
+            return
+
+        if self.backups <= 0:
+            self.path.unlink()
+            return
+        self._backup_path(self.backups).unlink(missing_ok=True)
+        for number in range(self.backups - 1, 0, -1):
+            if self._backup_path(number).exists():
+                os.replace(self._backup_path(number), self._backup_path(number + 1))
+        os.replace(self.path, self._backup_path(1))
+
+    def files(self) -> List[Path]:
+        """Existing log files, oldest first (rotated files, then the current one)"""
+        backups = []
+        number = 1
+        while self._backup_path(number).exists():
+            backups.append(self._backup_path(number))
+            number += 1
+        return [*reversed(backups), *([self.path] if self.path.exists() else [])]
+
+    @staticmethod
+    def _parse(lines: Iterator[str]) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Logged entries, oldest first, skipping malformed lines"""
+        for path in self.files():
+            with path.open(encoding="utf-8") as f:
+                yield from self._parse(f)
+
+    def tail(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        The most recent entries, oldest first
+
+        Files are read from their end, so only about ``limit`` lines are
+        read and parsed however long the log is.
+
+        Args:
+            limit: Most entries to return
+
+        Returns:
+            At most ``limit`` entries
+        """
+        lines: deque = deque()
+        for path in reversed(self.files()):
+            for line in _lines_from_end(path):
+                if len(lines) >= limit:
+                    return list(self._parse(iter(lines)))
+                lines.appendleft(line)
+        return list(self._parse(iter(lines)))
+
+
+def _lines_from_end(path: Path, block_size: int = 65_536) -> Iterator[str]:
+    """Lines of a text file, last first, read backwards in blocks"""
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read = min(block_size, position)
+            position -= read
+            f.seek(position)
+            block = f.read(read) + remainder
+            lines = block.split(b"\n")
+            # The first piece may be the end of a line that started in an earlier block
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode("utf-8", errors="replace")
+        if remainder.strip():
+            yield remainder.decode("utf-8", errors="replace")
@@ -0,0 +1,206 @@
+"""
+Semantic Answer Cache for RAG System
+Reuses generated answers for differently worded questions with the same meaning
+"""
+
+import threading
+import time
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from rag_system.offline.similarity_index import normalize_vector
+
+
+def context_overlap(a: Sequence[str], b: Sequence[str]) -> float:
+    """Jaccard overlap of two retrieval fingerprints (sets of chunk ids)"""
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticAnswerCache:
+    """
+    Bounded cache of answers searched by question embedding
+    Embeddings live in a preallocated row-normalised matrix, so a lookup is
+    one matrix-vector product over the occupied slots. An entry is served
+    when the cosine similarity clears the threshold, it was answered on the
+    same index version, its retrieval fingerprint overlaps the new one
+    enough and it has not expired. When full, the least recently used slot
+    is overwritten; a new index version empties the cache.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        max_entries: int = 2048,
+        threshold: float = 0.95,
+        ttl_seconds: float = 86_400.0,
+        min_context_overlap: float = 0.5,
+    ):
+        """
+        Initialize SemanticAnswerCache
+
+        Args:
+            dimension: Question embedding dimension
+            max_entries: Answers kept before LRU eviction
+            threshold: Minimum cosine similarity between questions for a hit
+            ttl_seconds: Seconds an answer stays valid (0 = until the index changes)
+            min_context_overlap: Minimum Jaccard overlap of retrieved chunk ids (0 disables)
+        """
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.min_context_overlap = min_context_overlap
+
+        self.matrix = np.zeros((max_entries, dimension), dtype=np.float32)
+        self.occupied = np.zeros(max_entries, dtype=bool)
+        self.last_used = np.zeros(max_entries, dtype=np.float64)
+        self.entries: List[Optional[Dict[str, Any]]] = [None] * max_entries
+        self.index_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lookup_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def _check_version(self, index_version: Optional[str]) -> None:
+        """Empty the cache when the index version changes (lock held)"""
+        if index_version != self.index_version:
+            if self.occupied.any():
+                self.invalidations += 1
+                logger.info(f"♻️ Index version changed ({self.index_version} -> {index_version}), clearing answer cache")
+            self.occupied[:] = False
+            self.entries = [None] * self.max_entries
+            self.index_version = index_version
+
+    def lookup(
+        self,
+        question_embedding: Sequence[float],
+        index_version: Optional[str],
+        fingerprint: Sequence[str],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached answer for a question, if a close enough one was answered
+
+        Args:
+            question_embedding: Embedding of the new question
+            index_version: Version of the index the question is answered from
+            fingerprint: Chunk ids retrieved for the new question
+
+        Returns:
+            Cached entry (question, response, similarity, ...) or None
+        """
+        start_time = time.perf_counter()
+        query = normalize_vector(question_embedding)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(index_version)
+            hit = None
+            slots = np.flatnonzero(self.occupied)
+            if len(slots) and query.shape[0] == self.dimension:
+                scores = self.matrix[slots] @ query
+                # Best candidates first; the first that also passes the other checks wins
+                for position in np.argsort(-scores):
+                    if scores[position] < self.threshold:
+                        break
+                    slot = int(slots[position])
+                    entry = self.entries[slot]
+                    if self.ttl_seconds and now - entry["created_at"] > self.ttl_seconds:
+                        self.occupied[slot] = False
+                        self.entries[slot] = None
+                        continue
+                    if self.min_context_overlap and context_overlap(entry["fingerprint"], fingerprint) < self.min_context_overlap:
+                        continue
+                    self.last_used[slot] = now
+                    entry["hits"] += 1
+                    hit = {**entry, "similarity": float(scores[position])}
+                    break
+
+            if hit is not None:
+                self.hits += 1
+                self.saved_seconds += hit["generation_time"]
+            else:
+                self.misses += 1
+            self.lookup_seconds += time.perf_counter() - start_time
+        return hit
+
+    def store(
+        self,
+        question: str,
+        question_embedding: Sequence[float],
+        response: str,
+        fingerprint: Sequence[str],
+        index_version: Optional[str],
+        generation_time: float = 0.0,
+    ) -> None:
+        """
+        Cache an answer
+
+        Args:
+            question: Question that was answered
+            question_embedding: Its embedding
+            response: Generated answer
+            fingerprint: Chunk ids the answer was generated from
+            index_version: Version of the index the answer came from
+            generation_time: Seconds the generation took (reported as saved on hits)
+        """
+        vector = normalize_vector(question_embedding)
+        if vector.shape[0] != self.dimension:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._check_version(index_version)
+            free = np.flatnonzero(~self.occupied)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self.last_used))
+                self.evictions += 1
+
+            self.matrix[slot] = vector
+            self.occupied[slot] = True
+            self.last_used[slot] = now
+            self.entries[slot] = {
+                "question": question,
+                "response": response,
+                "fingerprint": list(fingerprint),
+                "index_version": index_version,
+                "created_at": now,
+                "generation_time": generation_time,
+                "hits": 0,
+            }
+
+    def __len__(self) -> int:
+        return int(self.occupied.sum())
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and latency figures for the status dashboard"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "index_version": self.index_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "avg_lookup_ms": 1000 * self.lookup_seconds / lookups if lookups else 0.0,
+            "generation_seconds_saved": round(self.saved_seconds, 2),
+        }
+
+    def clear(self) -> None:
+        """Drop every cached answer"""
+        with self._lock:
+            self.occupied[:] = False
+            self.entries = [None] * self.max_entries
@@ -0,0 +1,299 @@
+"""
+Topic Classifier for RAG System
+Decides whether a question is career-related without an LLM call when it
+can: cached LLM verdicts first, then a logistic regression over the question
+embedding, and the LLM only for the questions in between
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from rag_system.offline.similarity_index import normalize_rows, normalize_vector
+from rag_system.online.question_log import QuestionLog, question_hash
+
+# Saved in config.index_dir
+TOPIC_CLASSIFIER_FILE = "topic_classifier.npz"
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+class TopicClassifier:
+    """
+    Logistic regression over row-normalised question embeddings
+    Trained by tools/train_topic_classifier.py from logged LLM verdicts and
+    saved as an .npz next to the other indexes. Probabilities between
+    ``low`` and ``high`` are left to the LLM.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: float, model_name: str, low: float = 0.1, high: float = 0.9):
+        """
+        Initialize TopicClassifier
+
+        Args:
+            weights: Coefficients over the normalised embedding
+            bias: Intercept
+            model_name: Embedding model the classifier was trained on
+            low: Probability at or below which a question is off-topic
+            high: Probability at or above which a question is career-related
+        """
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.model_name = model_name
+        self.low = low
+        self.high = high
+
+    @classmethod
+    def fit(
+        cls,
+        embeddings: np.ndarray,
+        labels: np.ndarray,
+        model_name: str,
+        l2: float = 1e-3,
+        epochs: int = 500,
+        learning_rate: float = 0.5,
+    ) -> "TopicClassifier":
+        """
+        Train with full-batch gradient descent on class-balanced log loss
+
+        Features are standardised for training and the scaling is folded
+        back into the weights, so prediction works on the raw normalised
+        embedding.
+
+        Args:
+            embeddings: Question embeddings, one row per question
+            labels: 1 for career-related, 0 for off-topic
+            model_name: Embedding model of the embeddings
+            l2: L2 penalty on the standardised weights
+            epochs: Gradient descent steps
+            learning_rate: Step size
+
+        Returns:
+            Trained classifier (with the default uncertainty band)
+        """
+        features = normalize_rows(np.array(embeddings, dtype=np.float32, ndmin=2))
+        labels = np.asarray(labels, dtype=np.float32)
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0) + 1e-6
+        standardized = (features - mean) / scale
+
+        # Both classes weigh the same in the loss however skewed the verdicts are
+        positives = max(float(labels.sum()), 1.0)
+        negatives = max(float(len(labels) - labels.sum()), 1.0)
+        sample_weights = np.where(labels == 1, len(labels) / (2 * positives), len(labels) / (2 * negatives))
+
+        weights = np.zeros(standardized.shape[1], dtype=np.float32)
+        bias = 0.0
+        for _ in range(epochs):
+            errors = sample_weights * (_sigmoid(standardized @ weights + bias) - labels)
+            weights -= learning_rate * (standardized.T @ errors / len(labels) + l2 * weights)
+            bias -= learning_rate * float(errors.mean())
+
+        raw_weights = weights / scale
+        return cls(raw_weights, bias - float(raw_weights @ mean), model_name)
+
+    def predict_proba(self, embeddings: np.ndarray) -> np.ndarray:
+        """Probability that each question (row) is career-related"""
+        features = normalize_rows(np.array(embeddings, dtype=np.float32, ndmin=2))
+        return _sigmoid(features @ self.weights + self.bias)
+
+    def probability(self, question_embedding: Sequence[float]) -> float:
+        """Probability that one question is career-related"""
+        return float(_sigmoid(np.array(normalize_vector(question_embedding) @ self.weights + self.bias)))
+
+    def verdict(self, question_embedding: Sequence[float]) -> Optional[bool]:
+        """Confident verdict for a question, None inside the uncertainty band"""
+        if len(question_embedding) != len(self.weights):
+            return None
+        probability = self.probability(question_embedding)
+        if probability >= self.high:
+            return True
+        if probability <= self.low:
+            return False
+        return None
+
+    def save(self, path: Path) -> None:
+        """Write the classifier atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.array(self.model_name),
+            weights=self.weights,
+            bias=np.array(self.bias),
+            band=np.array([self.low, self.high]),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, model_name: str) -> Optional["TopicClassifier"]:
+        """
+        Load a saved classifier
+
+        Args:
+            path: .npz written by ``save``
+            model_name: Embedding model questions are embedded with
+
+        Returns:
+            The classifier, None when missing, unreadable or trained on another model
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data["model"]) != model_name:
+                    logger.info(f"♻️ Topic classifier in {path} is for {data['model']}, not using it")
+                    return None
+                low, high = data["band"].tolist()
+                classifier = cls(data["weights"], float(data["bias"]), model_name, low, high)
+            logger.info(f"📂 Loaded topic classifier from {path} (uncertain between {low:.2f} and {high:.2f})")
+            return classifier
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load topic classifier from {path}: {str(e)}")
+            return None
+
+
+class TieredTopicClassifier:
+    """
+    Off-topic check in tiers, cheapest first
+    1. LLM verdicts cached by normalised question hash (bounded LRU, warmed
+       from the verdict log)
+    2. The embedding classifier, when it is confident
+    3. The LLM; its verdict is cached and logged as training data
+    Counters show the share of checks that avoided the LLM and the LLM
+    time saved, estimated from the mean LLM latency.
+    """
+
+    def __init__(
+        self,
+        classifier: Optional[TopicClassifier] = None,
+        max_entries: int = 50_000,
+        verdict_log: Optional[QuestionLog] = None,
+    ):
+        """
+        Initialize TieredTopicClassifier
+
+        Args:
+            classifier: Embedding classifier (None = cache and LLM only)
+            max_entries: Cached verdicts kept before LRU eviction
+            verdict_log: Log LLM verdicts are appended to and warmed from
+        """
+        self.classifier = classifier
+        self.max_entries = max_entries
+        self.verdict_log = verdict_log
+        self._verdicts: "OrderedDict[str, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.cache_hits = 0
+        self.classifier_decisions = 0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+        self._warm()
+
+    def _warm(self) -> None:
+        """Fill the cache with the most recent logged verdicts, reading only the tail of the log"""
+        if self.verdict_log is None:
+            return
+        for entry in self.verdict_log.tail(self.max_entries):
+            if "question" in entry and "relevant" in entry:
+                self._remember(question_hash(entry["question"]), bool(entry["relevant"]))
+        if self._verdicts:
+            logger.info(f"🧠 Loaded {len(self._verdicts)} cached topic verdicts")
+
+    def _remember(self, key: str, verdict: bool) -> None:
+        with self._lock:
+            self._verdicts[key] = verdict
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+
+    def precheck(self, question: str, question_embedding: Optional[Sequence[float]]) -> Optional[Tuple[bool, str]]:
+        """
+        Verdict from the cheap tiers
+
+        Args:
+            question: User's question
+            question_embedding: Its embedding (None skips the classifier)
+
+        Returns:
+            (is_relevant, tier) with tier "cache" or "classifier", None when the LLM must decide
+        """
+        key = question_hash(question)
+        with self._lock:
+            verdict = self._verdicts.get(key)
+            if verdict is not None:
+                self._verdicts.move_to_end(key)
+                self.cache_hits += 1
+                return verdict, "cache"
+
+        if self.classifier is not None and question_embedding is not None:
+            verdict = self.classifier.verdict(question_embedding)
+            if verdict is not None:
+                with self._lock:
+                    self.classifier_decisions += 1
+                return verdict, "classifier"
+        return None
+
+    def record_llm_verdict(self, question: str, verdict: bool, seconds: float) -> None:
+        """
+        Cache and log a verdict the LLM gave
+
+        Args:
+            question: User's question
+            verdict: Whether the LLM judged it career-related
+            seconds: Duration of the LLM call
+        """
+        self._remember(question_hash(question), verdict)
+        with self._lock:
+            self.llm_calls += 1
+            self.llm_seconds += seconds
+        if self.verdict_log is not None:
+            self.verdict_log.append({
+                "timestamp": time.time(),
+                "question": question,
+                "relevant": verdict,
+                "seconds": round(seconds, 4),
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Share of checks that avoided the LLM and the estimated time saved"""
+        avoided = self.cache_hits + self.classifier_decisions
+        checks = avoided + self.llm_calls
+        avg_llm_seconds = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        return {
+            "checks": checks,
+            "cache_hits": self.cache_hits,
+            "classifier_decisions": self.classifier_decisions,
+            "llm_calls": self.llm_calls,
+            "llm_avoided_share": avoided / checks if checks else 0.0,
+            "avg_llm_seconds": round(avg_llm_seconds, 4),
+            "llm_seconds_saved": round(avoided * avg_llm_seconds, 2),
+            "cached_verdicts": len(self._verdicts),
+            "classifier_loaded": self.classifier is not None,
+        }
+
+
+def load_verdicts(log: QuestionLog) -> List[Tuple[str, bool, float]]:
+    """
+    Logged LLM verdicts, the latest per normalised question
+
+    Returns:
+        (question, is_relevant, llm_seconds) tuples
+    """
+    latest: Dict[str, Tuple[str, bool, float]] = {}
+    for entry in log:
+        if "question" in entry and "relevant" in entry:
+            latest[question_hash(entry["question"])] = (
+                entry["question"], bool(entry["relevant"]), float(entry.get("seconds", 0.0))
+            )
+    return list(latest.values())
@@ -31,10 +31,13 @@ class RagSystemConfig(BaseSettings):
     root_dir: Path = Path(__file__).parent.parent.parent.parent
     data_dir: Path = root_dir / "data"
     config_dir: Path = root_dir / "configs"
+    index_dir: Path = root_dir / "indexes"
     
     # === API KEYS ===
     openai_api_key: str = Field(default="", env="OPENAI_API_KEY")
     openai_model_name: str = Field(default="gpt-4o-mini", env="OPENAI_MODEL_NAME")
+    # OpenAI-compatible chat endpoint override (e.g. a proxy or a local test server)
+    openai_api_base: Optional[str] = Field(None, env="OPENAI_API_BASE")
     
     gemini_api_key: str = Field(default="", env="GEMINI_API_KEY")
     gemini_model_name: str = Field(default="gemini-1.5-flash", env="GEMINI_MODEL_NAME")
@@ -49,14 +52,101 @@ class RagSystemConfig(BaseSettings):
     mongodb_database_name: str = Field(default="rag_system", env="MONGODB_DATABASE_NAME")
     mongodb_raw_collection_name: str = Field(default="documents_raw", env="MONGODB_RAW_COLLECTION_NAME")
     mongodb_rag_collection_name: str = Field(default="documents_rag", env="MONGODB_RAG_COLLECTION_NAME")
+    # Parent chunks of the "parent" strategy, stored once and keyed by parent_chunk_id
+    mongodb_parent_collection_name: str = Field(default="documents_parent", env="MONGODB_PARENT_COLLECTION_NAME")
+    # Precomputed answers to frequent questions (tools/precompute_faq.py)
+    mongodb_faq_collection_name: str = Field(default="faq_answers", env="MONGODB_FAQ_COLLECTION_NAME")
+    # Last published index build, the index version caches are keyed by on every backend
+    mongodb_index_build_collection_name: str = Field(default="index_builds", env="MONGODB_INDEX_BUILD_COLLECTION_NAME")
     
     # === EMBEDDING SETTINGS ===
     embedding_model_name: str = Field(default="text-embedding-3-small", env="EMBEDDING_MODEL_NAME")
     embedding_dimension: int = Field(default=1536, env="EMBEDDING_DIMENSION")
     vector_index_name: str = Field(default="rag_vector_index", env="VECTOR_INDEX_NAME")
+    # Content-addressed SQLite cache so unchanged chunks are not re-embedded
+    embedding_cache_enabled: bool = Field(default=True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_path: Path = Field(
+        default=root_dir / "embeddings_cache" / "embeddings.sqlite3",
+        env="EMBEDDING_CACHE_PATH"
+    )
+    embedding_cache_max_entries: int = Field(default=500_000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    # OpenAI-compatible endpoint override (e.g. a proxy or a local test server)
+    embedding_api_base: Optional[str] = Field(None, env="EMBEDDING_API_BASE")
+    # Embedding batches in flight at once (1 = sequential)
+    embedding_concurrency: int = Field(default=4, env="EMBEDDING_CONCURRENCY")
+    # Provider limits enforced client-side with token buckets (0 disables)
+    embedding_requests_per_minute: int = Field(default=3000, env="EMBEDDING_REQUESTS_PER_MINUTE")
+    embedding_tokens_per_minute: int = Field(default=1_000_000, env="EMBEDDING_TOKENS_PER_MINUTE")
+    # Retries of a batch after a 429 / transient provider error
+    embedding_max_retries: int = Field(default=6, env="EMBEDDING_MAX_RETRIES")
+    # Token budget per embedding request: starts at EMBEDDING_BATCH_TOKENS and
+    # adapts (AIMD) to observed latency and rate limits up to the max
+    embedding_batch_tokens: int = Field(default=8000, env="EMBEDDING_BATCH_TOKENS")
+    embedding_batch_max_tokens: int = Field(default=100_000, env="EMBEDDING_BATCH_MAX_TOKENS")
+    embedding_batch_max_texts: int = Field(default=512, env="EMBEDDING_BATCH_MAX_TEXTS")
+    embedding_target_latency_s: float = Field(default=5.0, env="EMBEDDING_TARGET_LATENCY_S")
+    # Per-batch embedding metrics written by build_rag_index
+    embedding_metrics_path: Path = Field(
+        default=root_dir / "logs" / "embedding_batches.jsonl",
+        env="EMBEDDING_METRICS_PATH"
+    )
+    # ONNX backend (model_type="onnx"): directory written by export_onnx_model,
+    # model_quantized.onnx for the int8 graph; 0 threads = all cores
+    onnx_model_dir: Path = Field(default=root_dir / "models" / "onnx", env="ONNX_MODEL_DIR")
+    onnx_model_file: str = Field(default="model.onnx", env="ONNX_MODEL_FILE")
+    onnx_num_threads: int = Field(default=0, env="ONNX_NUM_THREADS")
+    onnx_batch_size: int = Field(default=32, env="ONNX_BATCH_SIZE")
+    onnx_max_length: int = Field(default=512, env="ONNX_MAX_LENGTH")
+    onnx_pooling: str = Field(default="mean", env="ONNX_POOLING")
+    
+    # === VECTOR SEARCH SETTINGS ===
+    # "auto" tries Atlas $vectorSearch and falls back to the in-process index
+    vector_search_backend: str = Field(default="auto", env="VECTOR_SEARCH_BACKEND")
+    # Local index mode: "exact" brute force or "hnsw" approximate graph
+    vector_index_mode: str = Field(default="exact", env="VECTOR_INDEX_MODE")
+    hnsw_m: int = Field(default=16, env="HNSW_M")
+    hnsw_ef_construction: int = Field(default=200, env="HNSW_EF_CONSTRUCTION")
+    hnsw_ef_search: int = Field(default=64, env="HNSW_EF_SEARCH")
+    # Chunk embedding storage: "float" (BSON doubles), "float16" or "int8" (BSON binary)
+    embedding_storage_format: str = Field(default="float", env="EMBEDDING_STORAGE_FORMAT")
+    # Candidates re-scored with float32 vectors for quantized formats (0 disables)
+    quantized_rerank_candidates: int = Field(default=50, env="QUANTIZED_RERANK_CANDIDATES")
+    # Memory-map the embedding snapshot written by build_rag_index.py instead of reading MongoDB
+    use_embedding_snapshot: bool = Field(default=True, env="USE_EMBEDDING_SNAPSHOT")
+    snapshot_check_interval: float = Field(default=30.0, env="SNAPSHOT_CHECK_INTERVAL")
+    # Serve the snapshot from this many worker processes (1 searches in-process)
+    vector_index_shards: int = Field(default=1, env="VECTOR_INDEX_SHARDS")
+    # Two-stage search for Matryoshka models (e.g. text-embedding-3): the snapshot
+    # also stores this many leading dimensions as the in-memory first stage and the
+    # top candidates are re-scored with full vectors (0 disables). Exact index only:
+    # ignored without snapshots, in HNSW mode and on Atlas
+    matryoshka_dimension: int = Field(default=0, env="MATRYOSHKA_DIMENSION")
+    matryoshka_rerank_candidates: int = Field(default=100, env="MATRYOSHKA_RERANK_CANDIDATES")
+    
+    # === HYBRID RETRIEVAL SETTINGS ===
+    # Fuse BM25 and vector rankings with reciprocal rank fusion
+    hybrid_search_enabled: bool = Field(default=True, env="HYBRID_SEARCH_ENABLED")
+    hybrid_fetch_k: int = Field(default=20, env="HYBRID_FETCH_K")
+    rrf_k: int = Field(default=60, env="RRF_K")
     
     # === RAG SETTINGS ===
     max_retrieval_results: int = Field(default=5, env="MAX_RETRIEVAL_RESULTS")
+    # Collapse retrieved child chunks to their unique parents ("parent" strategy)
+    parent_collapse_enabled: bool = Field(default=True, env="PARENT_COLLAPSE_ENABLED")
+    # Children fetched per requested result before collapsing
+    parent_fetch_multiplier: int = Field(default=3, env="PARENT_FETCH_MULTIPLIER")
+    # Maximal Marginal Relevance re-ranking of the top mmr_fetch_k candidates
+    mmr_enabled: bool = Field(default=True, env="MMR_ENABLED")
+    mmr_lambda: float = Field(default=0.7, env="MMR_LAMBDA")
+    mmr_fetch_k: int = Field(default=20, env="MMR_FETCH_K")
+    # Token budget for retrieved context, filled best document first and trimmed
+    # at sentence boundaries; scales from the min budget at the relevance
+    # threshold to the max budget at high confidence
+    context_packing_enabled: bool = Field(default=True, env="CONTEXT_PACKING_ENABLED")
+    context_max_tokens: int = Field(default=2000, env="CONTEXT_MAX_TOKENS")
+    context_min_tokens: int = Field(default=400, env="CONTEXT_MIN_TOKENS")
+    # Smallest leftover budget still filled with a trimmed document
+    context_min_fragment_tokens: int = Field(default=64, env="CONTEXT_MIN_FRAGMENT_TOKENS")
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=200, env="CHUNK_OVERLAP")
     
@@ -66,6 +156,55 @@ class RagSystemConfig(BaseSettings):
         env="AGENT_SYSTEM_PROMPT"
     )
     temperature: float = Field(default=0.1, env="TEMPERATURE")
+    # Process-wide LRU of question embeddings (TTL in seconds, 0 = no expiry)
+    query_cache_enabled: bool = Field(default=True, env="QUERY_CACHE_ENABLED")
+    query_cache_max_entries: int = Field(default=10_000, env="QUERY_CACHE_MAX_ENTRIES")
+    query_cache_ttl_seconds: float = Field(default=3600.0, env="QUERY_CACHE_TTL_SECONDS")
+    # Score domain relevance in a pool while retrieval runs on the request thread.
+    # Questions whose combined confidence is below the off-topic threshold get the
+    # LLM topic check; it starts speculatively, in its own pool, once semantic
+    # relevance alone is below it
+    parallel_stages_enabled: bool = Field(default=True, env="PARALLEL_STAGES_ENABLED")
+    stage_workers: int = Field(default=4, env="STAGE_WORKERS")
+    topic_check_workers: int = Field(default=16, env="TOPIC_CHECK_WORKERS")
+    off_topic_confidence_threshold: float = Field(default=0.3, env="OFF_TOPIC_CONFIDENCE_THRESHOLD")
+    # Tiered off-topic check: LLM verdicts cached by question, then the embedding
+    # classifier trained by tools/train_topic_classifier.py, then the LLM; LLM
+    # verdicts are logged as its training data
+    topic_classifier_enabled: bool = Field(default=True, env="TOPIC_CLASSIFIER_ENABLED")
+    topic_verdict_cache_max_entries: int = Field(default=50_000, env="TOPIC_VERDICT_CACHE_MAX_ENTRIES")
+    # LLM verdicts log (warms the verdict cache on start-up): stores raw user text,
+    # rotated at the size limit with this many older files kept (0 bytes = no limit)
+    topic_verdict_log_enabled: bool = Field(default=True, env="TOPIC_VERDICT_LOG_ENABLED")
+    topic_verdict_log_path: Path = Field(default=root_dir / "logs" / "topic_verdicts.jsonl", env="TOPIC_VERDICT_LOG_PATH")
+    topic_verdict_log_max_bytes: int = Field(default=20_000_000, env="TOPIC_VERDICT_LOG_MAX_BYTES")
+    topic_verdict_log_backups: int = Field(default=2, env="TOPIC_VERDICT_LOG_BACKUPS")
+    # Semantic answer cache in front of generation: reuse an answer when a question
+    # is this similar (cosine), on the same index version and with overlapping context
+    semantic_cache_enabled: bool = Field(default=True, env="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(default=0.95, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_max_entries: int = Field(default=2048, env="SEMANTIC_CACHE_MAX_ENTRIES")
+    semantic_cache_ttl_seconds: float = Field(default=86_400.0, env="SEMANTIC_CACHE_TTL_SECONDS")
+    semantic_cache_min_context_overlap: float = Field(default=0.5, env="SEMANTIC_CACHE_MIN_CONTEXT_OVERLAP")
+    # Async (ASGI) server: worker threads for in-process index search and ranking,
+    # and the motor connection pool; LLM and embedding calls hold no thread
+    async_worker_threads: int = Field(default=32, env="ASYNC_WORKER_THREADS")
+    async_mongodb_pool_size: int = Field(default=200, env="ASYNC_MONGODB_POOL_SIZE")
+    # Answered questions appended as JSON lines, input of tools/precompute_faq.py.
+    # Stores raw user text, so off by default; rotated at the size limit with this
+    # many older files kept (0 bytes = no limit)
+    question_log_enabled: bool = Field(default=False, env="QUESTION_LOG_ENABLED")
+    question_log_path: Path = Field(default=root_dir / "logs" / "questions.jsonl", env="QUESTION_LOG_PATH")
+    question_log_max_bytes: int = Field(default=50_000_000, env="QUESTION_LOG_MAX_BYTES")
+    question_log_backups: int = Field(default=2, env="QUESTION_LOG_BACKUPS")
+    # Precomputed FAQ answers served to questions this similar (cosine) on the same
+    # index version; servers regenerate stale entries in the background, also once
+    # older than the max age (0 = one day), even if the index version never changes
+    faq_enabled: bool = Field(default=True, env="FAQ_ENABLED")
+    faq_match_threshold: float = Field(default=0.95, env="FAQ_MATCH_THRESHOLD")
+    faq_max_age_seconds: float = Field(default=604_800.0, env="FAQ_MAX_AGE_SECONDS")
+    faq_refresh_interval_seconds: float = Field(default=300.0, env="FAQ_REFRESH_INTERVAL_SECONDS")
+    faq_refresh_lease_seconds: float = Field(default=600.0, env="FAQ_REFRESH_LEASE_SECONDS")
     
     # === FINE-TUNING SETTINGS ===
     summarization_model_id: Optional[str] = Field(None, env="SUMMARIZATION_MODEL_ID")
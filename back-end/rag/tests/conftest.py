@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for the RAG system tests
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path for imports, as the scripts do
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
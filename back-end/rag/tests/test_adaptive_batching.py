@@ -0,0 +1,102 @@
+"""
+Tests for token-budgeted adaptive batching
+"""
+
+from rag_system.offline.adaptive_batching import AdaptiveBatcher, TokenCounter, heuristic_token_count
+
+
+def make_batcher(**overrides):
+    settings = dict(initial_tokens=1000, max_tokens=2000, max_texts=10, target_latency_s=1.0)
+    settings.update(overrides)
+    return AdaptiveBatcher(**settings)
+
+
+def test_heuristic_counts_utf8_bytes():
+    assert heuristic_token_count("abcd" * 10) == 11
+    # Vietnamese diacritics take more bytes than ASCII letters
+    assert heuristic_token_count("nghề nghiệp") > heuristic_token_count("nghe nghiep")
+
+
+def test_token_counter_falls_back_to_heuristic_for_unknown_models():
+    counter = TokenCounter("not-a-real-model")
+
+    assert not counter.exact
+    assert counter.count_many(["abcd", "abcdefgh"]) == [heuristic_token_count("abcd"), heuristic_token_count("abcdefgh")]
+
+
+def test_next_batch_packs_under_budget():
+    batcher = make_batcher()
+
+    assert batcher.next_batch([400, 400, 400, 400], 0) == 2
+    assert batcher.next_batch([400, 400, 400, 400], 2) == 4
+
+
+def test_next_batch_takes_one_oversized_text():
+    batcher = make_batcher()
+
+    assert batcher.next_batch([5000, 10], 0) == 1
+
+
+def test_next_batch_respects_text_caps():
+    batcher = make_batcher(max_texts=3)
+
+    assert batcher.next_batch([1] * 10, 0) == 3
+    assert batcher.next_batch([1] * 10, 0, max_texts=2) == 2
+
+
+def test_budget_grows_on_fast_full_batches_up_to_max():
+    batcher = make_batcher()
+
+    for number in range(20):
+        batcher.record(number, texts=5, tokens=int(batcher.budget), latency_s=0.1, retries=0, worker="w")
+
+    assert batcher.budget == 2000
+
+
+def test_budget_does_not_grow_on_small_batches():
+    batcher = make_batcher()
+
+    batcher.record(0, texts=1, tokens=100, latency_s=0.1, retries=0, worker="w")
+
+    assert batcher.budget == 1000
+
+
+def test_budget_shrinks_on_slow_batches_and_rate_limits():
+    batcher = make_batcher()
+
+    batcher.record(0, texts=5, tokens=1000, latency_s=5.0, retries=0, worker="w")
+    assert batcher.budget == 750
+
+    batcher.shrink()
+    assert batcher.budget == 375
+
+    for _ in range(10):
+        batcher.shrink()
+    assert batcher.budget == batcher.min_tokens
+
+
+def test_retried_batches_leave_the_budget_alone():
+    batcher = make_batcher()
+
+    batcher.record(0, texts=5, tokens=1000, latency_s=5.0, retries=2, worker="w")
+
+    assert batcher.budget == 1000
+
+
+def test_summary_and_reset():
+    batcher = make_batcher()
+    assert batcher.summary() == {"batches": 0, "budget": 1000}
+
+    batcher.record(0, texts=2, tokens=600, latency_s=0.5, retries=0, worker="w")
+    batcher.record(1, texts=3, tokens=900, latency_s=1.5, retries=1, worker="w")
+    summary = batcher.summary()
+
+    assert summary["batches"] == 2
+    assert summary["texts"] == 5
+    assert summary["tokens"] == 1500
+    assert summary["retries"] == 1
+    assert summary["tokens_per_batch"]["max"] == 900
+
+    batcher.reset_metrics()
+    assert batcher.summary()["batches"] == 0
+    assert batcher.summary()["budget"] == batcher.budget
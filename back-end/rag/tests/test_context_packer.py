@@ -0,0 +1,113 @@
+"""
+Tests for token-budgeted context packing
+"""
+
+import pytest
+
+from rag_system.online.context_packer import ContextPacker, trim_to_tokens
+
+
+class WordCounter:
+    """One token per whitespace-separated word"""
+
+    def count(self, text):
+        return len(text.split())
+
+
+@pytest.fixture
+def counter():
+    return WordCounter()
+
+
+def doc(content, score, title="Doc", **fields):
+    return {"content": content, "similarity_score": score, "metadata": {"title": title}, **fields}
+
+
+def test_trim_keeps_whole_sentences(counter):
+    text = "One two three. Four five six. Seven eight nine."
+
+    assert trim_to_tokens(text, 100, counter) == text
+    assert trim_to_tokens(text, 7, counter) == "One two three. Four five six."
+
+
+def test_trim_falls_back_to_words(counter):
+    text = "one two three four five six seven eight"
+
+    assert trim_to_tokens(text, 4, counter) == "one two three..."
+    assert trim_to_tokens(text, 1, counter) == ""
+
+
+def test_pack_orders_by_score_and_fits_budget(counter):
+    packer = ContextPacker(counter, min_fragment_tokens=100)
+    documents = [doc("low " * 5, 0.2, "Low"), doc("high " * 5, 0.9, "High")]
+
+    packed = packer.pack(documents, token_budget=1000)
+
+    assert packed["documents"] == 2
+    assert packed["context"].index("[High]") < packed["context"].index("[Low]")
+    # The blank line between documents is budgeted as one token
+    assert packed["tokens"] == counter.count(packed["context"]) + 1
+    assert not packed["trimmed"]
+
+
+def test_pack_trims_the_first_document_that_does_not_fit(counter):
+    packer = ContextPacker(counter, min_fragment_tokens=3)
+    long_text = "Alpha beta gamma. Delta epsilon zeta. Eta theta iota."
+    documents = [doc("short text", 0.9, "A"), doc(long_text, 0.5, "B"), doc("never packed", 0.1, "C")]
+
+    packed = packer.pack(documents, token_budget=18)
+
+    assert packed["trimmed"]
+    assert packed["documents"] == 2
+    assert "Alpha beta gamma." in packed["context"]
+    assert "Eta theta iota." not in packed["context"]
+    assert "[C]" not in packed["context"]
+    assert packed["tokens"] <= 18
+
+
+def test_pack_skips_fragments_below_the_minimum(counter):
+    packer = ContextPacker(counter, min_fragment_tokens=50)
+    documents = [doc("word " * 10, 0.9, "A"), doc("word " * 100, 0.5, "B")]
+
+    packed = packer.pack(documents, token_budget=40)
+
+    assert packed["documents"] == 1
+    assert not packed["trimmed"]
+
+
+def test_pack_uses_parent_content_of_collapsed_chunks(counter):
+    packer = ContextPacker(counter)
+    collapsed = doc("child", 0.9, parent_content="the whole parent section", parent_token_count=4)
+
+    packed = packer.pack([collapsed], token_budget=1000)
+
+    assert "the whole parent section" in packed["context"]
+    assert "child" not in packed["context"]
+
+
+def test_pack_trusts_stored_token_counts(counter):
+    packer = ContextPacker(counter)
+
+    packed = packer.pack([doc("counted at index time", 0.5, token_count=1)], token_budget=1000)
+
+    # Stored count of 1 for a four-word text, not re-tokenised
+    assert packed["tokens"] == counter.count(packed["context"]) - 3
+
+
+def test_fusion_score_takes_precedence(counter):
+    packer = ContextPacker(counter)
+    documents = [doc("vector", 0.9, "Vector", fusion_score=0.01), doc("fused", 0.1, "Fused", fusion_score=0.05)]
+
+    packed = packer.pack(documents, token_budget=1000)
+
+    assert packed["context"].startswith("[Fused]")
+
+
+def test_header_omits_missing_vector_score(counter):
+    packer = ContextPacker(counter)
+    lexical_only = {"content": "keyword match", "fusion_score": 0.02, "metadata": {"title": "Lexical"}}
+
+    packed = packer.pack([lexical_only, doc("vector", 0.8, "Vector", fusion_score=0.01)], token_budget=1000)
+
+    assert packed["context"].startswith("[Lexical]\nkeyword match")
+    assert "[Vector] (độ liên quan: 0.80)" in packed["context"]
@@ -0,0 +1,86 @@
+"""
+Tests for FAQ answer freshness and lookup
+"""
+
+import copy
+import time
+
+import pytest
+
+from rag_system.online.faq_store import FAQStore
+
+
+class InMemoryCollection:
+    """The part of a pymongo collection FAQStore uses for loading and upserts"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def find(self, query=None, projection=None):
+        excluded = {field for field, value in (projection or {}).items() if not value}
+        return [
+            {key: value for key, value in copy.deepcopy(doc).items() if key not in excluded}
+            for doc in self.docs.values()
+        ]
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["_id"], {"_id": query["_id"]})
+        doc.update(copy.deepcopy(update.get("$set", {})))
+        for field in update.get("$unset", {}):
+            doc.pop(field, None)
+
+
+def make_store(max_age_seconds: float = 0.0) -> FAQStore:
+    return FAQStore(InMemoryCollection(), dimension=3, threshold=0.9, max_age_seconds=max_age_seconds)
+
+
+def entry(index_version, age_seconds: float = 0.0):
+    return {"index_version": index_version, "generated_at": time.time() - age_seconds}
+
+
+def test_entry_of_current_version_is_fresh():
+    assert make_store(3600).is_fresh(entry("v1", age_seconds=60), "v1")
+
+
+def test_entry_of_other_version_is_stale():
+    assert not make_store(3600).is_fresh(entry("v1"), "v2")
+
+
+def test_entry_older_than_max_age_is_stale():
+    assert not make_store(3600).is_fresh(entry("v1", age_seconds=7200), "v1")
+
+
+def test_zero_max_age_falls_back_to_default():
+    store = make_store(0)
+
+    assert store.max_age_seconds == FAQStore.DEFAULT_MAX_AGE_SECONDS
+    assert store.is_fresh(entry("v1", age_seconds=60), "v1")
+    assert not store.is_fresh(entry("v1", age_seconds=FAQStore.DEFAULT_MAX_AGE_SECONDS + 60), "v1")
+
+
+def test_unknown_version_still_expires():
+    store = make_store(3600)
+
+    assert store.is_fresh(entry(None, age_seconds=60), None)
+    assert not store.is_fresh(entry(None, age_seconds=7200), None)
+
+
+def test_lookup_serves_fresh_entry_and_skips_stale_one():
+    store = make_store(3600)
+    store.upsert("How do I write a CV?", [1.0, 0.0, 0.0], "Answer", {"type": "faq"}, "v1", generation_time=3.0)
+
+    hit = store.lookup([1.0, 0.05, 0.0], "v1")
+    assert hit["response"] == "Answer"
+    assert hit["similarity"] == pytest.approx(0.9988, abs=1e-3)
+
+    assert store.lookup([1.0, 0.05, 0.0], "v2") is None
+    assert store.stale_matches == 1
+    assert [e["question"] for e in store.stale_entries("v2")] == ["How do I write a CV?"]
+
+
+def test_lookup_misses_dissimilar_question():
+    store = make_store(3600)
+    store.upsert("How do I write a CV?", [1.0, 0.0, 0.0], "Answer", {}, "v1")
+
+    assert store.lookup([0.0, 1.0, 0.0], "v1") is None
+    assert store.misses == 1
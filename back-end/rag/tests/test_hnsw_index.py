@@ -0,0 +1,154 @@
+"""
+Tests for the HNSW approximate nearest-neighbour index
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("hnswlib")
+
+from rag_system.offline.hnsw_index import HNSWIndex
+
+
+def random_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def make_index(n: int = 50, dim: int = 16, ef_search: int = 64) -> HNSWIndex:
+    index = HNSWIndex(dim, max_elements=n, ef_search=ef_search)
+    index.add([f"c{i}" for i in range(n)], random_vectors(n, dim))
+    return index
+
+
+def test_search_finds_inserted_vector():
+    vectors = random_vectors(50)
+    index = HNSWIndex(16, max_elements=10)
+    index.add([f"c{i}" for i in range(50)], vectors)
+
+    hits = index.search(vectors[7], k=3)
+
+    assert hits[0][0] == "c7"
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert len(index) == 50
+
+
+def test_add_rejects_mismatched_ids():
+    index = HNSWIndex(16)
+    with pytest.raises(ValueError):
+        index.add(["a", "b"], random_vectors(3))
+
+
+def test_removed_chunks_are_not_returned():
+    vectors = random_vectors(50)
+    index = HNSWIndex(16, max_elements=50)
+    index.add([f"c{i}" for i in range(50)], vectors)
+
+    assert index.remove(["c7", "c8", "unknown"]) == 2
+    assert index.remove(["c7"]) == 0
+
+    found = {chunk_id for chunk_id, _ in index.search(vectors[7], k=48)}
+    assert "c7" not in found and "c8" not in found
+    assert len(index) == 48
+    assert "c7" not in index and "c9" in index
+    assert index.deleted_ratio == pytest.approx(2 / 50)
+
+
+def test_k_above_live_count_is_capped():
+    index = make_index(n=5)
+    index.remove(["c0"])
+
+    assert len(index.search(random_vectors(1)[0], k=10)) == 4
+
+
+def test_k_above_ef_search_leaves_ef_unchanged():
+    index = make_index(n=200, ef_search=10)
+
+    hits = index.search_batch(random_vectors(3, seed=1), k=50)
+
+    assert [len(query_hits) for query_hits in hits] == [50, 50, 50]
+    assert index.ef_search == 10
+
+
+def test_concurrent_searches_with_large_k():
+    index = make_index(n=300, ef_search=10)
+    queries = random_vectors(20, seed=2)
+    errors = []
+
+    def search(k: int) -> None:
+        try:
+            for query in queries:
+                assert len(index.search(query, k=k)) == k
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=search, args=(k,)) for k in (5, 40, 80, 120)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+
+
+def test_save_and_load_round_trip(tmp_path):
+    vectors = random_vectors(40)
+    index = HNSWIndex(16, max_elements=40)
+    index.add([f"c{i}" for i in range(40)], vectors)
+    index.remove(["c3"])
+    index.save(tmp_path)
+
+    assert HNSWIndex.exists(tmp_path)
+    loaded = HNSWIndex.load(tmp_path, ef_search=32)
+
+    assert loaded.ids == index.ids
+    assert loaded.deleted == index.deleted
+    assert len(loaded) == 39
+    assert loaded.search(vectors[5], k=1)[0][0] == "c5"
+    assert "c3" not in {chunk_id for chunk_id, _ in loaded.search(vectors[3], k=39)}
+
+
+def test_loaded_index_accepts_inserts_and_saves_again(tmp_path):
+    vectors = random_vectors(60)
+    index = HNSWIndex(16, max_elements=20)
+    index.add([f"c{i}" for i in range(20)], vectors[:20])
+    index.save(tmp_path)
+
+    loaded = HNSWIndex.load(tmp_path)
+    loaded.add([f"c{i}" for i in range(20, 60)], vectors[20:])
+    loaded.save(tmp_path)
+
+    reloaded = HNSWIndex.load(tmp_path)
+    assert len(reloaded) == 60
+    assert reloaded.search(vectors[55], k=1)[0][0] == "c55"
+
+
+def test_load_ignores_ids_written_after_the_graph(tmp_path):
+    vectors = random_vectors(30)
+    index = HNSWIndex(16, max_elements=30)
+    index.add([f"c{i}" for i in range(20)], vectors[:20])
+    index.save(tmp_path)
+    graph = (tmp_path / "hnsw_graph.bin").read_bytes()
+
+    # A save in progress has replaced the id table but not yet the graph
+    index.add([f"c{i}" for i in range(20, 30)], vectors[20:])
+    index.save(tmp_path)
+    (tmp_path / "hnsw_graph.bin").write_bytes(graph)
+
+    loaded = HNSWIndex.load(tmp_path)
+    assert len(loaded) == 20
+    assert loaded.search(vectors[25], k=20)
+
+
+def test_get_vectors_returns_normalised_live_vectors():
+    vectors = random_vectors(10)
+    index = HNSWIndex(16, max_elements=10)
+    index.add([f"c{i}" for i in range(10)], vectors)
+    index.remove(["c2"])
+
+    found = index.get_vectors(["c1", "c2", "unknown"])
+
+    assert set(found) == {"c1"}
+    expected = vectors[1] / np.linalg.norm(vectors[1])
+    np.testing.assert_allclose(found["c1"], expected, atol=1e-5)
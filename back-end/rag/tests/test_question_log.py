@@ -0,0 +1,78 @@
+"""
+Tests for the rotated JSON-lines question log
+"""
+
+from rag_system.online.question_log import QuestionLog, _lines_from_end
+from rag_system.online.topic_classifier import TieredTopicClassifier
+
+
+def fill(log, count):
+    for number in range(count):
+        log.append({"question": f"question {number}", "number": number})
+
+
+def test_unbounded_log_keeps_everything(tmp_path):
+    log = QuestionLog(tmp_path / "questions.jsonl")
+    fill(log, 20)
+
+    assert [entry["number"] for entry in log] == list(range(20))
+    assert log.files() == [tmp_path / "questions.jsonl"]
+
+
+def test_rotation_bounds_size_and_keeps_order(tmp_path):
+    log = QuestionLog(tmp_path / "questions.jsonl", max_bytes=400, backups=2)
+    fill(log, 100)
+
+    files = log.files()
+    assert [path.name for path in files] == ["questions.jsonl.2", "questions.jsonl.1", "questions.jsonl"]
+    assert all(path.stat().st_size <= 400 for path in files)
+
+    numbers = [entry["number"] for entry in log]
+    assert numbers == sorted(numbers)
+    assert numbers[-1] == 99
+    assert len(numbers) < 100
+
+
+def test_rotation_without_backups_starts_over(tmp_path):
+    log = QuestionLog(tmp_path / "questions.jsonl", max_bytes=400, backups=0)
+    fill(log, 100)
+
+    assert log.files() == [tmp_path / "questions.jsonl"]
+    assert [entry["number"] for entry in log][-1] == 99
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text('{"number": 1}\nnot json\n{"number": 2}\n', encoding="utf-8")
+
+    assert [entry["number"] for entry in QuestionLog(path)] == [1, 2]
+
+
+def test_tail_reads_the_latest_entries_across_files(tmp_path):
+    log = QuestionLog(tmp_path / "questions.jsonl", max_bytes=400, backups=2)
+    fill(log, 100)
+    current = len((tmp_path / "questions.jsonl").read_text(encoding="utf-8").splitlines())
+
+    assert [entry["number"] for entry in log.tail(3)] == [97, 98, 99]
+    # Spans the current file and the newest rotated one
+    assert [entry["number"] for entry in log.tail(current + 2)] == list(range(98 - current, 100))
+    assert log.tail(10_000) == list(log)
+
+
+def test_lines_from_end_across_small_blocks(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_text("first line\nsecond\n\nthird line here\n", encoding="utf-8")
+
+    assert list(_lines_from_end(path, block_size=4)) == ["third line here", "second", "first line"]
+
+
+def test_topic_verdict_cache_warms_from_the_log_tail(tmp_path):
+    log = QuestionLog(tmp_path / "verdicts.jsonl")
+    for number in range(10):
+        log.append({"question": f"question {number}", "relevant": number % 2 == 0})
+
+    tiers = TieredTopicClassifier(None, max_entries=3, verdict_log=log)
+
+    assert tiers.precheck("question 9", None) == (False, "cache")
+    assert tiers.precheck("question 8", None) == (True, "cache")
+    assert tiers.precheck("question 0", None) is None
@@ -0,0 +1,80 @@
+"""
+Tests for the embedding rate limiter
+"""
+
+import pytest
+
+from rag_system.offline import rate_limiter
+from rag_system.offline.rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def test_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(per_minute=60)  # one unit per second, burst of 60
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_refills_over_time(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+
+    clock.now += 30
+    assert bucket.reserve(30) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_caps_requests_at_capacity(clock):
+    bucket = TokenBucket(per_minute=60, capacity=10)
+
+    # A request larger than the bucket waits for a full bucket, not forever
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve(10) == pytest.approx(10.0)
+
+
+def test_limiter_waits_for_the_tighter_limit(clock):
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60)
+
+    assert limiter.reserve(60) == 0.0
+    assert limiter.reserve(30) == pytest.approx(30.0)
+    assert limiter.wait_time == pytest.approx(30.0)
+
+
+def test_zero_limits_disable_limiting(clock):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+
+    assert all(limiter.reserve(10_000) == 0.0 for _ in range(100))
+
+
+def test_backoff_pauses_every_caller(clock):
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=1_000_000)
+
+    assert limiter.backoff(attempt=0, retry_after=5.0) == 5.0
+
+    # Drained buckets and the shared pause both hold back the next request
+    assert limiter.reserve(1) >= 5.0
+    clock.now += 10
+    assert limiter.reserve(1) == 0.0
+
+
+def test_backoff_jitter_is_bounded(clock):
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+
+    delays = [limiter.backoff(attempt=3, base=1.0, cap=4.0) for _ in range(50)]
+
+    assert all(0.0 <= delay <= 4.0 for delay in delays)
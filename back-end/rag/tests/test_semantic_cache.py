@@ -0,0 +1,86 @@
+"""
+Tests for the semantic answer cache
+"""
+
+import numpy as np
+import pytest
+
+from rag_system.online.semantic_cache import SemanticAnswerCache, context_overlap
+
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache(dimension=3, max_entries=2, threshold=0.9, ttl_seconds=0, min_context_overlap=0.5)
+
+
+def test_similar_question_hits(cache):
+    cache.store("q", unit(1, 0, 0), "answer", ["a", "b"], "v1", generation_time=2.0)
+
+    hit = cache.lookup(unit(1, 0.1, 0), "v1", ["a", "b"])
+
+    assert hit["response"] == "answer"
+    assert hit["similarity"] > 0.9
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["generation_seconds_saved"] == 2.0
+
+
+def test_dissimilar_question_misses(cache):
+    cache.store("q", unit(1, 0, 0), "answer", ["a"], "v1")
+
+    assert cache.lookup(unit(0, 1, 0), "v1", ["a"]) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_new_index_version_empties_cache(cache):
+    cache.store("q", unit(1, 0, 0), "answer", ["a"], "v1")
+
+    assert cache.lookup(unit(1, 0, 0), "v2", ["a"]) is None
+    assert len(cache) == 0
+    assert cache.index_version == "v2"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_answer_stored_on_old_version_is_not_served(cache):
+    cache.store("q", unit(1, 0, 0), "old answer", ["a"], "v1")
+    cache.store("q", unit(1, 0, 0), "new answer", ["a"], "v2")
+
+    assert cache.lookup(unit(1, 0, 0), "v2", ["a"])["response"] == "new answer"
+    assert len(cache) == 1
+
+
+def test_low_context_overlap_misses(cache):
+    cache.store("q", unit(1, 0, 0), "answer", ["a", "b"], "v1")
+
+    assert cache.lookup(unit(1, 0, 0), "v1", ["c", "d"]) is None
+
+
+def test_expired_entry_is_dropped():
+    cache = SemanticAnswerCache(dimension=3, threshold=0.9, ttl_seconds=60)
+    cache.store("q", unit(1, 0, 0), "answer", [], "v1")
+    cache.entries[0]["created_at"] -= 120
+
+    assert cache.lookup(unit(1, 0, 0), "v1", []) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    cache.store("q1", unit(1, 0, 0), "a1", [], "v1")
+    cache.store("q2", unit(0, 1, 0), "a2", [], "v1")
+    cache.lookup(unit(1, 0, 0), "v1", [])
+    cache.last_used[1] = 0  # q2 unused since
+
+    cache.store("q3", unit(0, 0, 1), "a3", [], "v1")
+
+    assert cache.lookup(unit(0, 1, 0), "v1", []) is None
+    assert cache.lookup(unit(1, 0, 0), "v1", [])["response"] == "a1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_context_overlap():
+    assert context_overlap([], []) == 1.0
+    assert context_overlap(["a", "b"], ["b", "c"]) == pytest.approx(1 / 3)
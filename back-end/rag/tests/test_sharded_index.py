@@ -0,0 +1,36 @@
+"""
+Tests for the sharded snapshot index
+"""
+
+import numpy as np
+import pytest
+
+from rag_system.offline import embedding_snapshot
+from rag_system.offline.sharded_index import ShardedIndex, merge_hits
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(30, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"c{i}" for i in range(30)]
+    embedding_snapshot.write_snapshot(tmp_path, ids, vectors, num_shards=3)
+    return tmp_path, ids, vectors
+
+
+def test_merge_hits_keeps_global_top_k():
+    merged = merge_hits([[("a", 0.9), ("b", 0.5)], [("c", 0.8), ("d", 0.1)]], k=3)
+
+    assert merged == [("a", 0.9), ("c", 0.8), ("b", 0.5)]
+
+
+def test_search_and_vectors_across_shards(snapshot):
+    snapshot_root, ids, vectors = snapshot
+    with ShardedIndex(snapshot_root) as index:
+        assert len(index.shards) == 3
+        assert index.search(vectors[25], k=1)[0][0] == "c25"
+
+        found = index.get_vectors(["c0", "c15", "c29", "unknown"])
+
+    assert set(found) == {"c0", "c15", "c29"}
+    np.testing.assert_allclose(found["c15"], vectors[15], atol=1e-6)
@@ -0,0 +1,119 @@
+"""
+Tests for the exact in-process similarity index
+"""
+
+import numpy as np
+import pytest
+
+from rag_system.offline.metadata_filter import FILTER_FIELDS, MetadataFilterIndex
+from rag_system.offline.similarity_index import SimilarityIndex, batch_top_k, rerank_hits, top_k_indices
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+
+def brute_force(vectors, query, k):
+    matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return [f"c{i}" for i in np.argsort(-scores)[:k]]
+
+
+def test_top_k_indices_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7])
+
+    assert top_k_indices(scores, 2).tolist() == [1, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_search_matches_brute_force(vectors):
+    index = SimilarityIndex([f"c{i}" for i in range(50)], vectors)
+    query = vectors[7] + 0.1
+
+    hits = index.search(query, k=5)
+
+    assert [chunk_id for chunk_id, _ in hits] == brute_force(vectors, query, 5)
+    assert hits[0][1] == pytest.approx(index.score(query, [hits[0][0]])[0])
+
+
+def test_search_batch_matches_single_searches(vectors):
+    index = SimilarityIndex([f"c{i}" for i in range(50)], vectors)
+    queries = vectors[:4] + 0.05
+
+    # A block size below the corpus size exercises the running top-k merge
+    batched = index.search_batch(queries, k=3, block_size=8)
+
+    for query, hits in zip(queries, batched):
+        assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in index.search(query, k=3)]
+
+
+def test_batch_top_k_with_k_above_rows():
+    matrix = np.eye(3, dtype=np.float32)
+
+    rows, scores = batch_top_k(matrix, np.array([[0.0, 1.0, 0.0]], dtype=np.float32), k=10, block_size=2)
+
+    assert rows.shape == (1, 3)
+    assert rows[0, 0] == 1
+    assert scores[0, 0] == pytest.approx(1.0)
+
+
+def test_search_with_filters_only_scores_matching_rows(vectors):
+    sources = ["a.pdf" if i % 2 else "b.pdf" for i in range(50)]
+    columns = {name: [None] * 50 for name in FILTER_FIELDS}
+    columns["source"] = sources
+    index = SimilarityIndex(
+        [f"c{i}" for i in range(50)], vectors, metadata=MetadataFilterIndex.from_columns(columns)
+    )
+
+    hits = index.search(vectors[4], k=5, filters={"source": "a.pdf"})
+
+    assert len(hits) == 5
+    assert all(int(chunk_id[1:]) % 2 == 1 for chunk_id, _ in hits)
+
+
+def test_add_extends_index_and_row_map(vectors):
+    index = SimilarityIndex([f"c{i}" for i in range(10)], vectors[:10])
+
+    index.add(["new"], vectors[10:11])
+
+    assert len(index) == 11
+    assert index.rows_for(["new", "missing"]) == [10, None]
+    assert index.search(vectors[10], k=1)[0][0] == "new"
+
+
+def test_score_unknown_ids_is_none(vectors):
+    index = SimilarityIndex([f"c{i}" for i in range(5)], vectors[:5])
+
+    scores = index.score(vectors[0], ["c0", "unknown"])
+
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert scores[1] is None
+
+
+def test_byte_string_ids_are_decoded(vectors):
+    ids = np.array([f"c{i}".encode("ascii") for i in range(5)])
+    index = SimilarityIndex(ids, vectors[:5])
+
+    assert index.chunk_ids() == ["c0", "c1", "c2", "c3", "c4"]
+    assert index.search(vectors[3], k=1)[0][0] == "c3"
+
+
+def test_mismatched_shapes_are_rejected(vectors):
+    with pytest.raises(ValueError):
+        SimilarityIndex(["only-one"], vectors[:2])
+
+    index = SimilarityIndex(["c0"], vectors[:1])
+    with pytest.raises(ValueError):
+        index.search(np.ones(3), k=1)
+
+
+def test_rerank_hits_reorders_by_full_precision(vectors):
+    query = vectors[0]
+    hits = [("far", 0.99), ("near", 0.1)]
+
+    reranked = rerank_hits(query, hits, np.stack([-query, query]), k=1)
+
+    assert reranked[0][0] == "near"
+    assert reranked[0][1] == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,266 @@
+"""
+Async (ASGI) Career Counseling Server
+Same /api/ask, /api/status and /api/health contract as web_server.py, served by
+uvicorn. LLM, embedding and MongoDB round trips are awaited on the event loop,
+so an open question does not hold an OS thread and one worker keeps hundreds
+of questions in flight.
+
+Run: python tools/asgi_server.py   (ASGI_HOST, ASGI_PORT, ASGI_WORKERS)
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Any
+from loguru import logger
+
+# Add src to path for local module imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+try:
+    from fastapi import Depends, FastAPI, Request
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+    from starlette.exceptions import HTTPException as StarletteHTTPException
+
+    from rag_system.shared.config import load_config
+    from rag_system.online.async_agent import AsyncCareerAgent
+    from rag_system.online.career_agent import CareerCounselingAgent
+    # Add Firebase authentication
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from auth import firebase_user_payload
+except ImportError as e:
+    logger.error(f"❌ Import error: {str(e)}")
+    logger.info("💡 Make sure to run: uv pip install -e '.[asgi]'")
+    sys.exit(1)
+
+
+def setup_logging():
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level=os.getenv('LOG_LEVEL', 'INFO')
+    )
+
+
+def initialize_agent(config) -> CareerCounselingAgent:
+    """Build the synchronous agent the async one shares its state with"""
+    agent = CareerCounselingAgent(config)
+
+    # Load the local vector index up front instead of on the first request
+    agent.vector_store.load_local_index()
+
+    # Keep precomputed FAQ answers in step with the index
+    agent.start_faq_refresher()
+    return agent
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+    app.state.agent = None
+    app.state.config = None
+
+    try:
+        logger.info("🔧 Initializing async career counseling agent...")
+        config = load_config()
+        # Index search and ranking run on this pool; LLM and embedding calls need no thread
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=config.async_worker_threads, thread_name_prefix="asgi-worker")
+        )
+        agent = await run_in_threadpool(initialize_agent, config)
+        app.state.config = config
+        app.state.agent = AsyncCareerAgent(agent)
+        logger.success("✅ Async career agent initialized successfully")
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize agent: {str(e)}")
+        logger.warning("⚠️  Agent initialization failed, server will start but API may not work")
+
+    yield
+
+    if app.state.agent is not None:
+        app.state.agent.close()
+
+
+app = FastAPI(title="Career Counseling RAG (async)", lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+class AuthError(Exception):
+    """Request rejected by Firebase authentication"""
+
+
+async def current_user(request: Request) -> Dict[str, Any]:
+    """Firebase user of a request, as ``firebase_required`` attaches it in web_server.py"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        raise AuthError('Missing or invalid Authorization header')
+
+    # Token verification and the Firestore lookup are blocking client calls
+    user_payload = await run_in_threadpool(firebase_user_payload, auth_header.split(' ')[1])
+    if not user_payload:
+        raise AuthError('Invalid Firebase token')
+    return user_payload
+
+
+@app.exception_handler(AuthError)
+async def auth_error(request: Request, exc: AuthError):
+    return JSONResponse({'error': str(exc)}, status_code=401)
+
+
+# API endpoint: ask question
+@app.post('/api/ask')
+async def ask_question(request: Request, user_info: Dict[str, Any] = Depends(current_user)):
+    career_agent: AsyncCareerAgent = request.app.state.agent
+    try:
+        if career_agent is None:
+            return JSONResponse({
+                'error': 'Career agent not initialized',
+                'response': 'Hệ thống đang khởi động, vui lòng thử lại sau.',
+                'type': 'system_error'
+            }, status_code=500)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or 'question' not in data:
+            return JSONResponse({
+                'error': 'No question provided',
+                'response': 'Vui lòng cung cấp câu hỏi.',
+                'type': 'invalid_request'
+            }, status_code=400)
+
+        question = data['question'].strip()
+        if not question:
+            return JSONResponse({
+                'error': 'Empty question',
+                'response': 'Câu hỏi không được để trống.',
+                'type': 'empty_question'
+            }, status_code=400)
+
+        logger.info(f"🤖 API Request from {user_info.get('email', 'unknown')}: {question[:100]}...")
+
+        start_time = time.time()
+        result = await career_agent.answer_question(question)
+        result['api_processing_time'] = time.time() - start_time
+        result['user_info'] = user_info
+
+        logger.success(f"✅ API Response sent ({result.get('processing_time', 0):.2f}s)")
+        return result
+
+    except Exception as e:
+        logger.error(f"❌ API Error: {str(e)}")
+        return JSONResponse({
+            'error': str(e),
+            'response': 'Xin lỗi, có lỗi xảy ra. Vui lòng thử lại sau.',
+            'type': 'system_error'
+        }, status_code=500)
+
+
+# API endpoint: system status
+@app.get('/api/status')
+async def get_status(request: Request):
+    career_agent: AsyncCareerAgent = request.app.state.agent
+    config = request.app.state.config
+    try:
+        agent_status = career_agent is not None
+        status = {
+            'status': 'healthy' if agent_status else 'initializing',
+            'agent_initialized': agent_status,
+            'timestamp': time.time()
+        }
+        if agent_status and config:
+            agent_info = career_agent.agent.get_agent_info()
+            status.update({
+                'agent_info': agent_info,
+                'model': config.openai_model_name,
+                'embedding_model': config.embedding_model_name,
+                'query_embedding_cache': agent_info['query_embedding_cache'],
+                'semantic_answer_cache': agent_info['semantic_answer_cache'],
+                'topic_check': agent_info['topic_check'],
+                'faq_answers': agent_info['faq_answers'],
+                'server': {'type': 'asgi', **career_agent.stats()}
+            })
+        return status
+    except Exception as e:
+        logger.error(f"❌ Status check error: {str(e)}")
+        return JSONResponse({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': time.time()
+        }, status_code=500)
+
+
+# API endpoint: health check
+@app.get('/api/health')
+async def health_check():
+    return {
+        'status': 'ok',
+        'service': 'career-counseling-rag',
+        'timestamp': time.time()
+    }
+
+
+# Error handling
+@app.exception_handler(StarletteHTTPException)
+async def http_error(request: Request, exc: StarletteHTTPException):
+    if exc.status_code == 404:
+        return JSONResponse({
+            'error': 'Endpoint not found',
+            'message': 'The requested endpoint does not exist.'
+        }, status_code=404)
+    return JSONResponse({'error': exc.detail}, status_code=exc.status_code)
+
+
+@app.exception_handler(Exception)
+async def internal_error(request: Request, exc: Exception):
+    logger.error(f"❌ Internal server error: {str(exc)}")
+    return JSONResponse({
+        'error': 'Internal server error',
+        'message': 'An unexpected error occurred.'
+    }, status_code=500)
+
+
+# Start server
+if __name__ == '__main__':
+    import uvicorn
+
+    setup_logging()
+    logger.info("🚀 Starting async Career Counseling Server")
+
+    host = os.getenv('ASGI_HOST', '0.0.0.0')
+    port = int(os.getenv('ASGI_PORT', 5002))
+    workers = int(os.getenv('ASGI_WORKERS', 1))
+
+    logger.info(f"🌐 API server listening at http://{host}:{port} ({workers} worker(s))")
+    logger.info("📋 Available endpoints:")
+    logger.info("   - POST /api/ask       - Ask questions")
+    logger.info("   - GET  /api/status    - System status")
+    logger.info("   - GET  /api/health    - Health check")
+
+    try:
+        uvicorn.run(
+            "asgi_server:app",
+            app_dir=str(Path(__file__).parent),
+            host=host,
+            port=port,
+            workers=workers,
+            log_level="warning"
+        )
+    except KeyboardInterrupt:
+        logger.info("👋 Server stopped by user")
+    except Exception as e:
+        logger.error(f"❌ Server error: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+FAQ Answer Precomputation
+Answers the most frequent questions of the request log (and the domain
+reference questions) ahead of time and stores them with their embeddings;
+the agent then serves them by nearest question without retrieval or
+generation. Servers regenerate the entries when the index version changes.
+"""
+
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+try:
+    from rag_system.shared.config import load_config
+    from rag_system.online.career_agent import CareerCounselingAgent
+    from rag_system.online.question_log import QuestionLog, question_hash
+except ImportError as e:
+    logger.error(f"❌ Import error: {str(e)}")
+    logger.info("💡 Make sure to run: uv pip install -e .")
+    sys.exit(1)
+
+# Logged result types that did not get a generated answer
+UNANSWERED_TYPES = {"empty_question", "greeting", "off_topic"}
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def frequent_questions(log: QuestionLog, top_n: int, min_count: int) -> List[Tuple[str, int]]:
+    """
+    Most asked answered questions, grouped by normalised text
+
+    Args:
+        log: Request question log
+        top_n: Number of questions to return
+        min_count: Minimum times a question was asked
+
+    Returns:
+        (question, count) pairs, most asked first; each question in its most common wording
+    """
+    counts: Counter = Counter()
+    wordings: Dict[str, Counter] = defaultdict(Counter)
+    for entry in log:
+        question = (entry.get("question") or "").strip()
+        if not question or entry.get("type") in UNANSWERED_TYPES:
+            continue
+        key = question_hash(question)
+        counts[key] += 1
+        wordings[key][question] += 1
+
+    return [
+        (wordings[key].most_common(1)[0][0], count)
+        for key, count in counts.most_common(top_n)
+        if count >= min_count
+    ]
+
+
+def load_index(agent: CareerCounselingAgent) -> None:
+    """Load the local vector index the way the servers do, so answers carry the same index version"""
+    agent.vector_store.load_local_index()
+
+
+def precompute_faq(
+    top_n: int = 50,
+    min_count: int = 3,
+    include_references: bool = True,
+    force: bool = False,
+    dry_run: bool = False,
+    log_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Precompute answers to the most frequent questions
+
+    Args:
+        top_n: Questions taken from the request log
+        min_count: Minimum times a logged question was asked
+        include_references: Also answer the agent's domain reference questions
+        force: Regenerate entries that are still fresh
+        dry_run: Only list the questions that would be answered
+        log_path: Question log to read (default QUESTION_LOG_PATH)
+
+    Returns:
+        Summary counts
+    """
+    setup_logging()
+    config = load_config()
+
+    log = QuestionLog(Path(log_path) if log_path else config.question_log_path)
+    if not log.files():
+        logger.warning(f"⚠️  No question log at {log.path} (QUESTION_LOG_ENABLED is off by default)")
+    questions = frequent_questions(log, top_n, min_count)
+    logger.info(f"📊 {len(questions)} questions asked at least {min_count} times in {log.path}")
+
+    if not config.faq_enabled and not dry_run:
+        logger.error("❌ FAQ answers are disabled (FAQ_ENABLED=false)")
+        return {"success": False}
+
+    if dry_run:
+        print("\n" + "=" * 80)
+        for question, count in questions:
+            print(f"{count:>6}  {question}")
+        print("=" * 80 + "\n")
+        return {"success": True, "questions": len(questions)}
+
+    logger.info("🔧 Initializing career counseling agent...")
+    agent = CareerCounselingAgent(config)
+    load_index(agent)
+    store = agent.faq_store
+    if store is None:
+        logger.error("❌ FAQ store unavailable")
+        return {"success": False}
+
+    if include_references:
+        logged = {question_hash(question) for question, _ in questions}
+        questions += [
+            (question, 0) for question in agent.career_reference_questions
+            if question_hash(question) not in logged
+        ]
+
+    index_version = agent.index_version
+    summary = {"success": True, "questions": len(questions), "generated": 0, "fresh": 0, "skipped": 0, "failed": 0}
+    start_time = time.time()
+
+    for i, (question, count) in enumerate(questions, 1):
+        entry = store.get(question)
+        if entry is not None and not force and store.is_fresh(entry, index_version):
+            summary["fresh"] += 1
+            continue
+
+        try:
+            answer = agent.precompute_answer(question)
+        except Exception as e:
+            logger.warning(f"⚠️ [{i}/{len(questions)}] Generation failed for '{question[:60]}': {str(e)}")
+            summary["failed"] += 1
+            continue
+
+        if answer is None:
+            logger.info(f"⏭️ [{i}/{len(questions)}] No generated answer (greeting / off-topic): {question[:60]}")
+            summary["skipped"] += 1
+            continue
+
+        store.upsert(**answer, frequency=count)
+        summary["generated"] += 1
+        logger.info(f"✅ [{i}/{len(questions)}] {question[:60]} ({answer['generation_time']:.2f}s)")
+
+    summary["processing_time"] = time.time() - start_time
+    logger.success(
+        f"🎉 FAQ answers for index version {index_version}: {summary['generated']} generated, "
+        f"{summary['fresh']} already fresh, {summary['skipped']} skipped, {summary['failed']} failed "
+        f"({len(store)} stored, {summary['processing_time']:.1f}s)"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute answers to the most frequent questions")
+    parser.add_argument("--top", type=int, default=50, help="Most frequent logged questions to answer")
+    parser.add_argument("--min-count", type=int, default=3, help="Minimum times a question was asked")
+    parser.add_argument("--log", help="Question log (default QUESTION_LOG_PATH)")
+    parser.add_argument("--no-references", action="store_true", help="Skip the domain reference questions")
+    parser.add_argument("--force", action="store_true", help="Regenerate answers that are still fresh")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the questions that would be answered")
+
+    args = parser.parse_args()
+
+    try:
+        result = precompute_faq(args.top, args.min_count, not args.no_references, args.force, args.dry_run, args.log)
+        sys.exit(0 if result.get("success") else 1)
+    except KeyboardInterrupt:
+        logger.warning("FAQ precomputation interrupted by user")
+        sys.exit(130)
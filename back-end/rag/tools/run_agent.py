@@ -4,10 +4,12 @@ Career Counseling RAG Agent Runner
 Test the career counseling RAG system with real retrieval and generation
 """
 
+import json
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from loguru import logger
 
 # Add src to path for imports
@@ -196,6 +198,110 @@ def test_different_question_types():
         logger.error(f"❌ Testing failed: {str(e)}")
 
 
+def load_eval_questions(path: Path) -> List[Dict[str, Any]]:
+    """
+    Load evaluation questions from a JSONL file or a plain text file
+
+    JSONL lines look like ``{"question": "...", "expected_sources": ["file.pdf"]}``
+    where ``expected_sources`` is optional; text files hold one question per line.
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            items.append(json.loads(line) if line.startswith("{") else {"question": line})
+    return items
+
+
+def run_batch_evaluation(eval_file: str, k: int = 5, output_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Evaluate retrieval for many questions with one batched search
+
+    All questions are embedded in batches and searched together with
+    ``VectorStore.search_similar_batch``; no answers are generated.
+
+    Args:
+        eval_file: JSONL or text file with questions
+        k: Chunks retrieved per question
+        output_file: Optional JSON file for per-question results
+
+    Returns:
+        Dict with summary metrics
+    """
+    setup_logging()
+
+    items = load_eval_questions(Path(eval_file))
+    if not items:
+        logger.warning(f"No questions found in {eval_file}")
+        return {"questions": 0, "success": False}
+
+    logger.info(f"🧪 Batch evaluation: {len(items)} questions, k={k}")
+
+    try:
+        config = load_config()
+        agent = CareerCounselingAgent(config)
+        questions = [item["question"] for item in items]
+
+        start_time = time.time()
+        embeddings = agent.embedding_generator.generate_batch(questions)
+        embed_s = time.time() - start_time
+
+        start_time = time.time()
+        results = agent.vector_store.search_similar_batch(embeddings, k=k)
+        search_s = time.time() - start_time
+
+        rows, hits, labelled = [], 0, 0
+        for item, docs in zip(items, results):
+            sources = [doc.get("metadata", {}).get("source") for doc in docs]
+            row = {
+                "question": item["question"],
+                "top_score": docs[0]["similarity_score"] if docs else 0.0,
+                "chunk_ids": [doc["_id"] for doc in docs],
+                "sources": sources,
+            }
+            expected = item.get("expected_sources")
+            if expected:
+                labelled += 1
+                row["hit"] = any(source in expected for source in sources)
+                hits += row["hit"]
+            rows.append(row)
+
+        summary = {
+            "questions": len(items),
+            "k": k,
+            "embedding_time": embed_s,
+            "search_time": search_s,
+            "search_ms_per_query": search_s * 1000 / len(items),
+            "mean_top_score": sum(row["top_score"] for row in rows) / len(rows),
+            "hit_rate": hits / labelled if labelled else None,
+            "success": True,
+        }
+
+        print("\n" + "="*80)
+        print("🧪 BATCH RETRIEVAL EVALUATION")
+        print("="*80)
+        print(f"📝 Questions: {summary['questions']} (k={k})")
+        print(f"⏱️  Embedding: {embed_s:.2f}s, search: {search_s:.2f}s "
+              f"({summary['search_ms_per_query']:.2f} ms/question)")
+        print(f"📊 Mean top similarity: {summary['mean_top_score']:.3f}")
+        if labelled:
+            print(f"🎯 Source hit@{k}: {summary['hit_rate']:.3f} over {labelled} labelled questions")
+        print("="*80 + "\n")
+
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as f:
+                json.dump({"summary": summary, "results": rows}, f, ensure_ascii=False, indent=2)
+            logger.success(f"💾 Saved evaluation results to {output_file}")
+
+        return summary
+
+    except Exception as e:
+        logger.error(f"❌ Batch evaluation failed: {str(e)}")
+        return {"questions": len(items), "success": False, "error": str(e)}
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -215,6 +321,23 @@ if __name__ == "__main__":
         action="store_true",
         help="Run test with different question types"
     )
+    parser.add_argument(
+        "--eval", "-e",
+        type=str,
+        metavar="FILE",
+        help="Batch retrieval evaluation over a JSONL/text file of questions"
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=5,
+        help="Chunks retrieved per question in --eval mode"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=str,
+        help="JSON file for per-question --eval results"
+    )
     
     args = parser.parse_args()
     
@@ -223,6 +346,9 @@ if __name__ == "__main__":
             run_interactive_session()
         elif args.test:
             test_different_question_types()
+        elif args.eval:
+            result = run_batch_evaluation(args.eval, k=args.k, output_file=args.output)
+            sys.exit(0 if result.get("success") else 1)
         elif args.question:
             result = run_career_agent_query(args.question)
             exit_code = 0 if result.get("success", True) else 1
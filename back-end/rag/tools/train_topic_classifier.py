@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Topic Classifier Training
+Fits the embedding classifier of the tiered off-topic check on the LLM
+verdicts the agent logged (plus the domain reference questions as
+career-related examples), picks the uncertainty band on a holdout split and
+reports the share of checks that would avoid the LLM and the time saved.
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from loguru import logger
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+try:
+    from rag_system.shared.config import load_config
+    from rag_system.offline.embeddings import EmbeddingGenerator
+    from rag_system.online.domain_references import DomainReferences
+    from rag_system.online.question_log import QuestionLog, question_hash
+    from rag_system.online.topic_classifier import TOPIC_CLASSIFIER_FILE, TopicClassifier, load_verdicts
+except ImportError as e:
+    logger.error(f"❌ Import error: {str(e)}")
+    logger.info("💡 Make sure to run: uv pip install -e .")
+    sys.exit(1)
+
+
+def setup_logging():
+    """Configure logging"""
+    logger.remove()
+    logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>.<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level="INFO"
+    )
+
+
+def choose_band(probabilities: np.ndarray, labels: np.ndarray, target_agreement: float) -> Tuple[float, float]:
+    """
+    Narrowest band around 0.5 outside which predictions agree with the LLM often enough
+
+    Args:
+        probabilities: Holdout probabilities of being career-related
+        labels: Holdout LLM verdicts (1 = career-related)
+        target_agreement: Required agreement on the questions decided locally
+
+    Returns:
+        (low, high) probability thresholds
+    """
+    predictions = probabilities >= 0.5
+    for margin in np.arange(0.0, 0.5, 0.01):
+        decided = (probabilities >= 0.5 + margin) | (probabilities <= 0.5 - margin)
+        if decided.any() and np.mean(predictions[decided] == labels[decided]) >= target_agreement:
+            return round(0.5 - margin, 2), round(0.5 + margin, 2)
+    logger.warning(f"⚠️ No band reaches {target_agreement:.0%} agreement, only near-certain predictions are used")
+    return 0.01, 0.99
+
+
+def train_topic_classifier(
+    log_path: Optional[str] = None,
+    holdout: float = 0.2,
+    target_agreement: float = 0.98,
+    min_per_class: int = 20,
+    include_references: bool = True,
+    epochs: int = 500,
+    l2: float = 1e-3,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Train and evaluate the topic classifier
+
+    Args:
+        log_path: Topic verdict log (default TOPIC_VERDICT_LOG_PATH)
+        holdout: Share of verdicts held out to choose the band and report
+        target_agreement: Required agreement with the LLM outside the band
+        min_per_class: Minimum verdicts of each class to train
+        include_references: Add the domain reference questions as career-related
+        epochs: Gradient descent steps
+        l2: L2 penalty
+        dry_run: Evaluate without saving the classifier
+
+    Returns:
+        Evaluation report
+    """
+    setup_logging()
+    config = load_config()
+    start_time = time.time()
+
+    log = QuestionLog(Path(log_path) if log_path else config.topic_verdict_log_path)
+    verdicts = load_verdicts(log)
+    questions = [question for question, _, _ in verdicts]
+    labels = np.array([relevant for _, relevant, _ in verdicts], dtype=np.float32)
+    llm_seconds = [seconds for _, _, seconds in verdicts if seconds > 0]
+    avg_llm_seconds = float(np.mean(llm_seconds)) if llm_seconds else 0.0
+    logger.info(f"📊 {len(verdicts)} logged LLM verdicts in {log.path}: "
+                f"{int(labels.sum())} career-related, {int(len(labels) - labels.sum())} off-topic")
+
+    if min(labels.sum(), len(labels) - labels.sum()) < min_per_class:
+        logger.error(f"❌ Need at least {min_per_class} verdicts of each class to train")
+        return {"success": False, "verdicts": len(verdicts)}
+
+    embeddings = np.array(EmbeddingGenerator(config).generate_batch(questions), dtype=np.float32)
+
+    rng = np.random.default_rng(0)
+    order = rng.permutation(len(questions))
+    holdout_size = max(int(len(questions) * holdout), 1)
+    test, train = order[:holdout_size], order[holdout_size:]
+
+    train_embeddings, train_labels = embeddings[train], labels[train]
+    if include_references:
+        # Reference questions are career-related by definition; their embeddings are already saved
+        references = DomainReferences(config.index_dir / "domain_references.npz", config.embedding_model_name)
+        held_out = {question_hash(questions[i]) for i in test}
+        keep = [i for i, question in enumerate(references.questions) if question_hash(question) not in held_out]
+        if keep and references.matrix.shape[1] == embeddings.shape[1]:
+            train_embeddings = np.vstack([train_embeddings, references.matrix[keep]])
+            train_labels = np.concatenate([train_labels, np.ones(len(keep), dtype=np.float32)])
+            logger.info(f"➕ {len(keep)} domain reference questions added as career-related")
+
+    classifier = TopicClassifier.fit(train_embeddings, train_labels, config.embedding_model_name, l2=l2, epochs=epochs)
+
+    probabilities = classifier.predict_proba(embeddings[test])
+    test_labels = labels[test].astype(bool)
+    classifier.low, classifier.high = choose_band(probabilities, test_labels, target_agreement)
+    decided = (probabilities >= classifier.high) | (probabilities <= classifier.low)
+    predictions = probabilities >= 0.5
+
+    report = {
+        "success": True,
+        "verdicts": len(verdicts),
+        "train": len(train_labels),
+        "holdout": len(test),
+        "holdout_accuracy": float(np.mean(predictions == test_labels)),
+        "band": [classifier.low, classifier.high],
+        "llm_avoided_share": float(decided.mean()),
+        "agreement_when_decided": float(np.mean(predictions[decided] == test_labels[decided])) if decided.any() else 0.0,
+        "avg_llm_seconds": avg_llm_seconds,
+        "llm_seconds_saved_per_1000_checks": float(decided.mean()) * avg_llm_seconds * 1000,
+        "processing_time": time.time() - start_time,
+    }
+
+    print("\n" + "=" * 70)
+    print(f"Verdicts (train / holdout):     {report['train']} / {report['holdout']}")
+    print(f"Holdout accuracy at 0.5:        {report['holdout_accuracy']:.1%}")
+    print(f"Uncertainty band:               {classifier.low:.2f} - {classifier.high:.2f}")
+    print(f"Checks decided without the LLM: {report['llm_avoided_share']:.1%} "
+          f"(agreeing with the LLM on {report['agreement_when_decided']:.1%})")
+    print(f"Mean LLM topic check latency:   {avg_llm_seconds:.2f}s "
+          f"-> {report['llm_seconds_saved_per_1000_checks']:.0f}s saved per 1000 checks")
+    print("=" * 70 + "\n")
+
+    if not dry_run:
+        path = config.index_dir / TOPIC_CLASSIFIER_FILE
+        classifier.save(path)
+        logger.success(f"💾 Saved topic classifier to {path}; servers load it on start")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the embedding classifier of the off-topic check")
+    parser.add_argument("--log", help="Topic verdict log (default TOPIC_VERDICT_LOG_PATH)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of verdicts held out for evaluation")
+    parser.add_argument("--target-agreement", type=float, default=0.98, help="Required agreement with the LLM outside the band")
+    parser.add_argument("--min-per-class", type=int, default=20, help="Minimum verdicts of each class")
+    parser.add_argument("--no-references", action="store_true", help="Do not add the domain reference questions")
+    parser.add_argument("--epochs", type=int, default=500, help="Gradient descent steps")
+    parser.add_argument("--l2", type=float, default=1e-3, help="L2 penalty")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate without saving the classifier")
+
+    args = parser.parse_args()
+
+    try:
+        result = train_topic_classifier(
+            args.log, args.holdout, args.target_agreement, args.min_per_class,
+            not args.no_references, args.epochs, args.l2, args.dry_run
+        )
+        sys.exit(0 if result.get("success") else 1)
+    except KeyboardInterrupt:
+        logger.warning("Training interrupted by user")
+        sys.exit(130)
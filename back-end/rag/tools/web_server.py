@@ -1,8 +1,9 @@
+import json
 import os
 import sys
 import time
 from pathlib import Path
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from loguru import logger
 
@@ -42,6 +43,14 @@ def initialize_agent():
         logger.info("🔧 Initializing career counseling agent...")
         config = load_config()
         career_agent = CareerCounselingAgent(config)
+        
+        # Load the local vector index up front instead of on the first request;
+        # the exact index memory-maps the published embedding snapshot
+        career_agent.vector_store.load_local_index()
+        
+        # Keep precomputed FAQ answers in step with the index
+        career_agent.start_faq_refresher()
+        
         logger.success("✅ Career agent initialized successfully")
         return True
     except Exception as e:
@@ -133,6 +142,75 @@ def ask_question():
             'type': 'system_error'
         }), 500
 
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# API endpoint: ask question, streaming the answer as server-sent events
+@app.route('/api/ask/stream', methods=['POST'])
+@firebase_required
+def ask_question_stream():
+    global career_agent
+
+    user_info = getattr(request, 'current_user', None) or {}
+
+    if career_agent is None:
+        return jsonify({
+            'error': 'Career agent not initialized',
+            'response': 'Hệ thống đang khởi động, vui lòng thử lại sau.',
+            'type': 'system_error'
+        }), 500
+
+    data = request.get_json()
+    if not data or 'question' not in data:
+        return jsonify({
+            'error': 'No question provided',
+            'response': 'Vui lòng cung cấp câu hỏi.',
+            'type': 'invalid_request'
+        }), 400
+
+    question = data['question'].strip()
+    if not question:
+        return jsonify({
+            'error': 'Empty question',
+            'response': 'Câu hỏi không được để trống.',
+            'type': 'empty_question'
+        }), 400
+
+    logger.info(f"🌊 Streaming API Request from {user_info.get('email', 'unknown')}: {question[:100]}...")
+
+    def generate():
+        start_time = time.time()
+        try:
+            # metadata first, then one token event per LLM chunk, then done
+            for event in career_agent.answer_question_stream(question):
+                if event['event'] == 'token':
+                    yield sse_event('token', {'text': event['data']})
+                elif event['event'] == 'done':
+                    result = dict(event['data'])
+                    result['api_processing_time'] = time.time() - start_time
+                    yield sse_event('done', result)
+                else:
+                    yield sse_event(event['event'], event['data'])
+            logger.success(f"✅ API stream finished ({time.time() - start_time:.2f}s)")
+        except Exception as e:
+            logger.error(f"❌ API Stream Error: {str(e)}")
+            yield sse_event('error', {
+                'error': str(e),
+                'response': 'Xin lỗi, có lỗi xảy ra. Vui lòng thử lại sau.',
+                'type': 'system_error'
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop reverse proxies from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 # API endpoint: system status
 @app.route('/api/status')
 def get_status():
@@ -149,7 +227,11 @@ def get_status():
             status.update({
                 'agent_info': agent_info,
                 'model': config.openai_model_name,
-                'embedding_model': config.embedding_model_name
+                'embedding_model': config.embedding_model_name,
+                'query_embedding_cache': agent_info['query_embedding_cache'],
+                'semantic_answer_cache': agent_info['semantic_answer_cache'],
+                'topic_check': agent_info['topic_check'],
+                'faq_answers': agent_info['faq_answers']
             })
         return jsonify(status)
     except Exception as e:
@@ -200,6 +282,7 @@ if __name__ == '__main__':
     logger.info(f"🌐 API server listening at http://{host}:{port}")
     logger.info("📋 Available endpoints:")
     logger.info("   - POST /api/ask       - Ask questions")
+    logger.info("   - POST /api/ask/stream - Ask questions, answer streamed as server-sent events")
     logger.info("   - GET  /api/status    - System status")
     logger.info("   - GET  /api/health    - Health check")
 